@@ -0,0 +1,89 @@
+import timeit
+
+
+from renderscript.builtin_functions import register_builtins
+from renderscript.closure_compiler import compile_closures
+from renderscript.interpreter import SlotInterpreter
+from renderscript.resolver import resolve
+from renderscript.codegen import transpile
+from renderscript.utils import compile_script, execute_compiled, make_default_interpreter, make_default_context
+
+
+SCRIPT = """
+(let lines (splitlines (exec-cmd "sh run")))
+(let fixes
+    (for-each line lines
+        (if (equals (length (split " " line)) 2)
+            (append "no " line)
+            line)))
+(for-each fix fixes (exec-cmd fix))
+(length fixes)
+"""
+
+NESTED_SCRIPT = """
+(let a 1)
+(let b 2)
+(for-each w (list 1 2 3 4 5 6 7 8)
+    (for-each x (list 1 2 3 4 5 6 7 8)
+        (for-each y (list 1 2 3 4 5 6 7 8)
+            (list a b w x y a b w x y))))
+"""
+
+DEVICE_OUTPUT = "\n".join(f"snmp-server community{index}" for index in range(500))
+
+
+def _exec_cmd(evaluate, _name, cmd):
+    command = evaluate(cmd)
+    return DEVICE_OUTPUT if command == "sh run" else "ok"
+
+
+def main(number=20):
+    for name, script in [("remediation", SCRIPT), ("nested scopes", NESTED_SCRIPT)]:
+        print(name)
+        _compare_backends(compile_script(script), number)
+
+
+def _compare_backends(compiled_script, number):
+
+    def _tree_walker():
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('exec-cmd', _exec_cmd)
+        return execute_compiled(compiled_script, interpreter)
+
+    resolution = resolve(compiled_script)
+
+    def _slot_interpreter():
+        interpreter = SlotInterpreter(resolution=resolution)
+        register_builtins(interpreter)
+        interpreter.register_external_call('exec-cmd', _exec_cmd)
+        return execute_compiled(compiled_script, interpreter)
+
+    closures = compile_closures(compiled_script)
+
+    def _closures():
+        context = make_default_context()
+        context.register_external_call('exec-cmd', _exec_cmd)
+        return closures.run(context)
+
+    transpiled = transpile(compiled_script)
+
+    def _transpiled():
+        context = make_default_context()
+        context.register_external_call('exec-cmd', _exec_cmd)
+        return transpiled.run(context)
+
+    backends = [
+        ("tree walker", _tree_walker),
+        ("slots", _slot_interpreter),
+        ("closures", _closures),
+        ("transpiled", _transpiled),
+    ]
+    baseline = None
+    for name, run in backends:
+        elapsed = min(timeit.repeat(run, number=number, repeat=3)) / number
+        baseline = baseline or elapsed
+        print(f"  {name:<12} {elapsed * 1000:8.3f} ms/run  {baseline / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
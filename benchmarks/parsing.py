@@ -0,0 +1,44 @@
+import timeit
+import tracemalloc
+
+
+from renderscript.parsing.tokeniser import ScanningTokeniser
+from renderscript.parsing.parser import parse
+from renderscript.parsing.build import build
+from renderscript.parsing.direct_build import build_direct
+
+
+BLOCK = """
+(let interface{index} (make-map "name" "GigabitEthernet0/{index}" "mtu" 9000 "enabled" true))
+(if (equals (length (split " " (exec-cmd "sh int GigabitEthernet0/{index}"))) 2)
+    (do (exec-cmd "interface GigabitEthernet0/{index}") (exec-cmd "no shutdown"))
+    (for-each line (splitlines (exec-cmd "sh run")) (append "no " line)))
+"""
+
+
+def _two_stage(script):
+    return build(parse(ScanningTokeniser(script)))
+
+
+def _direct(script):
+    return build_direct(ScanningTokeniser(script))
+
+
+def main(blocks=2000, number=1):
+    script = "".join(BLOCK.format(index=index) for index in range(blocks))
+    print(f"{len(script) / 1024 / 1024:.1f} MiB script")
+    baseline = None
+    for name, builder in [("two stage", _two_stage), ("direct", _direct)]:
+        elapsed = min(timeit.repeat(lambda: builder(script), number=number, repeat=3)) / number
+        baseline = baseline or elapsed
+        tracemalloc.start()
+        compiled_script = builder(script)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del compiled_script
+        print(f"  {name:<10} {elapsed * 1000:9.1f} ms  {baseline / elapsed:5.2f}x  "
+              f"peak {peak / 1024 / 1024:7.1f} MiB  retained {retained / 1024 / 1024:6.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
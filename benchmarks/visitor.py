@@ -0,0 +1,54 @@
+import inspect
+import timeit
+
+
+from renderscript.interpreter import Interpreter
+from renderscript.render import MarkdownRenderer
+from renderscript.sexp_renderer import SexpVisitor
+from renderscript import structure
+
+
+def _per_instance_scan(visitor):
+    for _, method in inspect.getmembers(visitor, inspect.ismethod):
+        if visitor._get_single_annotated_parameter(method):
+            visitor.register_accept_method(method)
+
+
+def main(number=2000):
+    print("construction")
+    for visitor_type in [Interpreter, MarkdownRenderer, SexpVisitor]:
+        visitor = visitor_type()
+        scan = min(timeit.repeat(lambda: _per_instance_scan(visitor), number=number, repeat=3)) / number
+        cached = min(timeit.repeat(visitor.auto_detect_accept_methods, number=number, repeat=3)) / number
+        construct = min(timeit.repeat(visitor_type, number=number, repeat=3)) / number
+        print(f"  {visitor_type.__name__:<17} inspect scan {scan * 1e6:8.1f} us  "
+              f"cached table {cached * 1e6:6.1f} us  full construction {construct * 1e6:7.1f} us")
+
+    print("dispatch")
+    interpreter = Interpreter()
+    node = structure.Number(1)
+    accept = min(timeit.repeat(lambda: interpreter.accept(node), number=number * 100, repeat=3)) / (number * 100)
+    direct = min(timeit.repeat(lambda: interpreter.accept_number(node), number=number * 100, repeat=3)) / (number * 100)
+    print(f"  accept {accept * 1e9:6.1f} ns  direct method call {direct * 1e9:6.1f} ns")
+
+    print("middleware")
+    for count in [1, 3]:
+        for _ in range(count - len(interpreter._pipeline)):
+            interpreter.add_middleware(_passthrough)
+        wrapped = min(timeit.repeat(lambda: interpreter.accept(node), number=number * 100, repeat=3)) / (number * 100)
+        interpreter.add_middleware(_strings_only, node_types=[structure.String])
+        filtered = min(timeit.repeat(lambda: interpreter.accept(node), number=number * 100, repeat=3)) / (number * 100)
+        interpreter.remove_middleware(_strings_only)
+        print(f"  {count} passthrough {wrapped * 1e9:6.1f} ns  with a filtered-out middleware {filtered * 1e9:6.1f} ns")
+
+
+def _passthrough(accept, visiting):
+    return accept(visiting)
+
+
+def _strings_only(accept, visiting):
+    return accept(visiting)
+
+
+if __name__ == '__main__':
+    main()
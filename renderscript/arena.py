@@ -0,0 +1,294 @@
+import array
+import enum
+import struct
+import sys
+import typing
+
+
+from .visitor import Visitor
+from . import structure
+
+
+NO_NODE = -1
+
+
+@enum.unique
+class NodeKinds(enum.IntEnum):
+    COMMENT = 0
+    DO = 1
+    BOOL = 2
+    NUMBER = 3
+    STRING = 4
+    LIST = 5
+    MAKE_MAP = 6
+    IDENTIFIER = 7
+    IF = 8
+    LET = 9
+    FOR_EACH = 10
+    PARALLEL_FOR_EACH = 11
+    CALL = 12
+
+
+@enum.unique
+class ConstantKinds(enum.IntEnum):
+    STRING = 0
+    INTEGER = 1
+    FLOAT = 2
+    TRUE = 3
+    FALSE = 4
+
+
+_MAGIC = b'RSA1'
+_HEADER = struct.Struct('<4sB3xQQQQ')
+_BYTE_ORDERS = {'little': 0, 'big': 1}
+
+
+class ArenaNode:
+    __slots__ = ('arena', 'index')
+
+    def __init__(self, arena: 'Arena', index: int):
+        self.arena = arena
+        self.index = index
+
+    @property
+    def kind(self) -> NodeKinds:
+        return NodeKinds(self.arena.kinds[self.index])
+
+    def to_structure(self) -> structure.Node:
+        return self.arena.to_structure_node(self.index)
+
+    def __repr__(self):
+        return f"ArenaNode({self.kind.name} at {self.index})"
+
+
+class Arena:
+
+    def __init__(self, kinds, first_child, next_sibling, constants, roots,
+                 constant_kinds, constant_offsets, constant_data):
+        self.kinds = kinds
+        self.first_child = first_child
+        self.next_sibling = next_sibling
+        self.constants = constants
+        self.roots = roots
+        self.constant_kinds = constant_kinds
+        self.constant_offsets = constant_offsets
+        self.constant_data = constant_data
+        self._decoded_constants = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @classmethod
+    def from_structure(cls, compiled_script: typing.Iterable[structure.Node]) -> 'Arena':
+        return _ArenaBuilder().build(compiled_script)
+
+    @classmethod
+    def from_buffer(cls, buffer) -> 'Arena':
+        view = memoryview(buffer).cast('B')
+        magic, byte_order, node_count, root_count, constant_count, data_length = _HEADER.unpack_from(view)
+        if magic != _MAGIC:
+            raise Exception("buffer does not contain a serialised arena")
+        if byte_order != _BYTE_ORDERS[sys.byteorder]:
+            raise Exception("arena was serialised with a different byte order")
+
+        offset = _HEADER.size
+        sections = []
+        for typecode, count in [('B', node_count), ('i', node_count), ('i', node_count), ('i', node_count),
+                                ('i', root_count), ('B', constant_count), ('q', constant_count + 1)]:
+            length = count * array.array(typecode).itemsize
+            sections.append(view[offset:offset + length].cast(typecode))
+            offset = _aligned(offset + length)
+        constant_data = view[offset:offset + data_length]
+        return cls(*sections, constant_data)
+
+    def to_bytes(self) -> bytes:
+        sections = [
+            array.array('B', self.kinds),
+            array.array('i', self.first_child),
+            array.array('i', self.next_sibling),
+            array.array('i', self.constants),
+            array.array('i', self.roots),
+            array.array('B', self.constant_kinds),
+            array.array('q', self.constant_offsets),
+        ]
+        output = bytearray(_HEADER.pack(
+            _MAGIC, _BYTE_ORDERS[sys.byteorder],
+            len(self.kinds), len(self.roots), len(self.constant_kinds), len(self.constant_data)
+        ))
+        for section in sections:
+            output += section.tobytes()
+            output += bytes(_aligned(len(output)) - len(output))
+        output += self.constant_data
+        return bytes(output)
+
+    def children(self, index: int) -> typing.Iterator[int]:
+        child = self.first_child[index]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def value(self, index: int) -> typing.Any:
+        return self.constant(self.constants[index])
+
+    def constant(self, constant_index: int) -> typing.Any:
+        try:
+            return self._decoded_constants[constant_index]
+        except KeyError:
+            pass
+        kind = self.constant_kinds[constant_index]
+        if kind == ConstantKinds.TRUE:
+            value = True
+        elif kind == ConstantKinds.FALSE:
+            value = False
+        else:
+            start = self.constant_offsets[constant_index]
+            end = self.constant_offsets[constant_index + 1]
+            text = str(self.constant_data[start:end], 'utf-8')
+            if kind == ConstantKinds.INTEGER:
+                value = int(text)
+            elif kind == ConstantKinds.FLOAT:
+                value = float(text)
+            else:
+                value = sys.intern(text)
+        self._decoded_constants[constant_index] = value
+        return value
+
+    def to_structure(self) -> typing.List[structure.Node]:
+        return [self.to_structure_node(root) for root in self.roots]
+
+    def to_structure_node(self, index: int) -> structure.Node:
+        kind = self.kinds[index]
+        if kind == NodeKinds.COMMENT:
+            return structure.Comment(self.value(index))
+        elif kind == NodeKinds.BOOL:
+            return structure.Bool(self.value(index))
+        elif kind == NodeKinds.NUMBER:
+            return structure.Number(self.value(index))
+        elif kind == NodeKinds.STRING:
+            return structure.String(self.value(index))
+        elif kind == NodeKinds.IDENTIFIER:
+            return structure.Identifier(self.value(index))
+
+        children = [self.to_structure_node(child) for child in self.children(index)]
+        if kind == NodeKinds.DO:
+            return structure.Do(children)
+        elif kind == NodeKinds.LIST:
+            return structure.List(children)
+        elif kind == NodeKinds.MAKE_MAP:
+            return structure.MakeMap(list(zip(children[::2], children[1::2])))
+        elif kind == NodeKinds.IF:
+            return structure.If(*children)
+        elif kind == NodeKinds.LET:
+            return structure.Let(*children)
+        elif kind == NodeKinds.FOR_EACH:
+            return structure.ForEach(*children)
+        elif kind == NodeKinds.PARALLEL_FOR_EACH:
+            return structure.ParallelForEach(*children)
+        elif kind == NodeKinds.CALL:
+            return structure.Call(children[0], children[1:])
+        raise Exception(f"unknown arena node kind {kind} at {index}")
+
+
+class _ArenaBuilder(Visitor):
+
+    def __init__(self):
+        super().__init__(throw_on_unknown=True)
+        self.auto_detect_accept_methods()
+        self.kinds = array.array('B')
+        self.first_child = array.array('i')
+        self.next_sibling = array.array('i')
+        self.constants = array.array('i')
+        self.constant_kinds = array.array('B')
+        self.constant_offsets = array.array('q', [0])
+        self.constant_data = bytearray()
+        self._constant_indices = {}
+
+    def build(self, compiled_script: typing.Iterable[structure.Node]) -> Arena:
+        roots = array.array('i', [self.accept(node) for node in compiled_script])
+        return Arena(
+            self.kinds, self.first_child, self.next_sibling, self.constants, roots,
+            self.constant_kinds, self.constant_offsets, bytes(self.constant_data)
+        )
+
+    def _add(self, kind, children=(), constant=NO_NODE):
+        index = len(self.kinds)
+        self.kinds.append(kind)
+        self.first_child.append(children[0] if children else NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.constants.append(constant)
+        for previous, child in zip(children, children[1:]):
+            self.next_sibling[previous] = child
+        return index
+
+    def _add_parent(self, kind, nodes):
+        return self._add(kind, [self.accept(node) for node in nodes])
+
+    def _add_constant(self, kind, value):
+        if value is True:
+            constant_kind, data = ConstantKinds.TRUE, b''
+        elif value is False:
+            constant_kind, data = ConstantKinds.FALSE, b''
+        elif isinstance(value, int):
+            constant_kind, data = ConstantKinds.INTEGER, str(value).encode('ascii')
+        elif isinstance(value, float):
+            constant_kind, data = ConstantKinds.FLOAT, repr(value).encode('ascii')
+        else:
+            constant_kind, data = ConstantKinds.STRING, value.encode('utf-8')
+
+        key = (constant_kind, data)
+        constant = self._constant_indices.get(key)
+        if constant is None:
+            constant = len(self.constant_kinds)
+            self.constant_kinds.append(constant_kind)
+            self.constant_data += data
+            self.constant_offsets.append(len(self.constant_data))
+            self._constant_indices[key] = constant
+        return self._add(kind, constant=constant)
+
+    def accept_do(self, do_node: structure.Do):
+        return self._add_parent(NodeKinds.DO, do_node.children)
+
+    def accept_bool(self, bool_node: structure.Bool):
+        return self._add_constant(NodeKinds.BOOL, bool_node.value)
+
+    def accept_number(self, number_node: structure.Number):
+        return self._add_constant(NodeKinds.NUMBER, number_node.value)
+
+    def accept_string(self, string_node: structure.String):
+        return self._add_constant(NodeKinds.STRING, string_node.value)
+
+    def accept_list(self, list_node: structure.List):
+        return self._add_parent(NodeKinds.LIST, list_node.values)
+
+    def accept_map(self, map_node: structure.MakeMap):
+        entries = map_node.entries.items() if isinstance(map_node.entries, dict) else map_node.entries
+        return self._add_parent(NodeKinds.MAKE_MAP, [node for entry in entries for node in entry])
+
+    def accept_if(self, if_node: structure.If):
+        return self._add_parent(NodeKinds.IF, [if_node.condition, if_node.true, if_node.false])
+
+    def accept_identifier(self, identifier_node: structure.Identifier):
+        return self._add_constant(NodeKinds.IDENTIFIER, identifier_node.label)
+
+    def accept_let(self, let_node: structure.Let):
+        return self._add_parent(NodeKinds.LET, [let_node.name, let_node.expression])
+
+    def accept_foreach(self, foreach_node: structure.ForEach):
+        return self._add_parent(
+            NodeKinds.FOR_EACH, [foreach_node.value_name, foreach_node.collection, foreach_node.body]
+        )
+
+    def accept_parallel_foreach(self, foreach_node: structure.ParallelForEach):
+        return self._add_parent(
+            NodeKinds.PARALLEL_FOR_EACH, [foreach_node.value_name, foreach_node.collection, foreach_node.body]
+        )
+
+    def accept_comment(self, comment_node: structure.Comment):
+        return self._add_constant(NodeKinds.COMMENT, comment_node.text)
+
+    def accept_call(self, call_node: structure.Call):
+        return self._add_parent(NodeKinds.CALL, [call_node.target, *call_node.arguments])
+
+
+def _aligned(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
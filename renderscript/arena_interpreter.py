@@ -0,0 +1,163 @@
+import copy
+
+
+from .arena import Arena, ArenaNode, NodeKinds
+from .parallel import parallel_map, DEFAULT_PARALLEL_LIMIT
+from . import structure
+
+
+class ArenaInterpreter:
+
+    def __init__(self, arena: Arena, parallel_executor=None, parallel_limit=DEFAULT_PARALLEL_LIMIT):
+        self.arena = arena
+        self.variable_scopes = [{}]
+        self.external_calls = {}
+        self.pure_calls = set()
+        self.parallel_executor = parallel_executor
+        self.parallel_limit = parallel_limit
+        self._accept_methods = [None] * len(NodeKinds)
+        for kind, method in [
+            (NodeKinds.COMMENT, self.accept_comment),
+            (NodeKinds.DO, self.accept_do),
+            (NodeKinds.BOOL, self.accept_constant),
+            (NodeKinds.NUMBER, self.accept_constant),
+            (NodeKinds.STRING, self.accept_constant),
+            (NodeKinds.LIST, self.accept_list),
+            (NodeKinds.MAKE_MAP, self.accept_map),
+            (NodeKinds.IDENTIFIER, self.accept_identifier),
+            (NodeKinds.IF, self.accept_if),
+            (NodeKinds.LET, self.accept_let),
+            (NodeKinds.FOR_EACH, self.accept_foreach),
+            (NodeKinds.PARALLEL_FOR_EACH, self.accept_parallel_foreach),
+            (NodeKinds.CALL, self.accept_call),
+        ]:
+            self._accept_methods[kind] = method
+
+    def accept(self, index: int):
+        return self._accept_methods[self.arena.kinds[index]](index)
+
+    def prepare(self, index: int):
+        pass
+
+    def discard(self, index: int):
+        kind = self.arena.kinds[index]
+        if kind == NodeKinds.FOR_EACH:
+            for _ in self._iterate_foreach(index, self.discard):
+                pass
+        elif kind == NodeKinds.DO:
+            for child in self.arena.children(index):
+                self.discard(child)
+        elif kind == NodeKinds.IF:
+            condition, true, false = self.arena.children(index)
+            self.discard(true if self.accept(condition) else false)
+        else:
+            self.accept(index)
+
+    def iterate(self, index: int):
+        if self.arena.kinds[index] == NodeKinds.FOR_EACH:
+            return self._iterate_foreach(index, self.accept)
+        return iter(self.accept(index))
+
+    def register_external_call(self, name, callback, pure=False):
+        self.external_calls[name] = callback
+        if pure:
+            self.pure_calls.add(name)
+        else:
+            self.pure_calls.discard(name)
+
+    def _fork(self):
+        forked = copy.copy(self)
+        forked.variable_scopes = list(self.variable_scopes)
+        forked._accept_methods = [method.__func__.__get__(forked) for method in self._accept_methods]
+        return forked
+
+    def _lookup_variable(self, name):
+        for scope in reversed(self.variable_scopes):
+            if name in scope:
+                return scope[name]
+        raise Exception(f"unknown variable '{name}'")
+
+    def accept_do(self, index: int):
+        children = list(self.arena.children(index))
+        if not children:
+            return None
+        for child in children[:-1]:
+            self.discard(child)
+        return self.accept(children[-1])
+
+    def accept_constant(self, index: int):
+        return self.arena.value(index)
+
+    def accept_list(self, index: int):
+        return [
+            self.accept(child) for child in self.arena.children(index)
+        ]
+
+    def accept_map(self, index: int):
+        children = list(self.arena.children(index))
+        return dict([
+            (self.accept(key), self.accept(value))
+            for key, value in zip(children[::2], children[1::2])
+        ])
+
+    def accept_if(self, index: int):
+        condition, true, false = self.arena.children(index)
+        return self.accept(true) if self.accept(condition) else self.accept(false)
+
+    def accept_identifier(self, index: int):
+        return self._lookup_variable(self.arena.value(index))
+
+    def accept_let(self, index: int):
+        name, expression = self.arena.children(index)
+        self.variable_scopes[-1][self.arena.value(name)] = self.accept(expression)
+
+    def accept_foreach(self, index: int):
+        return list(self._iterate_foreach(index, self.accept))
+
+    def _iterate_foreach(self, index, evaluate_body):
+        value_name, collection, body = self.arena.children(index)
+        label = self.arena.value(value_name)
+        for value in self.iterate(collection):
+            self.variable_scopes.append({label: value})
+            result = evaluate_body(body)
+            self.variable_scopes.pop()
+            yield result
+
+    def accept_parallel_foreach(self, index: int):
+        value_name, collection, body = self.arena.children(index)
+        label = self.arena.value(value_name)
+
+        def _body(value):
+            iteration = self._fork()
+            iteration.variable_scopes.append({label: value})
+            return iteration.accept(body)
+
+        return parallel_map(_body, self.accept(collection), self.parallel_executor, self.parallel_limit)
+
+    def accept_comment(self, _index: int):
+        return None
+
+    def accept_call(self, index: int):
+        target, *arguments = self.arena.children(index)
+        name = self.arena.value(target)
+        argument_nodes = [self._argument_node(argument) for argument in arguments]
+        external_fn = self.external_calls.get(name)
+        if external_fn is None:
+            raise Exception(f"unknown function '{name}' (arguments: {argument_nodes})")
+
+        argument_indices = dict([
+            (id(node), argument)
+            for node, argument in zip(argument_nodes, arguments)
+        ])
+
+        def _evaluate(node):
+            argument = argument_indices.get(id(node))
+            if argument is None:
+                raise Exception(f"'{name}' cannot evaluate a node that is not one of its arguments: {node}")
+            return self.accept(argument)
+        return external_fn(_evaluate, name, *argument_nodes)
+
+    def _argument_node(self, index):
+        if self.arena.kinds[index] == NodeKinds.IDENTIFIER:
+            return structure.Identifier(self.arena.value(index))
+        return ArenaNode(self.arena, index)
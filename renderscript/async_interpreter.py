@@ -0,0 +1,200 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import inspect
+import threading
+import weakref
+
+
+from .interpreter import Interpreter
+from . import structure
+
+
+_driving_synchronous_call = contextvars.ContextVar('driving_synchronous_call', default=False)
+_synchronous_executor = None
+_synchronous_executor_lock = threading.Lock()
+
+
+def synchronous_executor() -> ThreadPoolExecutor:
+    global _synchronous_executor
+    with _synchronous_executor_lock:
+        if _synchronous_executor is None:
+            _synchronous_executor = ThreadPoolExecutor(thread_name_prefix='renderscript-async')
+        return _synchronous_executor
+
+
+class AsyncInterpreter(Interpreter):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._suspending_calls = {}
+
+    def register_external_call(self, name, callback, pure=False):
+        super().register_external_call(name, callback, pure)
+        self._suspending_calls.clear()
+
+    async def accept(self, visiting):
+        result = self._dispatch(visiting)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def _dispatch(self, visiting):
+        return Interpreter.accept(self, visiting)
+
+    async def accept_do(self, do_node: structure.Do):
+        result = None
+        for node in do_node.children:
+            result = await self.accept(node)
+        return result
+
+    async def accept_bool(self, bool_node: structure.Bool):
+        return bool_node.value
+
+    async def accept_number(self, number_node: structure.Number):
+        return number_node.value
+
+    async def accept_string(self, string_node: structure.String):
+        return string_node.value
+
+    async def accept_list(self, list_node: structure.List):
+        return [
+            await self.accept(value) for value in list_node.values
+        ]
+
+    async def accept_map(self, map_node: structure.MakeMap):
+        return dict([
+            (await self.accept(key), await self.accept(value))
+            for key, value in map_node.entries
+        ])
+
+    async def accept_if(self, if_node: structure.If):
+        if await self.accept(if_node.condition):
+            return await self.accept(if_node.true)
+        return await self.accept(if_node.false)
+
+    async def accept_identifier(self, identifier_node: structure.Identifier):
+        return self._lookup_variable(identifier_node.label)[1]
+
+    async def accept_let(self, let_node: structure.Let):
+        self._create_variable(
+            let_node.name.label,
+            await self.accept(let_node.expression)
+        )
+
+    async def accept_foreach(self, foreach_node: structure.ForEach):
+        results = []
+        for value in await self.accept(foreach_node.collection):
+            self._push_scope()
+            self._create_variable(foreach_node.value_name.label, value)
+            results.append(await self.accept(foreach_node.body))
+            self._pop_scope()
+        return results
+
+    async def accept_parallel_foreach(self, foreach_node: structure.ParallelForEach):
+        semaphore = asyncio.Semaphore(self.parallel_limit)
+
+        async def _body(value):
+            async with semaphore:
+                iteration = self._fork()
+                iteration._push_scope()
+                iteration._create_variable(foreach_node.value_name.label, value)
+                return await iteration.accept(foreach_node.body)
+
+        return list(await asyncio.gather(*[
+            _body(value) for value in await self.accept(foreach_node.collection)
+        ]))
+
+    async def accept_comment(self, _comment_node: structure.Comment):
+        return None
+
+    async def accept_call(self, call_node: structure.Call):
+        name = call_node.target.label
+        external_fn = self.external_calls.get(name)
+        if external_fn is None:
+            raise Exception(f"unknown function '{name}' (arguments: {call_node.arguments})")
+        if asyncio.iscoroutinefunction(external_fn):
+            return await external_fn(self.accept, name, *call_node.arguments)
+        return await self._call_synchronous(external_fn, name, call_node)
+
+    async def _call_synchronous(self, external_fn, name, call_node):
+        suspending = self._suspending_arguments(call_node)
+        if not any(suspending):
+            result = external_fn(self._evaluate_without_suspending, name, *call_node.arguments)
+        elif _driving_synchronous_call.get():
+            result = await self._call_with_evaluated_arguments(external_fn, name, call_node.arguments, suspending)
+        else:
+            result = await self._call_in_executor(external_fn, name, call_node.arguments)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def _suspending_arguments(self, call_node):
+        key = id(call_node)
+        entry = self._suspending_calls.get(key)
+        if entry is None:
+            entry = (
+                weakref.ref(call_node, lambda _ref: self._suspending_calls.pop(key, None)),
+                tuple(
+                    any(self._is_coroutine_call(node) for node in structure.walk([argument]))
+                    for argument in call_node.arguments
+                )
+            )
+            self._suspending_calls[key] = entry
+        return entry[1]
+
+    def _is_coroutine_call(self, node):
+        return type(node) is structure.Call and asyncio.iscoroutinefunction(self.external_calls.get(node.target.label))
+
+    async def _call_with_evaluated_arguments(self, external_fn, name, arguments, suspending):
+        evaluated = {}
+        for argument, suspends in zip(arguments, suspending):
+            if suspends:
+                evaluated[id(argument)] = await self.accept(argument)
+
+        def _evaluate(node):
+            if id(node) in evaluated:
+                return evaluated[id(node)]
+            return self._evaluate_without_suspending(node)
+
+        return external_fn(_evaluate, name, *arguments)
+
+    async def _call_in_executor(self, external_fn, name, arguments):
+        loop = asyncio.get_running_loop()
+        lock = threading.Lock()
+        cancelled = threading.Event()
+        pending = set()
+
+        def _evaluate(node):
+            with lock:
+                if cancelled.is_set():
+                    raise asyncio.CancelledError()
+                future = asyncio.run_coroutine_threadsafe(self.accept(node), loop)
+                pending.add(future)
+            try:
+                return future.result()
+            finally:
+                with lock:
+                    pending.discard(future)
+
+        def _run():
+            _driving_synchronous_call.set(True)
+            return external_fn(_evaluate, name, *arguments)
+
+        try:
+            return await loop.run_in_executor(synchronous_executor(), contextvars.copy_context().run, _run)
+        except asyncio.CancelledError:
+            with lock:
+                cancelled.set()
+                for future in pending:
+                    future.cancel()
+            raise
+
+    def _evaluate_without_suspending(self, node):
+        coroutine = self.accept(node)
+        try:
+            coroutine.send(None)
+        except StopIteration as stopped:
+            return stopped.value
+        coroutine.close()
+        raise Exception(f"evaluation suspended inside a synchronous call: {node}")
@@ -1,31 +1,135 @@
 from . import structure as s
+from .regex_cache import RegexCache
+import itertools
+import operator
 import re
 
 
+REGEX_FLAGS = dict([
+    (name, getattr(re, name.upper()))
+    for name in [
+        "ascii",
+        "dotall",
+        "ignorecase",
+        "locale",
+        "multiline",
+        "unicode",
+        "verbose",
+    ]
+])
+
+regex_cache = RegexCache()
+
+
 def equals(evaluate, _name, *args):
-    evaluated = [evaluate(arg) for arg in args]
-    for index, arg in enumerate(evaluated[1:], start=1):
-        if arg != evaluated[index - 1]:
+    return _compare(evaluate, args, operator.eq)
+
+
+def less_than(evaluate, _name, *args):
+    return _compare(evaluate, args, operator.lt)
+
+
+def less_than_or_equals(evaluate, _name, *args):
+    return _compare(evaluate, args, operator.le)
+
+
+def greater_than(evaluate, _name, *args):
+    return _compare(evaluate, args, operator.gt)
+
+
+def greater_than_or_equals(evaluate, _name, *args):
+    return _compare(evaluate, args, operator.ge)
+
+
+def _compare(evaluate, args, comparison):
+    if not args:
+        return True
+    previous = evaluate(args[0])
+    for arg in args[1:]:
+        current = evaluate(arg)
+        if not comparison(previous, current):
             return False
+        previous = current
     return True
 
 
-def split(evaluate, _name, regex, text, *args):
+def and_(evaluate, _name, *args):
+    result = True
+    for arg in args:
+        result = evaluate(arg)
+        if not result:
+            return result
+    return result
+
+
+def or_(evaluate, _name, *args):
+    result = False
+    for arg in args:
+        result = evaluate(arg)
+        if result:
+            return result
+    return result
+
+
+def not_(evaluate, _name, value):
+    return not evaluate(value)
+
+
+def equals_each(evaluate, name, left, right):
+    left, right = evaluate(left), evaluate(right)
+    if len(left) != len(right):
+        raise Exception(f"{name} expects lists of the same length, got {len(left)} and {len(right)}")
+    return list(map(operator.eq, left, right))
+
+
+def filter_(evaluate, name, collection, mask):
+    collection, mask = evaluate(collection), evaluate(mask)
+    if len(collection) != len(mask):
+        raise Exception(f"{name} expects a mask the same length as the list, got {len(mask)} and {len(collection)}")
+    return list(itertools.compress(collection, mask))
+
+
+def filter_matching(evaluate, name, regex, collection, *args):
+    search = regex_cache.compile(evaluate(regex), _regex_flags(name, args)).search
+    return [item for item in evaluate(collection) if search(item)]
+
+
+def count_matching(evaluate, name, regex, collection, *args):
+    search = regex_cache.compile(evaluate(regex), _regex_flags(name, args)).search
+    return sum(1 for item in evaluate(collection) if search(item))
+
+
+def split(evaluate, name, regex, text, *args):
+    flags = _regex_flags(name, args)
+    return regex_cache.compile(evaluate(regex), flags).split(evaluate(text))
+
+
+def _regex_flags(name, args):
     flags = 0
-    known_flags = dict([
-        (name, getattr(re, name.upper()))
-        for name in [
-            "multiline",
-        ]
-    ])
     for arg in args:
         if isinstance(arg, s.Identifier):
-            if arg.label not in known_flags:
+            if arg.label not in REGEX_FLAGS:
                 raise Exception(f"{arg.label} is not a known regex flag")
-            flags |= known_flags[arg.label]
+            flags |= REGEX_FLAGS[arg.label]
         else:
-            raise Exception("split only accepts additional arguments as regex flag identifiers")
-    return re.split(evaluate(regex), evaluate(text), flags=flags)
+            raise Exception(f"{name} only accepts additional arguments as regex flag identifiers")
+    return flags
+
+
+def fold_literal_patterns(compiled_script, cache=regex_cache):
+    for node in s.walk(compiled_script):
+        if type(node) is not s.Call or node.target.label not in _PATTERN_FUNCTIONS:
+            continue
+        flag_offset, base_flags = _PATTERN_FUNCTIONS[node.target.label]
+        if len(node.arguments) < flag_offset or type(node.arguments[0]) is not s.String:
+            continue
+        flag_arguments = node.arguments[flag_offset:]
+        if not all(type(arg) is s.Identifier and arg.label in REGEX_FLAGS for arg in flag_arguments):
+            continue
+        try:
+            cache.pin(node, node.arguments[0].value, base_flags | _regex_flags(node.target.label, flag_arguments))
+        except re.error:
+            pass
 
 
 def splitlines(evaluate, _name, text):
@@ -34,23 +138,115 @@ def splitlines(evaluate, _name, text):
 
 def append(evaluate, _name, *args):
     evaluated = [evaluate(arg) for arg in args]
-    result = evaluated[0]
+    first = evaluated[0]
+    if type(first) is str and all(type(arg) is str for arg in evaluated):
+        return ''.join(evaluated)
+    elif isinstance(first, list):
+        return list(itertools.chain.from_iterable(evaluated))
+    result = first
     for arg in evaluated[1:]:
-        result += arg
+        result = result + arg
     return result
 
 
+def join(evaluate, _name, separator, collection):
+    return evaluate(separator).join(evaluate(collection))
+
+
+def concat(evaluate, _name, *collections):
+    return list(itertools.chain.from_iterable(evaluate(collection) for collection in collections))
+
+
 def length(evaluate, _name, collection):
     return len(evaluate(collection))
 
 
+def grep(evaluate, name, regex, text, *args):
+    pattern = _text_pattern(evaluate, name, regex, args)
+    text = evaluate(text)
+    lines = []
+    position = 0
+    while position < len(text):
+        match = pattern.search(text, position)
+        if match is None or match.start() == len(text) and text.endswith('\n'):
+            break
+        line_start = text.rfind('\n', 0, match.start()) + 1
+        line_end = text.find('\n', match.start())
+        if line_end == -1:
+            line_end = len(text)
+        if match.end() <= line_end or pattern.search(text, line_start, line_end):
+            lines.append(text[line_start:line_end])
+        position = line_end + 1
+    return lines
+
+
+def match(evaluate, name, regex, text, *args):
+    return _text_pattern(evaluate, name, regex, args).search(evaluate(text)) is not None
+
+
+def extract_groups(evaluate, name, regex, text, *args):
+    pattern = _text_pattern(evaluate, name, regex, args)
+    if pattern.groups == 0:
+        return [[found.group(0)] for found in pattern.finditer(evaluate(text))]
+    return [list(found.groups()) for found in pattern.finditer(evaluate(text))]
+
+
+def replace(evaluate, name, regex, replacement, text, *args):
+    return _text_pattern(evaluate, name, regex, args).sub(evaluate(replacement), evaluate(text))
+
+
+def count(evaluate, name, regex, text, *args):
+    return sum(1 for _ in _text_pattern(evaluate, name, regex, args).finditer(evaluate(text)))
+
+
+def _text_pattern(evaluate, name, regex, args):
+    return regex_cache.compile(evaluate(regex), re.MULTILINE | _regex_flags(name, args))
+
+
+_PATTERN_FUNCTIONS = {
+    'split': (2, 0),
+    'filter-matching': (2, 0),
+    'count-matching': (2, 0),
+    'grep': (2, re.MULTILINE),
+    'match': (2, re.MULTILINE),
+    'extract-groups': (2, re.MULTILINE),
+    'replace': (3, re.MULTILINE),
+    'count': (2, re.MULTILINE),
+}
+
+
 def register_builtins(interpreter):
     builtins = [
         equals,
+        less_than,
+        less_than_or_equals,
+        greater_than,
+        greater_than_or_equals,
+        and_,
+        or_,
+        not_,
+        equals_each,
+        filter_,
+        filter_matching,
+        count_matching,
         split,
         splitlines,
         append,
+        join,
+        concat,
         length
     ]
     for builtin in builtins:
-        interpreter.register_external_call(builtin.__name__, builtin)
+        interpreter.register_external_call(builtin.__name__.rstrip('_').replace('_', '-'), builtin, pure=True)
+
+
+def register_text_builtins(interpreter):
+    builtins = [
+        grep,
+        match,
+        extract_groups,
+        replace,
+        count,
+    ]
+    for builtin in builtins:
+        interpreter.register_external_call(builtin.__name__.replace('_', '-'), builtin, pure=True)
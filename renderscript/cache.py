@@ -0,0 +1,92 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import typing
+
+
+from .structure import Node, LANGUAGE_VERSION
+
+
+class ScriptCache:
+
+    _SUFFIX = '.pickle'
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, version=LANGUAGE_VERSION):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = version
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, script_source: str) -> str:
+        digest = hashlib.sha256(f"{self.version}\0".encode('utf-8'))
+        digest.update(script_source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, script_source: str) -> typing.Optional[typing.List[Node]]:
+        path = self._path(self.key(script_source))
+        try:
+            with open(path, 'rb') as cache_file:
+                compiled_script = pickle.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError):
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return compiled_script
+
+    def put(self, script_source: str, compiled_script: typing.List[Node]):
+        path = self._path(self.key(script_source))
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temporary_file:
+                pickle.dump(compiled_script, temporary_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+        except BaseException:
+            self._remove(temporary_path)
+            raise
+        self.evict()
+
+    def invalidate(self, script_source: str):
+        self._remove(self._path(self.key(script_source)))
+
+    def clear(self):
+        for path, _ in self._entries():
+            self._remove(path)
+
+    def evict(self):
+        entries = []
+        total_bytes = 0
+        for path, stat in self._entries():
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            total_bytes -= size
+
+    def _entries(self):
+        with os.scandir(self.directory) as directory_entries:
+            for entry in directory_entries:
+                if not entry.name.endswith(self._SUFFIX):
+                    continue
+                try:
+                    yield entry.path, entry.stat()
+                except FileNotFoundError:
+                    continue
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self._SUFFIX)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,244 @@
+import collections
+import copy
+import inspect
+import threading
+import time
+import typing
+
+
+from .interpreter import batch_handler
+from . import structure
+
+
+DEFAULT_CALL_CACHE_SIZE = 1024
+
+_IMMUTABLE_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+def idempotent(external_fn):
+    external_fn.idempotent = True
+    return external_fn
+
+
+def mutating(external_fn):
+    external_fn.mutating = True
+    return external_fn
+
+
+class CallCache:
+
+    def __init__(self, max_size=DEFAULT_CALL_CACHE_SIZE, ttl: typing.Optional[float] = None, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._clock = clock
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hit_rate,
+                'size': len(self._entries),
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def install(self, target, idempotent_calls=(), mutating_calls=()):
+        idempotent_calls = set(idempotent_calls)
+        mutating_calls = set(mutating_calls)
+        for name, external_fn in list(target.external_calls.items()):
+            if name in idempotent_calls or getattr(external_fn, 'idempotent', False):
+                target.register_external_call(name, self.memoise(name, external_fn), name in target.pure_calls)
+            elif name in mutating_calls or getattr(external_fn, 'mutating', False):
+                target.register_external_call(name, self.invalidating(external_fn), name in target.pure_calls)
+        return target
+
+    def memoise(self, name, external_fn):
+        if inspect.iscoroutinefunction(external_fn):
+            async def _memoised_async(evaluate, call_name, *arguments):
+                values = []
+                for argument in arguments:
+                    try:
+                        values.append(await evaluate(argument))
+                    except Exception:
+                        if type(argument) is not structure.Identifier:
+                            return await external_fn(evaluate, call_name, *arguments)
+                        values.append(_Symbol(argument.label))
+                key = _cache_key(name, values)
+                found, result = self.lookup(key)
+                if found:
+                    return result
+
+                async def _evaluated(node):
+                    value = _argument_value(node, arguments, values)
+                    return await evaluate(node) if type(value) is _Symbol else value
+                return self.store(key, await external_fn(_evaluated, call_name, *arguments))
+            return _memoised_async
+
+        def _memoised(evaluate, call_name, *arguments):
+            values = _evaluate_arguments(evaluate, arguments)
+            if values is None:
+                return external_fn(evaluate, call_name, *arguments)
+            key = _cache_key(name, values)
+            found, result = self.lookup(key)
+            if found:
+                return result
+
+            def _evaluated(node):
+                value = _argument_value(node, arguments, values)
+                return evaluate(node) if type(value) is _Symbol else value
+            return self.store(key, external_fn(_evaluated, call_name, *arguments))
+
+        handler = batch_handler(external_fn)
+        if handler is not None:
+            _memoised.batch = self._memoise_batch(name, handler)
+        return _memoised
+
+    def _memoise_batch(self, name, handler):
+        def _memoised_batch(call_name, arguments):
+            keys = [_cache_key(name, values) for values in arguments]
+            results = [None] * len(arguments)
+            missing = []
+            for index, key in enumerate(keys):
+                found, results[index] = self.lookup(key)
+                if not found:
+                    missing.append(index)
+            if missing:
+                fetched = list(handler(call_name, [arguments[index] for index in missing]))
+                if len(fetched) != len(missing):
+                    raise Exception(
+                        f"batch handler for '{name}' returned {len(fetched)} results for {len(missing)} calls"
+                    )
+                for index, result in zip(missing, fetched):
+                    results[index] = self.store(keys[index], result)
+            return results
+        return _memoised_batch
+
+    def invalidating(self, external_fn):
+        if inspect.iscoroutinefunction(external_fn):
+            async def _invalidating_async(evaluate, call_name, *arguments):
+                try:
+                    return await external_fn(evaluate, call_name, *arguments)
+                finally:
+                    self.invalidate()
+            return _invalidating_async
+
+        def _invalidating(evaluate, call_name, *arguments):
+            try:
+                return external_fn(evaluate, call_name, *arguments)
+            finally:
+                self.invalidate()
+
+        handler = batch_handler(external_fn)
+        if handler is not None:
+            def _invalidating_batch(call_name, arguments):
+                try:
+                    return handler(call_name, arguments)
+                finally:
+                    self.invalidate()
+            _invalidating.batch = _invalidating_batch
+        return _invalidating
+
+    def lookup(self, key) -> typing.Tuple[bool, typing.Any]:
+        if key is None:
+            return False, None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, result = entry
+                if expires is None or expires > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, _copy_result(result)
+                del self._entries[key]
+            self.misses += 1
+        return False, None
+
+    def store(self, key, result):
+        if key is None:
+            return result
+        expires = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, _copy_result(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == name]:
+                    del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+
+class _Symbol(typing.NamedTuple):
+    label: str
+
+
+def _evaluate_arguments(evaluate, arguments):
+    values = []
+    for argument in arguments:
+        try:
+            values.append(evaluate(argument))
+        except Exception:
+            if type(argument) is not structure.Identifier:
+                return None
+            values.append(_Symbol(argument.label))
+    return values
+
+
+def _argument_value(node, arguments, values):
+    for argument, value in zip(arguments, values):
+        if argument is node:
+            return value
+    raise Exception(f"cannot evaluate a node that is not one of the call's arguments: {node}")
+
+
+def _cache_key(name, values):
+    try:
+        key = (name, tuple(_freeze(value) for value in values))
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return list, tuple(_freeze(item) for item in value)
+    elif isinstance(value, dict):
+        return dict, frozenset((_freeze(key), _freeze(item)) for key, item in value.items())
+    return type(value), value
+
+
+def _copy_result(result):
+    if isinstance(result, _IMMUTABLE_TYPES):
+        return result
+    return copy.deepcopy(result)
@@ -0,0 +1,263 @@
+import copy
+import typing
+
+
+from .visitor import Visitor
+from .parallel import parallel_map, DEFAULT_PARALLEL_LIMIT
+from .resolver import Scopes
+from . import structure
+
+
+_UNSET = object()
+
+
+class ExecutionContext:
+
+    def __init__(self, external_calls=None, parallel_executor=None, parallel_limit=DEFAULT_PARALLEL_LIMIT):
+        self.external_calls = dict(external_calls or {})
+        self.pure_calls = set()
+        self.parallel_executor = parallel_executor
+        self.parallel_limit = parallel_limit
+        self.frames = []
+
+    def fork(self):
+        forked = copy.copy(self)
+        forked.frames = list(self.frames)
+        return forked
+
+    def register_external_call(self, name, callback, pure=False):
+        self.external_calls[name] = callback
+        if pure:
+            self.pure_calls.add(name)
+        else:
+            self.pure_calls.discard(name)
+
+
+class CompiledScript:
+
+    def __init__(self, body, frame_size, max_depth):
+        self._body = body
+        self._frame_size = frame_size
+        self._max_depth = max_depth
+
+    def run(self, context: ExecutionContext) -> typing.Any:
+        context.frames = [None] * (self._max_depth + 1)
+        context.frames[0] = [_UNSET] * self._frame_size
+        return self._body(context)
+
+
+class ClosureCompiler(Visitor):
+
+    def __init__(self):
+        super().__init__(throw_on_unknown=True)
+        self.auto_detect_accept_methods()
+        self._scopes = Scopes()
+
+    def compile(self, compiled_script: typing.List[structure.Node]) -> CompiledScript:
+        self._scopes = Scopes()
+        body = self._compile_sequence(compiled_script)
+        return CompiledScript(body, self._scopes.size(0), self._scopes.max_depth)
+
+    def _compile_sequence(self, nodes, discarded=False):
+        if not nodes:
+            return self._constant(None)
+        children = tuple(self._compile_discarded(node) for node in nodes[:-1])
+        final = self._compile_discarded(nodes[-1]) if discarded else self.accept(nodes[-1])
+
+        def _sequence(context):
+            for child in children:
+                child(context)
+            return final(context)
+        return _sequence
+
+    def _compile_discarded(self, node):
+        node_type = type(node)
+        if node_type is structure.ForEach:
+            collection, depth, index, body, frame_size = self._compile_iteration(node, discarded=True)
+
+            def _discarded_foreach(context):
+                frames = context.frames
+                for value in collection(context):
+                    frame = [_UNSET] * frame_size
+                    frame[index] = value
+                    frames[depth] = frame
+                    body(context)
+            return _discarded_foreach
+        elif node_type is structure.Do:
+            return self._compile_sequence(node.children, discarded=True)
+        elif node_type is structure.If:
+            condition = self.accept(node.condition)
+            true = self._compile_discarded(node.true)
+            false = self._compile_discarded(node.false)
+
+            def _discarded_if(context):
+                if condition(context):
+                    true(context)
+                else:
+                    false(context)
+            return _discarded_if
+        return self.accept(node)
+
+    def _compile_collection(self, node):
+        if type(node) is not structure.ForEach:
+            return self.accept(node)
+        collection, depth, index, body, frame_size = self._compile_iteration(node)
+
+        def _iterate(context):
+            frames = context.frames
+            for value in collection(context):
+                frame = [_UNSET] * frame_size
+                frame[index] = value
+                frames[depth] = frame
+                yield body(context)
+        return _iterate
+
+    def accept_do(self, do_node: structure.Do):
+        return self._compile_sequence(do_node.children)
+
+    def accept_bool(self, bool_node: structure.Bool):
+        return self._constant(bool_node.value)
+
+    def accept_number(self, number_node: structure.Number):
+        return self._constant(number_node.value)
+
+    def accept_string(self, string_node: structure.String):
+        return self._constant(string_node.value)
+
+    def accept_list(self, list_node: structure.List):
+        values = tuple(self.accept(value) for value in list_node.values)
+
+        def _list(context):
+            return [value(context) for value in values]
+        return _list
+
+    def accept_map(self, map_node: structure.MakeMap):
+        entries = tuple(
+            (self.accept(key), self.accept(value))
+            for key, value in map_node.entries
+        )
+
+        def _map(context):
+            return dict([
+                (key(context), value(context))
+                for key, value in entries
+            ])
+        return _map
+
+    def accept_if(self, if_node: structure.If):
+        condition = self.accept(if_node.condition)
+        true = self.accept(if_node.true)
+        false = self.accept(if_node.false)
+
+        def _if(context):
+            return true(context) if condition(context) else false(context)
+        return _if
+
+    def accept_identifier(self, identifier_node: structure.Identifier):
+        label = identifier_node.label
+        slots = self._scopes.resolve_all(label)
+        if not slots:
+            raise Exception(f"unknown variable '{label}'")
+        if len(slots) > 1:
+            def _lookup_shadowed(context):
+                frames = context.frames
+                for depth, index in slots:
+                    value = frames[depth][index]
+                    if value is not _UNSET:
+                        return value
+                raise Exception(f"unknown variable '{label}'")
+            return _lookup_shadowed
+        (depth, index), = slots
+
+        def _lookup(context):
+            value = context.frames[depth][index]
+            if value is _UNSET:
+                raise Exception(f"unknown variable '{label}'")
+            return value
+        return _lookup
+
+    def accept_let(self, let_node: structure.Let):
+        expression = self.accept(let_node.expression)
+        depth, index = self._scopes.declare(let_node.name.label)
+
+        def _let(context):
+            context.frames[depth][index] = expression(context)
+        return _let
+
+    def _compile_iteration(self, foreach_node, discarded=False):
+        collection = self._compile_collection(foreach_node.collection)
+        self._scopes.push()
+        depth, index = self._scopes.declare(foreach_node.value_name.label)
+        body = self._compile_discarded(foreach_node.body) if discarded else self.accept(foreach_node.body)
+        frame_size = self._scopes.pop()
+        return collection, depth, index, body, frame_size
+
+    def accept_foreach(self, foreach_node: structure.ForEach):
+        collection, depth, index, body, frame_size = self._compile_iteration(foreach_node)
+
+        def _foreach(context):
+            frames = context.frames
+            results = []
+            for value in collection(context):
+                frame = [_UNSET] * frame_size
+                frame[index] = value
+                frames[depth] = frame
+                results.append(body(context))
+            return results
+        return _foreach
+
+    def accept_parallel_foreach(self, foreach_node: structure.ParallelForEach):
+        collection, depth, index, body, frame_size = self._compile_iteration(foreach_node)
+
+        def _parallel_foreach(context):
+            def _iteration(value):
+                iteration_context = context.fork()
+                frame = [_UNSET] * frame_size
+                frame[index] = value
+                iteration_context.frames[depth] = frame
+                return body(iteration_context)
+            return parallel_map(_iteration, collection(context), context.parallel_executor, context.parallel_limit)
+        return _parallel_foreach
+
+    def accept_comment(self, _comment_node: structure.Comment):
+        return self._constant(None)
+
+    def accept_call(self, call_node: structure.Call):
+        name = call_node.target.label
+        arguments = call_node.arguments
+        closures = dict([
+            (id(argument), self._compile_argument(argument))
+            for argument in arguments
+        ])
+
+        def _call(context):
+            external_fn = context.external_calls.get(name)
+            if external_fn is None:
+                raise Exception(f"unknown function '{name}' (arguments: {arguments})")
+
+            def _evaluate(node):
+                closure = closures.get(id(node))
+                if closure is None:
+                    raise Exception(f"'{name}' cannot evaluate a node that is not one of its arguments: {node}")
+                return closure(context)
+            return external_fn(_evaluate, name, *arguments)
+        return _call
+
+    def _compile_argument(self, argument):
+        if type(argument) is structure.Identifier and self._scopes.resolve(argument.label) is None:
+            label = argument.label
+
+            def _unknown(_context):
+                raise Exception(f"unknown variable '{label}'")
+            return _unknown
+        return self.accept(argument)
+
+    @staticmethod
+    def _constant(value):
+        def _constant(_context):
+            return value
+        return _constant
+
+
+def compile_closures(compiled_script: typing.List[structure.Node]) -> CompiledScript:
+    return ClosureCompiler().compile(compiled_script)
@@ -0,0 +1,375 @@
+from collections import OrderedDict
+import math
+import typing
+
+
+from .visitor import Visitor
+from .closure_compiler import ExecutionContext
+from .parallel import parallel_map
+from .resolver import Scopes
+from . import structure
+
+
+_UNSET = object()
+
+
+def _unknown_variable(label):
+    raise Exception(f"unknown variable '{label}'")
+
+
+def _invoke(external_calls, name, arguments, index, thunks):
+    external_fn = external_calls.get(name)
+    if external_fn is None:
+        raise Exception(f"unknown function '{name}' (arguments: {list(arguments)})")
+
+    def _evaluate(node):
+        position = index.get(id(node))
+        if position is None:
+            raise Exception(f"'{name}' cannot evaluate a node that is not one of its arguments: {node}")
+        return thunks[position]()
+    return external_fn(_evaluate, name, *arguments)
+
+
+class _Function:
+
+    def __init__(self, depth, owns_scope):
+        self.depth = depth
+        self.owns_scope = owns_scope
+        self.nonlocals = set()
+
+
+class TranspiledScript:
+
+    def __init__(self, source, function):
+        self.source = source
+        self._function = function
+
+    def run(self, context: ExecutionContext) -> typing.Any:
+        return self._function(context)
+
+
+class PythonCodeGenerator(Visitor):
+
+    def __init__(self):
+        super().__init__(throw_on_unknown=True)
+        self.auto_detect_accept_methods()
+        self._namespace = {}
+        self._lines = []
+        self._scopes = Scopes()
+        self._always_bound = set()
+        self._function = None
+        self._constants = set()
+        self._counter = 0
+
+    def generate(self, compiled_script: typing.List[structure.Node]) -> typing.Tuple[str, dict]:
+        self._namespace = {
+            '_UNSET': _UNSET,
+            '_unknown_variable': _unknown_variable,
+            '_invoke': _invoke,
+            '_parallel_map': parallel_map,
+        }
+        self._scopes = Scopes()
+        self._always_bound = set()
+        self._constants = set()
+        self._counter = 0
+        self._function = _Function(0, owns_scope=True)
+        lines, expression = self._compile_sequence(compiled_script)
+        source = "\n".join(
+            ["def _script(_context):"] +
+            self._indent(
+                ["_calls = _context.external_calls"] +
+                self._scope_initialisation(0) + lines + [f"return {expression}"]
+            )
+        ) + "\n"
+        return source, self._namespace
+
+    def transpile(self, compiled_script: typing.List[structure.Node]) -> TranspiledScript:
+        source, namespace = self.generate(compiled_script)
+        exec(compile(source, "<renderscript>", "exec"), namespace)
+        return TranspiledScript(source, namespace['_script'])
+
+    def _compile(self, node):
+        outer_lines = self._lines
+        self._lines = []
+        try:
+            expression = self.accept(node)
+            return self._lines, expression
+        finally:
+            self._lines = outer_lines
+
+    def _compile_sequence(self, nodes):
+        outer_lines = self._lines
+        self._lines = []
+        try:
+            expression = "None"
+            for node in nodes[:-1]:
+                self._lines.extend(self._compile_discarded(node))
+            if nodes:
+                lines, expression = self._compile(nodes[-1])
+                self._lines.extend(lines)
+            return self._lines, expression
+        finally:
+            self._lines = outer_lines
+
+    def _compile_discarded(self, node):
+        outer_lines = self._lines
+        self._lines = []
+        try:
+            node_type = type(node)
+            if node_type is structure.ForEach:
+                self._compile_discarded_foreach(node)
+            elif node_type is structure.Do:
+                for child in node.children:
+                    self._lines.extend(self._compile_discarded(child))
+            elif node_type is structure.If:
+                condition = self._compile_operands([node.condition])[0]
+                true_lines = self._compile_discarded(node.true)
+                false_lines = self._compile_discarded(node.false)
+                self._lines.append(f"if {condition}:")
+                self._lines.extend(self._indent(true_lines or ["pass"]))
+                if false_lines:
+                    self._lines.append("else:")
+                    self._lines.extend(self._indent(false_lines))
+            else:
+                expression = self.accept(node)
+                if not self._is_trivial(expression):
+                    self._lines.append(expression)
+            return self._lines
+        finally:
+            self._lines = outer_lines
+
+    def _compile_discarded_foreach(self, foreach_node):
+        collection = self._compile_collection(foreach_node.collection)
+        self._scopes.push()
+        try:
+            depth, index = self._scopes.declare(foreach_node.value_name.label)
+            self._always_bound.add((depth, index))
+            parameter = self._variable_name(depth, index)
+            lines, expression, function = self._compile_in_function(
+                foreach_node.body, depth, owns_scope=True, discarded=True
+            )
+            if not lines:
+                self._lines.append(f"for {parameter} in {collection}:")
+                self._lines.extend(self._indent(["pass"]))
+                return
+            body_name = self._name('_body')
+            self._emit_function(body_name, [parameter], lines, expression, function)
+            self._lines.append(f"for {parameter} in {collection}:")
+            self._lines.extend(self._indent([f"{body_name}({parameter})"]))
+        finally:
+            self._scopes.pop()
+
+    def _compile_collection(self, node):
+        if type(node) is structure.ForEach:
+            return self._compile_foreach(node, lazy=True)
+        return self._compile_operands([node])[0]
+
+    def _compile_operands(self, nodes):
+        compiled = [self._compile(node) for node in nodes]
+        if all(not lines for lines, _ in compiled):
+            return [expression for _, expression in compiled]
+        expressions = []
+        for lines, expression in compiled:
+            self._lines.extend(lines)
+            if self._is_trivial(expression):
+                expressions.append(expression)
+            else:
+                temporary = self._name('_t')
+                self._lines.append(f"{temporary} = {expression}")
+                expressions.append(temporary)
+        return expressions
+
+    def _compile_in_function(self, node, depth, owns_scope, discarded=False):
+        outer_function = self._function
+        self._function = _Function(depth, owns_scope)
+        try:
+            if discarded:
+                lines, expression = self._compile_discarded(node), "None"
+            else:
+                lines, expression = self._compile(node)
+            return lines, expression, self._function
+        finally:
+            self._function = outer_function
+
+    def _emit_function(self, name, parameters, lines, expression, function):
+        header = []
+        if function.nonlocals:
+            header.append(f"nonlocal {', '.join(sorted(function.nonlocals))}")
+        if function.owns_scope:
+            header.extend(self._scope_initialisation(function.depth))
+        self._lines.append(f"def {name}({', '.join(parameters)}):")
+        self._lines.extend(self._indent(header + lines + [f"return {expression}"]))
+
+    def _scope_initialisation(self, depth):
+        names = [
+            self._variable_name(depth, index)
+            for index in range(self._scopes.size(depth))
+            if (depth, index) not in self._always_bound
+        ] if depth <= self._scopes.depth else []
+        if not names:
+            return []
+        return [" = ".join(names) + " = _UNSET"]
+
+    def _name(self, prefix):
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def _constant(self, value):
+        if isinstance(value, (bool, int, str)) or (isinstance(value, float) and math.isfinite(value)):
+            expression = repr(value)
+        else:
+            expression = self._name('_c')
+            self._namespace[expression] = value
+        self._constants.add(expression)
+        return expression
+
+    @staticmethod
+    def _variable_name(depth, index):
+        return f"_v{depth}_{index}"
+
+    def _is_trivial(self, expression):
+        return expression == "None" or expression.startswith("_t") or expression in self._constants
+
+    @staticmethod
+    def _indent(lines):
+        return ["    " + line for line in lines]
+
+    def accept_do(self, do_node: structure.Do):
+        lines, expression = self._compile_sequence(do_node.children)
+        self._lines.extend(lines)
+        return expression
+
+    def accept_bool(self, bool_node: structure.Bool):
+        return self._constant(bool_node.value)
+
+    def accept_number(self, number_node: structure.Number):
+        return self._constant(number_node.value)
+
+    def accept_string(self, string_node: structure.String):
+        return self._constant(string_node.value)
+
+    def accept_list(self, list_node: structure.List):
+        return f"[{', '.join(self._compile_operands(list_node.values))}]"
+
+    def accept_map(self, map_node: structure.MakeMap):
+        operands = self._compile_operands([
+            node for entry in map_node.entries for node in entry
+        ])
+        pairs = [f"({operands[index]}, {operands[index + 1]})" for index in range(0, len(operands), 2)]
+        return f"dict([{', '.join(pairs)}])"
+
+    def accept_if(self, if_node: structure.If):
+        condition = self._compile_operands([if_node.condition])[0]
+        true_lines, true_expression = self._compile(if_node.true)
+        false_lines, false_expression = self._compile(if_node.false)
+        if not true_lines and not false_lines:
+            return f"({true_expression} if {condition} else {false_expression})"
+        temporary = self._name('_t')
+        self._lines.append(f"if {condition}:")
+        self._lines.extend(self._indent(true_lines + [f"{temporary} = {true_expression}"]))
+        self._lines.append("else:")
+        self._lines.extend(self._indent(false_lines + [f"{temporary} = {false_expression}"]))
+        return temporary
+
+    def accept_identifier(self, identifier_node: structure.Identifier):
+        label = identifier_node.label
+        slots = self._scopes.resolve_all(label)
+        if not slots:
+            raise Exception(f"unknown variable '{label}'")
+        expression = f"_unknown_variable({repr(label)})"
+        for slot in reversed(slots):
+            name = self._variable_name(*slot)
+            if slot in self._always_bound:
+                expression = name
+            else:
+                expression = f"({name} if {name} is not _UNSET else {expression})"
+        return expression
+
+    def accept_let(self, let_node: structure.Let):
+        expression = self._compile_operands([let_node.expression])[0]
+        depth, index = self._scopes.declare(let_node.name.label)
+        name = self._variable_name(depth, index)
+        if not self._function.owns_scope:
+            self._function.nonlocals.add(name)
+        self._lines.append(f"{name} = {expression}")
+        return "None"
+
+    def accept_foreach(self, foreach_node: structure.ForEach):
+        return self._compile_foreach(foreach_node, lazy=False)
+
+    def _compile_foreach(self, foreach_node, lazy):
+        collection = self._compile_collection(foreach_node.collection)
+        self._scopes.push()
+        try:
+            depth, index = self._scopes.declare(foreach_node.value_name.label)
+            self._always_bound.add((depth, index))
+            parameter = self._variable_name(depth, index)
+            lines, expression, function = self._compile_in_function(foreach_node.body, depth, owns_scope=True)
+            if not lines:
+                comprehension = f"{expression} for {parameter} in {collection}"
+                return f"({comprehension})" if lazy else f"[{comprehension}]"
+            body_name = self._name('_body')
+            self._emit_function(body_name, [parameter], lines, expression, function)
+            mapped = f"map({body_name}, {collection})"
+            return mapped if lazy else f"list({mapped})"
+        finally:
+            self._scopes.pop()
+
+    def accept_parallel_foreach(self, foreach_node: structure.ParallelForEach):
+        collection = self._compile_collection(foreach_node.collection)
+        self._scopes.push()
+        try:
+            depth, index = self._scopes.declare(foreach_node.value_name.label)
+            self._always_bound.add((depth, index))
+            lines, expression, function = self._compile_in_function(foreach_node.body, depth, owns_scope=True)
+            body_name = self._name('_body')
+            self._emit_function(body_name, [self._variable_name(depth, index)], lines, expression, function)
+            return (
+                f"_parallel_map({body_name}, {collection}, "
+                f"_context.parallel_executor, _context.parallel_limit)"
+            )
+        finally:
+            self._scopes.pop()
+
+    def accept_comment(self, _comment_node: structure.Comment):
+        return "None"
+
+    def accept_call(self, call_node: structure.Call):
+        name = call_node.target.label
+        arguments = tuple(call_node.arguments)
+        arguments_name = self._name('_arguments')
+        self._namespace[arguments_name] = arguments
+        self._namespace[arguments_name + '_index'] = dict([
+            (id(argument), position) for position, argument in enumerate(arguments)
+        ])
+        thunks = []
+        for argument in arguments:
+            if type(argument) is structure.Identifier and self._scopes.resolve(argument.label) is None:
+                thunks.append(f"lambda: _unknown_variable({repr(argument.label)})")
+                continue
+            lines, expression, function = self._compile_in_function(argument, self._function.depth, owns_scope=False)
+            if not lines:
+                thunks.append(f"lambda: {expression}")
+            else:
+                thunk_name = self._name('_argument')
+                self._emit_function(thunk_name, [], lines, expression, function)
+                thunks.append(thunk_name)
+        thunk_tuple = f"({', '.join(thunks)},)" if thunks else "()"
+        return f"_invoke(_calls, {repr(name)}, {arguments_name}, {arguments_name}_index, {thunk_tuple})"
+
+
+_TRANSPILED_CACHE_SIZE = 128
+_transpiled_cache = OrderedDict()
+
+
+def transpile(compiled_script: typing.List[structure.Node]) -> TranspiledScript:
+    key = id(compiled_script)
+    entry = _transpiled_cache.get(key)
+    if entry is not None and entry[0] is compiled_script:
+        _transpiled_cache.move_to_end(key)
+        return entry[1]
+    transpiled = PythonCodeGenerator().transpile(compiled_script)
+    _transpiled_cache[key] = (compiled_script, transpiled)
+    if len(_transpiled_cache) > _TRANSPILED_CACHE_SIZE:
+        _transpiled_cache.popitem(last=False)
+    return transpiled
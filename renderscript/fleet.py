@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+import itertools
+import typing
+
+
+from .closure_compiler import CompiledScript, ExecutionContext
+
+
+@dataclass(frozen=True)
+class DeviceResult:
+    index: int
+    context: ExecutionContext
+    result: typing.Any
+    error: typing.Optional[BaseException]
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+
+class FleetRunner:
+
+    def __init__(self, compiled_script: CompiledScript, max_workers=16):
+        self.compiled_script = compiled_script
+        self.max_workers = max_workers
+
+    def run(self, call_tables: typing.Iterable[typing.Dict[str, typing.Callable]]) -> typing.Iterator[DeviceResult]:
+        contexts = (
+            (index, ExecutionContext(call_table))
+            for index, call_table in enumerate(call_tables)
+        )
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = set()
+            for index, context in itertools.islice(contexts, self.max_workers * 2):
+                pending.add(executor.submit(self._run_device, index, context))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+                for index, context in itertools.islice(contexts, len(done)):
+                    pending.add(executor.submit(self._run_device, index, context))
+
+    def _run_device(self, index, context):
+        try:
+            return DeviceResult(index, context, self.compiled_script.run(context), None)
+        except Exception as e:
+            return DeviceResult(index, context, None, e)
@@ -1,27 +1,197 @@
+import copy
+import functools
+import inspect
+import types
+
+
 from .visitor import Visitor
+from .middleware.pipeline import MiddlewarePipeline
+from .parallel import parallel_map, DEFAULT_PARALLEL_LIMIT
+from .resolver import Resolver, Resolution
 from . import structure
 
 
+_UNSET = object()
+
+DEFAULT_MAX_BATCH_SIZE = 64
+
+
+class _DeferredResult:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = None
+
+
+def with_batch_handler(external_fn, handler):
+    if inspect.iscoroutinefunction(external_fn):
+        async def _batchable(evaluate, name, *arguments):
+            return await external_fn(evaluate, name, *arguments)
+    else:
+        def _batchable(evaluate, name, *arguments):
+            return external_fn(evaluate, name, *arguments)
+    functools.update_wrapper(_batchable, external_fn)
+    _batchable.batch = handler
+    return _batchable
+
+
+def batch_handler(external_fn):
+    if isinstance(external_fn, types.FunctionType):
+        return external_fn.__dict__.get('batch')
+    return None
+
+
 class Interpreter(Visitor):
 
-    def __init__(self, middleware=None):
+    def __init__(self, middleware=None, parallel_executor=None, parallel_limit=DEFAULT_PARALLEL_LIMIT,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE):
         super().__init__(throw_on_unknown=True)
         self.auto_detect_accept_methods()
         self.variable_scopes = [{}]
         self.external_calls = {}
-        self._middleware = middleware
+        self.pure_calls = set()
+        self.batch_calls = set()
+        self.max_batch_size = max_batch_size
+        self.parallel_executor = parallel_executor
+        self.parallel_limit = parallel_limit
+        self._pipeline = MiddlewarePipeline()
+        self._dispatch_lookup = self._accept_method_lookup
+        self._wrapped_types = frozenset()
+        self._batch_name = None
+        self._batch_arguments = []
+        self._batch_results = []
+        self._batch_depth = 0
+        if middleware is not None:
+            self.set_middleware(middleware)
 
     def accept(self, visiting):
-        if self._middleware is not None:
-            return self._middleware(super().accept, visiting)
+        method = self._dispatch_lookup.get(type(visiting))
+        if method is not None:
+            return method(visiting)
+        return super().accept(visiting)
+
+    def prepare(self, visiting):
+        pass
+
+    def discard(self, visiting):
+        visiting_type = type(visiting)
+        if visiting_type in self._wrapped_types:
+            self.accept(visiting)
+        elif visiting_type is structure.ForEach:
+            for _ in self._iterate_foreach(visiting, self.discard):
+                pass
+        elif visiting_type is structure.Do:
+            for node in visiting.children:
+                self.discard(node)
+        elif visiting_type is structure.If:
+            self.discard(visiting.true if self.accept(visiting.condition) else visiting.false)
+        elif visiting_type is structure.Call and visiting.target.label in self.batch_calls:
+            self._queue_call(visiting, None)
         else:
-            return super().accept(visiting)
+            self.accept(visiting)
 
-    def register_external_call(self, name, callback):
+    def iterate(self, visiting):
+        if type(visiting) is structure.ForEach and structure.ForEach not in self._wrapped_types:
+            return self._iterate_foreach(visiting, self.accept)
+        return iter(self.accept(visiting))
+
+    def register_external_call(self, name, callback, pure=False):
         self.external_calls[name] = callback
+        if pure:
+            self.pure_calls.add(name)
+        else:
+            self.pure_calls.discard(name)
+        if batch_handler(callback) is not None:
+            self.batch_calls.add(name)
+        else:
+            self.batch_calls.discard(name)
+
+    def register_batch_handler(self, name, handler):
+        external_fn = self.external_calls.get(name)
+        if external_fn is None:
+            raise Exception(f"unknown function '{name}'")
+        self.register_external_call(name, with_batch_handler(external_fn, handler), name in self.pure_calls)
+
+    def flush_batch(self):
+        if not self._batch_arguments:
+            return
+        name, arguments, deferred_results = self._batch_name, self._batch_arguments, self._batch_results
+        self.clear_batch()
+        results = list(batch_handler(self.external_calls[name])(name, arguments))
+        if len(results) != len(arguments):
+            raise Exception(f"batch handler for '{name}' returned {len(results)} results for {len(arguments)} calls")
+        for deferred, result in zip(deferred_results, results):
+            if deferred is not None:
+                deferred.value = result
+
+    def clear_batch(self):
+        self._batch_name, self._batch_arguments, self._batch_results = None, [], []
+
+    def _queue_call(self, call_node, deferred):
+        name = call_node.target.label
+        arguments = [self.accept(argument) for argument in call_node.arguments]
+        if name != self._batch_name:
+            self.flush_batch()
+            self._batch_name = name
+        self._batch_arguments.append(arguments)
+        self._batch_results.append(deferred)
+        if len(self._batch_arguments) >= self.max_batch_size:
+            self.flush_batch()
+
+    def _accept_deferred(self, visiting):
+        visiting_type = type(visiting)
+        if visiting_type in self._wrapped_types:
+            return self.accept(visiting)
+        elif visiting_type is structure.Call and visiting.target.label in self.batch_calls:
+            deferred = _DeferredResult()
+            self._queue_call(visiting, deferred)
+            return deferred
+        elif visiting_type is structure.Do and visiting.children:
+            for node in visiting.children[:-1]:
+                self.discard(node)
+            return self._accept_deferred(visiting.children[-1])
+        return self.accept(visiting)
+
+    def register_accept_method(self, method):
+        super().register_accept_method(method)
+        self._rebuild_dispatch()
 
     def set_middleware(self, middleware):
-        self._middleware = middleware
+        if isinstance(middleware, MiddlewarePipeline):
+            self._pipeline = middleware.copy()
+        else:
+            self._pipeline = MiddlewarePipeline([] if middleware is None else [middleware])
+        self._rebuild_dispatch()
+
+    def add_middleware(self, middleware, node_types=None, order=0):
+        self._pipeline.add(middleware, node_types, order)
+        self._rebuild_dispatch()
+        return middleware
+
+    def remove_middleware(self, middleware):
+        self._pipeline.remove(middleware)
+        self._rebuild_dispatch()
+
+    def _rebuild_dispatch(self):
+        self._dispatch_lookup = self._pipeline.compose(self._accept_method_lookup)
+        self._wrapped_types = self._pipeline.wrapped_types(self._accept_method_lookup)
+
+    def _fork(self):
+        forked = copy.copy(self)
+        forked.variable_scopes = list(self.variable_scopes)
+        forked.clear_batch()
+        forked._batch_depth = 0
+        forked._accept_method_lookup = dict([
+            (visitable_type, self._rebind(method, forked))
+            for visitable_type, method in self._accept_method_lookup.items()
+        ])
+        forked._rebuild_dispatch()
+        return forked
+
+    def _rebind(self, method, instance):
+        if getattr(method, '__self__', None) is self:
+            return types.MethodType(method.__func__, instance)
+        return method
 
     def _push_scope(self):
         self.variable_scopes.append({})
@@ -39,9 +209,14 @@ class Interpreter(Visitor):
         self.variable_scopes[-1][name] = value
 
     def accept_do(self, do_node: structure.Do):
-        result = None
-        for node in do_node.children:
-            result = self.accept(node)
+        children = do_node.children
+        if not children:
+            return None
+        for node in children[:-1]:
+            self.discard(node)
+        result = self.accept(children[-1])
+        if self._batch_arguments and not self._batch_depth:
+            self.flush_batch()
         return result
 
     def accept_bool(self, bool_node: structure.Bool):
@@ -77,22 +252,121 @@ class Interpreter(Visitor):
         )
 
     def accept_foreach(self, foreach_node: structure.ForEach):
-        def _body(value):
+        if not self.batch_calls:
+            return list(self._iterate_foreach(foreach_node, self.accept))
+        self._batch_depth += 1
+        try:
+            results = list(self._iterate_foreach(foreach_node, self._accept_deferred))
+        except BaseException:
+            self.clear_batch()
+            raise
+        finally:
+            self._batch_depth -= 1
+        self.flush_batch()
+        return [result.value if type(result) is _DeferredResult else result for result in results]
+
+    def _iterate_foreach(self, foreach_node, evaluate_body):
+        for value in self.iterate(foreach_node.collection):
             self._push_scope()
             self._create_variable(foreach_node.value_name.label, value)
-            result = self.accept(foreach_node.body)
+            result = evaluate_body(foreach_node.body)
             self._pop_scope()
-            return result
+            yield result
 
-        return [
-            _body(value) for value in self.accept(foreach_node.collection)
-        ]
+    def accept_parallel_foreach(self, foreach_node: structure.ParallelForEach):
+        def _body(value):
+            iteration = self._fork()
+            iteration._push_scope()
+            iteration._create_variable(foreach_node.value_name.label, value)
+            return iteration.accept(foreach_node.body)
+
+        return parallel_map(
+            _body, self.accept(foreach_node.collection), self.parallel_executor, self.parallel_limit
+        )
 
     def accept_comment(self, _comment_node: structure.Comment):
         return None
 
     def accept_call(self, call_node: structure.Call):
+        if self._batch_arguments and call_node.target.label not in self.pure_calls:
+            if call_node.target.label == self._batch_name:
+                deferred = _DeferredResult()
+                self._queue_call(call_node, deferred)
+                self.flush_batch()
+                return deferred.value
+            self.flush_batch()
         external_fn = self.external_calls.get(call_node.target.label)
         if external_fn is not None:
             return external_fn(self.accept, call_node.target.label, *call_node.arguments)
         raise Exception(f"unknown function '{call_node.target.label}' (arguments: {call_node.arguments})")
+
+
+class SlotInterpreter(Interpreter):
+
+    def __init__(self, *args, resolution: Resolution = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._resolver = Resolver(resolution)
+        self._slots = self._resolver.resolution.slots
+        self._frame_sizes = self._resolver.resolution.frame_sizes
+        self._releases_roots = resolution is None
+        self._prepared = None
+        self.frames = [[]]
+
+    def prepare(self, visiting):
+        self._resolver.resolve_root(visiting)
+        self._prepared = visiting
+        resolution = self._resolver.resolution
+        root_frame = self.frames[0]
+        root_frame.extend([_UNSET] * (resolution.root_frame_size - len(root_frame)))
+        self.frames.extend([None] * (resolution.max_depth + 1 - len(self.frames)))
+
+    def discard(self, visiting):
+        super().discard(visiting)
+        resolution = self._resolver.resolution
+        if self._releases_roots and visiting is not self._prepared and id(visiting) in resolution.resolved_roots:
+            resolution.release(visiting)
+
+    def _fork(self):
+        forked = super()._fork()
+        forked.frames = list(self.frames)
+        return forked
+
+    def accept_identifier(self, identifier_node: structure.Identifier):
+        slots = self._slots.get(id(identifier_node))
+        if slots is not None:
+            frames = self.frames
+            for depth, index in slots:
+                value = frames[depth][index]
+                if value is not _UNSET:
+                    return value
+        raise Exception(f"unknown variable '{identifier_node.label}'")
+
+    def accept_let(self, let_node: structure.Let):
+        value = self.accept(let_node.expression)
+        depth, index = self._slots[id(let_node)]
+        self.frames[depth][index] = value
+
+    def accept_parallel_foreach(self, foreach_node: structure.ParallelForEach):
+        depth, index = self._slots[id(foreach_node)]
+        frame_size = self._frame_sizes[id(foreach_node)]
+
+        def _body(value):
+            iteration = self._fork()
+            frame = [_UNSET] * frame_size
+            frame[index] = value
+            iteration.frames[depth] = frame
+            return iteration.accept(foreach_node.body)
+
+        return parallel_map(
+            _body, self.accept(foreach_node.collection), self.parallel_executor, self.parallel_limit
+        )
+
+    def _iterate_foreach(self, foreach_node, evaluate_body):
+        depth, index = self._slots[id(foreach_node)]
+        frame_size = self._frame_sizes[id(foreach_node)]
+        frames = self.frames
+        for value in self.iterate(foreach_node.collection):
+            frame = [_UNSET] * frame_size
+            frame[index] = value
+            frames[depth] = frame
+            yield evaluate_body(foreach_node.body)
@@ -1,4 +1,9 @@
+import inspect
+
+
 from ..sexp_renderer import SexpVisitor
+from .pipeline import MiddlewarePipeline
+from .profiling import ProfilingMiddleware
 
 
 class DebugMiddleware:
@@ -12,6 +17,14 @@ class DebugMiddleware:
         print(f"{indent}interpreting: {self._sexp_renderer.accept(visiting)}")
         self._indent += 1
         result = accept(visiting)
+        if inspect.isawaitable(result):
+            return self._finish_async(indent, result)
+        return self._finish(indent, result)
+
+    async def _finish_async(self, indent, result):
+        return self._finish(indent, await result)
+
+    def _finish(self, indent, result):
         self._indent -= 1
         print(f"{indent}+-- {repr(result)}")
         return result
@@ -0,0 +1,66 @@
+import functools
+import typing
+
+
+class _Entry(typing.NamedTuple):
+    middleware: typing.Callable
+    node_types: typing.Optional[typing.Tuple[type, ...]]
+    order: int
+
+
+class MiddlewarePipeline:
+
+    def __init__(self, middlewares: typing.Iterable[typing.Callable] = ()):
+        self._entries = []
+        for middleware in middlewares:
+            self.add(middleware)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return (entry.middleware for entry in self._entries)
+
+    def add(self, middleware, node_types=None, order=0):
+        if node_types is not None:
+            node_types = tuple(node_types)
+        self._entries.append(_Entry(middleware, node_types, order))
+        self._entries.sort(key=lambda entry: entry.order)
+        return middleware
+
+    def remove(self, middleware):
+        entries = [entry for entry in self._entries if entry.middleware is not middleware]
+        if len(entries) == len(self._entries):
+            raise Exception(f"middleware is not part of the pipeline: {middleware!r}")
+        self._entries = entries
+
+    def clear(self):
+        self._entries = []
+
+    def copy(self) -> 'MiddlewarePipeline':
+        pipeline = MiddlewarePipeline()
+        pipeline._entries = list(self._entries)
+        return pipeline
+
+    def wrapped_types(self, accept_methods: typing.Dict[type, typing.Callable]) -> typing.FrozenSet[type]:
+        return frozenset(
+            visitable_type for visitable_type in accept_methods
+            if any(self._applies(entry, visitable_type) for entry in self._entries)
+        )
+
+    def compose(self, accept_methods: typing.Dict[type, typing.Callable]) -> typing.Dict[type, typing.Callable]:
+        if not self._entries:
+            return accept_methods
+        composed = {}
+        for visitable_type, method in accept_methods.items():
+            for entry in reversed(self._entries):
+                if self._applies(entry, visitable_type):
+                    method = functools.partial(entry.middleware, method)
+            composed[visitable_type] = method
+        return composed
+
+    @staticmethod
+    def _applies(entry, visitable_type):
+        if not getattr(entry.middleware, 'enabled', True):
+            return False
+        return entry.node_types is None or issubclass(visitable_type, entry.node_types)
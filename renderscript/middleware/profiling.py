@@ -0,0 +1,160 @@
+import contextvars
+import inspect
+import json
+import random
+import threading
+import time
+import typing
+
+
+from .. import structure
+
+
+class _NodeStats:
+    __slots__ = ('node', 'label', 'position', 'count', 'inclusive_ns', 'exclusive_ns')
+
+    def __init__(self, node, label, position):
+        self.node = node
+        self.label = label
+        self.position = position
+        self.count = 0
+        self.inclusive_ns = 0
+        self.exclusive_ns = 0
+
+
+class _ThreadProfile:
+
+    def __init__(self):
+        self.nodes = {}
+        self.stacks = {}
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, sample_rate=1.0, positions=None, clock=time.perf_counter_ns, sampler=random.random):
+        self.enabled = sample_rate >= 1.0 or sampler() < sample_rate
+        self.positions = positions or {}
+        self._clock = clock
+        self._local = threading.local()
+        self._current_frame = contextvars.ContextVar('current_frame', default=None)
+        self._profiles = []
+        self._profiles_lock = threading.Lock()
+
+    def __call__(self, accept, visiting):
+        profile = self._profile()
+        stats = profile.nodes.get(id(visiting))
+        if stats is None:
+            stats = profile.nodes[id(visiting)] = self._node_stats(visiting)
+        parent = self._current_frame.get()
+        frame = [parent[0] + (stats.label,) if parent is not None else (stats.label,), 0]
+        token = self._current_frame.set(frame)
+        start = self._clock()
+        try:
+            result = accept(visiting)
+        except BaseException:
+            self._record(profile, stats, parent, frame, self._clock() - start)
+            raise
+        finally:
+            self._current_frame.reset(token)
+        if inspect.isawaitable(result):
+            return self._finish_async(profile, stats, parent, frame, result)
+        self._record(profile, stats, parent, frame, self._clock() - start)
+        return result
+
+    async def _finish_async(self, profile, stats, parent, frame, result):
+        token = self._current_frame.set(frame)
+        start = self._clock()
+        try:
+            return await result
+        finally:
+            elapsed = self._clock() - start
+            self._current_frame.reset(token)
+            self._record(profile, stats, parent, frame, elapsed)
+
+    @staticmethod
+    def _record(profile, stats, parent, frame, elapsed):
+        if parent is not None:
+            parent[1] += elapsed
+        exclusive = elapsed - frame[1]
+        stats.count += 1
+        stats.inclusive_ns += elapsed
+        stats.exclusive_ns += exclusive
+        profile.stacks[frame[0]] = profile.stacks.get(frame[0], 0) + exclusive
+
+    def node_summaries(self) -> typing.List[dict]:
+        merged = {}
+        for profile in self._snapshot():
+            for node_id, stats in profile.nodes.items():
+                summary = merged.get(node_id)
+                if summary is None:
+                    summary = merged[node_id] = {
+                        'label': stats.label,
+                        'position': None if stats.position is None else str(stats.position),
+                        'count': 0,
+                        'inclusive_ns': 0,
+                        'exclusive_ns': 0,
+                    }
+                summary['count'] += stats.count
+                summary['inclusive_ns'] += stats.inclusive_ns
+                summary['exclusive_ns'] += stats.exclusive_ns
+        return sorted(merged.values(), key=lambda summary: summary['inclusive_ns'], reverse=True)
+
+    def call_summaries(self) -> typing.List[dict]:
+        merged = {}
+        for profile in self._snapshot():
+            for stats in profile.nodes.values():
+                if type(stats.node) is not structure.Call:
+                    continue
+                name = stats.node.target.label
+                summary = merged.setdefault(name, {'name': name, 'count': 0, 'inclusive_ns': 0, 'exclusive_ns': 0})
+                summary['count'] += stats.count
+                summary['inclusive_ns'] += stats.inclusive_ns
+                summary['exclusive_ns'] += stats.exclusive_ns
+        return sorted(merged.values(), key=lambda summary: summary['inclusive_ns'], reverse=True)
+
+    def summary(self) -> dict:
+        return {
+            'sampled': self.enabled,
+            'nodes': self.node_summaries(),
+            'calls': self.call_summaries(),
+        }
+
+    def collapsed_stacks(self) -> str:
+        merged = {}
+        for profile in self._snapshot():
+            for path, exclusive_ns in profile.stacks.items():
+                merged[path] = merged.get(path, 0) + exclusive_ns
+        return "".join(
+            f"{';'.join(label.replace(';', ':') for label in path)} {exclusive_ns // 1000}\n"
+            for path, exclusive_ns in sorted(merged.items())
+        )
+
+    def write_collapsed_stacks(self, path):
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(self.collapsed_stacks())
+
+    def write_summary(self, path):
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(self.summary(), output, indent=2)
+
+    def _profile(self):
+        profile = getattr(self._local, 'profile', None)
+        if profile is None:
+            profile = self._local.profile = _ThreadProfile()
+            with self._profiles_lock:
+                self._profiles.append(profile)
+        return profile
+
+    def _snapshot(self):
+        with self._profiles_lock:
+            return list(self._profiles)
+
+    def _node_stats(self, node):
+        position = self.positions.get(id(node))
+        if type(node) is structure.Call:
+            label = node.target.label
+        else:
+            label = type(node).__name__
+        if position is not None:
+            label = f"{label} {position}"
+        return _NodeStats(node, label, position)
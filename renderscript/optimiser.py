@@ -0,0 +1,154 @@
+import typing
+
+
+from .visitor import Visitor
+from . import structure
+
+
+_LITERAL_TYPES = (structure.Bool, structure.Number, structure.String, structure.List, structure.MakeMap)
+
+
+class Optimiser(Visitor):
+
+    def __init__(self, external_calls=None, pure_calls=None):
+        super().__init__(throw_on_unknown=True)
+        self.auto_detect_accept_methods()
+        self.external_calls = dict(external_calls or {})
+        self.pure_calls = set(pure_calls or ())
+        self.removed_nodes = 0
+
+    @classmethod
+    def for_interpreter(cls, interpreter) -> 'Optimiser':
+        return cls(interpreter.external_calls, interpreter.pure_calls)
+
+    def optimise(self, compiled_script: typing.List[structure.Node]) -> typing.List[structure.Node]:
+        return self._optimise_sequence(compiled_script)
+
+    def _optimise_sequence(self, nodes):
+        result = []
+        for index, node in enumerate(nodes):
+            final = index == len(nodes) - 1
+            optimised = self.accept(node)
+            if type(optimised) is structure.Do and final and optimised.children:
+                self.removed_nodes += 1
+                result.extend(optimised.children)
+            elif type(optimised) is structure.Do and not final:
+                kept = [child for child in optimised.children if not _is_empty_statement(child)]
+                self.removed_nodes += 1 + len(optimised.children) - len(kept)
+                result.extend(kept)
+            elif type(optimised) is not structure.Comment or final:
+                result.append(optimised)
+            else:
+                self.removed_nodes += 1
+        return result
+
+    def accept_do(self, do_node: structure.Do):
+        return structure.Do(self._optimise_sequence(do_node.children))
+
+    def accept_bool(self, bool_node: structure.Bool):
+        return bool_node
+
+    def accept_number(self, number_node: structure.Number):
+        return number_node
+
+    def accept_string(self, string_node: structure.String):
+        return string_node
+
+    def accept_list(self, list_node: structure.List):
+        return structure.List([self.accept(value) for value in list_node.values])
+
+    def accept_map(self, map_node: structure.MakeMap):
+        entries = map_node.entries.items() if isinstance(map_node.entries, dict) else map_node.entries
+        return structure.MakeMap([(self.accept(key), self.accept(value)) for key, value in entries])
+
+    def accept_if(self, if_node: structure.If):
+        condition = self.accept(if_node.condition)
+        if _is_literal(condition):
+            taken, pruned = (if_node.true, if_node.false) if _literal_value(condition) else (if_node.false, if_node.true)
+            self.removed_nodes += 1 + _count_nodes([condition, pruned])
+            return self.accept(taken)
+        return structure.If(condition, self.accept(if_node.true), self.accept(if_node.false))
+
+    def accept_identifier(self, identifier_node: structure.Identifier):
+        return identifier_node
+
+    def accept_let(self, let_node: structure.Let):
+        return structure.Let(let_node.name, self.accept(let_node.expression))
+
+    def accept_foreach(self, foreach_node: structure.ForEach):
+        return structure.ForEach(
+            foreach_node.value_name, self.accept(foreach_node.collection), self.accept(foreach_node.body)
+        )
+
+    def accept_parallel_foreach(self, foreach_node: structure.ParallelForEach):
+        return structure.ParallelForEach(
+            foreach_node.value_name, self.accept(foreach_node.collection), self.accept(foreach_node.body)
+        )
+
+    def accept_comment(self, comment_node: structure.Comment):
+        return comment_node
+
+    def accept_call(self, call_node: structure.Call):
+        name = call_node.target.label
+        arguments = [self.accept(argument) for argument in call_node.arguments]
+        external_fn = self.external_calls.get(name)
+        if name in self.pure_calls and external_fn is not None and all(
+                _is_literal(argument) or type(argument) is structure.Identifier for argument in arguments):
+            try:
+                folded = _literal_node(external_fn(_literal_value, name, *arguments))
+            except Exception:
+                pass
+            else:
+                self.removed_nodes += 2 + _count_nodes(arguments)
+                return folded
+        return structure.Call(call_node.target, arguments)
+
+
+def optimise(compiled_script: typing.List[structure.Node], interpreter) -> typing.Tuple[typing.List[structure.Node], int]:
+    optimiser = Optimiser.for_interpreter(interpreter)
+    optimised = optimiser.optimise(compiled_script)
+    return optimised, optimiser.removed_nodes
+
+
+def _is_empty_statement(node):
+    node_type = type(node)
+    return node_type is structure.Comment or node_type is structure.Do and not node.children
+
+
+def _count_nodes(nodes):
+    return sum(1 for _ in structure.walk(nodes))
+
+
+def _is_literal(node):
+    node_type = type(node)
+    if node_type is structure.List:
+        return all(_is_literal(value) for value in node.values)
+    elif node_type is structure.MakeMap:
+        return all(_is_literal(key) and _is_literal(value) for key, value in node.entries)
+    return node_type in _LITERAL_TYPES
+
+
+def _literal_value(node):
+    node_type = type(node)
+    if node_type is structure.List:
+        return [_literal_value(value) for value in node.values]
+    elif node_type is structure.MakeMap:
+        return dict([(_literal_value(key), _literal_value(value)) for key, value in node.entries])
+    elif node_type in _LITERAL_TYPES:
+        return node.value
+    raise Exception(f"not a literal: {node}")
+
+
+def _literal_node(value):
+    value_type = type(value)
+    if value_type is bool:
+        return structure.Bool(value)
+    elif value_type is int or value_type is float:
+        return structure.Number(value)
+    elif value_type is str:
+        return structure.String(value)
+    elif value_type is list:
+        return structure.List([_literal_node(item) for item in value])
+    elif value_type is dict:
+        return structure.MakeMap([(_literal_node(key), _literal_node(item)) for key, item in value.items()])
+    raise Exception(f"cannot represent {value_type.__name__} as a literal")
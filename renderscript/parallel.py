@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import threading
+import typing
+
+
+DEFAULT_PARALLEL_LIMIT = 8
+
+_worker_state = threading.local()
+_shared_executor = None
+_shared_executor_lock = threading.Lock()
+
+
+def parallel_map(fn: typing.Callable, values: typing.Iterable, executor=None,
+                 limit: int = DEFAULT_PARALLEL_LIMIT) -> typing.List[typing.Any]:
+    if getattr(_worker_state, 'active', False):
+        return [fn(value) for value in values]
+    if executor is None:
+        executor = shared_executor()
+
+    results = []
+    pending = deque()
+    try:
+        for value in values:
+            if len(pending) >= limit:
+                results.append(pending.popleft().result())
+            pending.append(executor.submit(_run_as_worker, fn, value))
+        while pending:
+            results.append(pending.popleft().result())
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
+    return results
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(thread_name_prefix='renderscript-parallel')
+        return _shared_executor
+
+
+def _run_as_worker(fn, value):
+    _worker_state.active = True
+    try:
+        return fn(value)
+    finally:
+        _worker_state.active = False
@@ -12,33 +12,26 @@ def build(ast: typing.List[AstNode]) -> typing.List[structure.Node]:
     ]
 
 
+def iterate_build(ast: typing.Iterable[AstNode]) -> typing.Iterator[structure.Node]:
+    for ast_node in ast:
+        yield build_node(ast_node)
+
+
 def build_node(ast: AstNode) -> structure.Node:
-    known_node_kinds = {
-        TokenKinds.STRING: lambda node: structure.String(node.head.value),
-        TokenKinds.NUMBER: lambda node: structure.Number(
-            float(node.head.value) if '.' in node.head.value else int(node.head.value)
-        ),
-        TokenKinds.BOOL: lambda node: structure.Bool(True if node.head.value == 'true' else False),
-        TokenKinds.IDENTIFIER: lambda node: structure.Identifier(node.head.value),
-        TokenKinds.OPEN_PAREN: build_sexpression,
-    }
-
-    if ast.head.kind in known_node_kinds:
-        return known_node_kinds[ast.head.kind](ast)
+    kind = ast.head.kind
+    if kind in ATOM_BUILDERS:
+        return ATOM_BUILDERS[kind](ast.head.value)
+    elif kind == TokenKinds.OPEN_PAREN:
+        return build_sexpression(ast)
 
     raise Exception(f"unable to build interpreter node from ast node: {ast}")
 
 
-def build_sexpression(ast: AstNode) -> structure.Node:
-    language_functions = {
-        'let': build_let,
-        'if': build_if,
-        'for-each': build_foreach,
-        'list': build_list,
-        'make-map': build_makemap,
-        'do': build_do,
-    }
+def build_number(value: str) -> structure.Number:
+    return structure.Number(float(value) if '.' in value else int(value))
 
+
+def build_sexpression(ast: AstNode) -> structure.Node:
     if len(ast.tail) < 1:
         raise Exception(f"unexpected empty s-expression at {ast.head.start_position}")
     fn_name_node = ast.tail[0]
@@ -46,8 +39,9 @@ def build_sexpression(ast: AstNode) -> structure.Node:
         raise Exception(f"expected s-expression to start with an identifier at {fn_name_node.head.start_position}")
     fn_name = fn_name_node.head.value
 
-    if fn_name in language_functions:
-        return language_functions[fn_name](ast)
+    language_function = LANGUAGE_FUNCTIONS.get(fn_name)
+    if language_function is not None:
+        return language_function(ast)
     else:
         return structure.Call(structure.Identifier(fn_name), [
             build_node(node) for node in ast.tail[1:]
@@ -81,15 +75,23 @@ def build_if(ast: AstNode) -> structure.If:
 
 
 def build_foreach(ast: AstNode) -> structure.ForEach:
+    return _build_iteration(ast, 'for-each', structure.ForEach)
+
+
+def build_parallel_foreach(ast: AstNode) -> structure.ParallelForEach:
+    return _build_iteration(ast, 'for-each-parallel', structure.ParallelForEach)
+
+
+def _build_iteration(ast: AstNode, fn_name: str, node_type):
     if len(ast.tail) != 4:
-        raise Exception(f"expected three values passed to for-each at {ast.head.start_position}")
+        raise Exception(f"expected three values passed to {fn_name} at {ast.head.start_position}")
     label_node = ast.tail[1]
     if label_node.head.kind != TokenKinds.IDENTIFIER:
         raise Exception(f"expected identifier as name of iteration variable at {label_node.head.start_position}")
     label_name = label_node.head.value
     list_node = ast.tail[2]
     body_node = ast.tail[3]
-    return structure.ForEach(
+    return node_type(
         structure.Identifier(label_name),
         build_node(list_node),
         build_node(body_node)
@@ -118,3 +120,21 @@ def build_makemap(ast: AstNode) -> structure.MakeMap:
             (build_node(args[index]), build_node(args[index + 1]))
         )
     return structure.MakeMap(entries)
+
+
+ATOM_BUILDERS = {
+    TokenKinds.STRING: structure.String,
+    TokenKinds.NUMBER: build_number,
+    TokenKinds.BOOL: lambda value: structure.Bool(value == 'true'),
+    TokenKinds.IDENTIFIER: structure.Identifier,
+}
+
+LANGUAGE_FUNCTIONS = {
+    'let': build_let,
+    'if': build_if,
+    'for-each': build_foreach,
+    'for-each-parallel': build_parallel_foreach,
+    'list': build_list,
+    'make-map': build_makemap,
+    'do': build_do,
+}
@@ -0,0 +1,151 @@
+import typing
+
+
+from .source import SourcePosition
+from .tokeniser import TokenKinds, Token, ITokeniser
+from .parser import expect_token, peek_any_token
+from .build import ATOM_BUILDERS
+from .. import structure
+
+
+class _Failure:
+    __slots__ = ('exception',)
+
+    def __init__(self, exception):
+        self.exception = exception
+
+
+def build_direct(tokeniser: ITokeniser, positions: typing.Dict[int, SourcePosition] = None) -> typing.List[structure.Node]:
+    nodes = []
+    failure = None
+    while not tokeniser.is_eof():
+        node = _build_expression(tokeniser, expect_token(tokeniser, TokenKinds.OPEN_PAREN), positions)
+        if failure is None and type(node) is _Failure:
+            failure = node
+        nodes.append(node)
+    if failure is not None:
+        raise failure.exception
+    return nodes
+
+
+def iterate_build_direct(tokeniser: ITokeniser,
+                         positions: typing.Dict[int, SourcePosition] = None) -> typing.Iterator[structure.Node]:
+    while not tokeniser.is_eof():
+        yield _built(_build_expression(tokeniser, expect_token(tokeniser, TokenKinds.OPEN_PAREN), positions))
+
+
+def _build_expression(tokeniser: ITokeniser, head: Token, positions):
+    elements = []
+    while peek_any_token(tokeniser).kind != TokenKinds.CLOSE_PAREN:
+        token = tokeniser.get()
+        kind = token.kind
+        if kind in ATOM_BUILDERS:
+            elements.append((token, ATOM_BUILDERS[kind](token.value)))
+        elif kind == TokenKinds.OPEN_PAREN:
+            elements.append((token, _build_expression(tokeniser, token, positions)))
+        else:
+            raise Exception(f"unexpected token {token}")
+    tokeniser.get()
+
+    try:
+        node = _build_sexpression(head, elements)
+    except Exception as exception:
+        return _Failure(exception)
+    if positions is not None:
+        positions[id(node)] = head.start_position
+    return node
+
+
+def _built(node):
+    if type(node) is _Failure:
+        raise node.exception
+    return node
+
+
+def _build_sexpression(head: Token, elements) -> structure.Node:
+    if len(elements) < 1:
+        raise Exception(f"unexpected empty s-expression at {head.start_position}")
+    fn_name_token = elements[0][0]
+    if fn_name_token.kind != TokenKinds.IDENTIFIER:
+        raise Exception(f"expected s-expression to start with an identifier at {fn_name_token.start_position}")
+    fn_name = fn_name_token.value
+
+    language_function = _LANGUAGE_FUNCTIONS.get(fn_name)
+    if language_function is not None:
+        return language_function(head, elements)
+    else:
+        return structure.Call(structure.Identifier(fn_name), [
+            _built(node) for _, node in elements[1:]
+        ])
+
+
+def _build_let(head: Token, elements) -> structure.Let:
+    if len(elements) != 3:
+        raise Exception(f"expected two values passed to let at {head.start_position}")
+    identifier_token = elements[1][0]
+    if identifier_token.kind != TokenKinds.IDENTIFIER:
+        raise Exception(f"expected identifier as name of variable to declare at {identifier_token.start_position}")
+    return structure.Let(
+        structure.Identifier(identifier_token.value),
+        _built(elements[2][1])
+    )
+
+
+def _build_if(head: Token, elements) -> structure.If:
+    if len(elements) != 4:
+        raise Exception(f"expected three values passed to if at {head.start_position}")
+    return structure.If(
+        _built(elements[1][1]),
+        _built(elements[2][1]),
+        _built(elements[3][1]),
+    )
+
+
+def _build_iteration(fn_name: str, node_type):
+    def _build(head: Token, elements):
+        if len(elements) != 4:
+            raise Exception(f"expected three values passed to {fn_name} at {head.start_position}")
+        label_token = elements[1][0]
+        if label_token.kind != TokenKinds.IDENTIFIER:
+            raise Exception(f"expected identifier as name of iteration variable at {label_token.start_position}")
+        return node_type(
+            structure.Identifier(label_token.value),
+            _built(elements[2][1]),
+            _built(elements[3][1])
+        )
+    return _build
+
+
+def _build_list(_head: Token, elements) -> structure.List:
+    return structure.List([
+        _built(node) for _, node in elements[1:]
+    ])
+
+
+def _build_do(_head: Token, elements) -> structure.Do:
+    return structure.Do([
+        _built(node) for _, node in elements[1:]
+    ])
+
+
+def _build_makemap(head: Token, elements) -> structure.MakeMap:
+    args = elements[1:]
+    if len(args) % 2 != 0:
+        raise Exception(f"expected even number of arguments to make-map at {head.start_position}")
+    entries = []
+    for index in range(0, len(args), 2):
+        entries.append(
+            (_built(args[index][1]), _built(args[index + 1][1]))
+        )
+    return structure.MakeMap(entries)
+
+
+_LANGUAGE_FUNCTIONS = {
+    'let': _build_let,
+    'if': _build_if,
+    'for-each': _build_iteration('for-each', structure.ForEach),
+    'for-each-parallel': _build_iteration('for-each-parallel', structure.ParallelForEach),
+    'list': _build_list,
+    'make-map': _build_makemap,
+    'do': _build_do,
+}
@@ -4,17 +4,19 @@ import typing
 from renderscript.parsing.tokeniser import TokenKinds, Token, ITokeniser
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AstNode:
     head: Token
     tail: typing.List['AstNode']
 
 
 def parse(tokeniser: ITokeniser) -> typing.List[AstNode]:
-    expressions = []
+    return list(iterate_parse(tokeniser))
+
+
+def iterate_parse(tokeniser: ITokeniser) -> typing.Iterator[AstNode]:
     while not tokeniser.is_eof():
-        expressions.append(parse_expression(tokeniser))
-    return expressions
+        yield parse_expression(tokeniser)
 
 
 def parse_expression(tokeniser: ITokeniser) -> AstNode:
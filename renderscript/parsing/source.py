@@ -1,11 +1,57 @@
+import codecs
+import contextlib
+import mmap
+import os
 import typing
-from dataclasses import dataclass
 
 
-@dataclass(frozen=True)
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+_COLUMN_BITS = 32
+_COLUMN_MASK = (1 << _COLUMN_BITS) - 1
+
+
+def pack_position(line: int, column: int) -> int:
+    return (line << _COLUMN_BITS) | column
+
+
 class SourcePosition:
-    line: int
-    column: int
+    __slots__ = ('packed',)
+
+    def __init__(self, line: int, column: int):
+        object.__setattr__(self, 'packed', pack_position(line, column))
+
+    @classmethod
+    def unpack(cls, packed: int) -> 'SourcePosition':
+        position = object.__new__(cls)
+        object.__setattr__(position, 'packed', packed)
+        return position
+
+    @property
+    def line(self) -> int:
+        return self.packed >> _COLUMN_BITS
+
+    @property
+    def column(self) -> int:
+        return self.packed & _COLUMN_MASK
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot assign to field '{name}'")
+
+    def __eq__(self, other):
+        if type(other) is not SourcePosition:
+            return NotImplemented
+        return self.packed == other.packed
+
+    def __hash__(self):
+        return hash(self.packed)
+
+    def __repr__(self):
+        return f"SourcePosition(line={self.line}, column={self.column})"
+
+    def __reduce__(self):
+        return SourcePosition.unpack, (self.packed,)
 
     def next_column(self):
         return SourcePosition(self.line, self.column + 1)
@@ -37,7 +83,8 @@ class StringSource(Source):
     def __init__(self, text):
         self.text = text
         self.index = 0
-        self.source_position = SourcePosition(1, 1)
+        self.line = 1
+        self.column = 1
 
     def peek(self) -> typing.Optional[str]:
         if self.is_eof():
@@ -49,13 +96,64 @@ class StringSource(Source):
         if result is not None:
             self.index += 1
             if result == '\n':
-                self.source_position = self.source_position.next_line()
+                self.line += 1
+                self.column = 1
             else:
-                self.source_position = self.source_position.next_column()
+                self.column += 1
         return result
 
     def is_eof(self) -> bool:
         return self.index >= len(self.text)
 
     def tell(self) -> SourcePosition:
-        return self.source_position
\ No newline at end of file
+        return SourcePosition(self.line, self.column)
+
+
+class FileSource(Source):
+
+    def __init__(self, stream: typing.BinaryIO, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.chunk = ''
+        self.index = 0
+        self.exhausted = False
+        self.line = 1
+        self.column = 1
+
+    @classmethod
+    @contextlib.contextmanager
+    def open(cls, path, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8', use_mmap=True):
+        with open(path, 'rb') as file:
+            if use_mmap and os.fstat(file.fileno()).st_size > 0:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    yield cls(mapped, chunk_size, encoding)
+            else:
+                yield cls(file, chunk_size, encoding)
+
+    def peek(self) -> typing.Optional[str]:
+        if self.is_eof():
+            return None
+        return self.chunk[self.index]
+
+    def get(self) -> typing.Optional[str]:
+        result = self.peek()
+        if result is not None:
+            self.index += 1
+            if result == '\n':
+                self.line += 1
+                self.column = 1
+            else:
+                self.column += 1
+        return result
+
+    def is_eof(self) -> bool:
+        while self.index >= len(self.chunk) and not self.exhausted:
+            data = self.stream.read(self.chunk_size)
+            self.exhausted = not data
+            self.chunk = self.decoder.decode(data, final=self.exhausted)
+            self.index = 0
+        return self.index >= len(self.chunk)
+
+    def tell(self) -> SourcePosition:
+        return SourcePosition(self.line, self.column)
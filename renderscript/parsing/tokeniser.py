@@ -1,10 +1,11 @@
+import bisect
 import enum
 import re
 import string
+import sys
 import typing
-from dataclasses import dataclass
 
-from renderscript.parsing.source import SourcePosition
+from renderscript.parsing.source import SourcePosition, pack_position
 
 
 @enum.unique
@@ -17,12 +18,55 @@ class TokenKinds(enum.Enum):
     IDENTIFIER = enum.auto()
 
 
-@dataclass(frozen=True)
+def _pack(position: typing.Optional[SourcePosition]) -> typing.Optional[int]:
+    return None if position is None else position.packed
+
+
+def _unpack(packed: typing.Optional[int]) -> typing.Optional[SourcePosition]:
+    return None if packed is None else SourcePosition.unpack(packed)
+
+
+def _initialise_token(token, kind, value, packed_start, packed_end):
+    object.__setattr__(token, 'kind', kind)
+    object.__setattr__(token, 'value', value)
+    object.__setattr__(token, 'packed_start', packed_start)
+    object.__setattr__(token, 'packed_end', packed_end)
+
+
 class Token:
-    kind: TokenKinds
-    value: str
-    start_position: SourcePosition
-    end_position: SourcePosition
+    __slots__ = ('kind', 'value', 'packed_start', 'packed_end')
+
+    def __init__(self, kind: TokenKinds, value: str, start_position: SourcePosition, end_position: SourcePosition):
+        _initialise_token(self, kind, value, _pack(start_position), _pack(end_position))
+
+    @classmethod
+    def from_packed(cls, kind: TokenKinds, value: str, packed_start: int, packed_end: int) -> 'Token':
+        token = object.__new__(cls)
+        _initialise_token(token, kind, value, packed_start, packed_end)
+        return token
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot assign to field '{name}'")
+
+    @property
+    def start_position(self) -> typing.Optional[SourcePosition]:
+        return _unpack(self.packed_start)
+
+    @property
+    def end_position(self) -> typing.Optional[SourcePosition]:
+        return _unpack(self.packed_end)
+
+    def __eq__(self, other):
+        if type(other) is not Token:
+            return NotImplemented
+        return (self.kind, self.value, self.packed_start, self.packed_end) == \
+            (other.kind, other.value, other.packed_start, other.packed_end)
+
+    def __hash__(self):
+        return hash((self.kind, self.value, self.packed_start, self.packed_end))
+
+    def __reduce__(self):
+        return Token.from_packed, (self.kind, self.value, self.packed_start, self.packed_end)
 
     def __str__(self):
         result = f"Token(kind={self.kind.name} value={repr(self.value)}"
@@ -37,6 +81,17 @@ class Token:
         return str(self)
 
 
+KNOWN_ESCAPES = {
+    't': '\t',
+    'n': '\n',
+    'r': '\r',
+    'a': '\a',
+    'f': '\f',
+    '0': '\0',
+    '\\': '\\',
+}
+
+
 class ITokeniser:
 
     def peek(self) -> typing.Optional[Token]:
@@ -99,7 +154,7 @@ class Tokeniser(ITokeniser):
             value = self._consume_while_matches(r'\d+(\.\d*)?')
         else:
             kind = TokenKinds.IDENTIFIER
-            value = self._consume_while_matches(r'[^\s()]+')
+            value = sys.intern(self._consume_while_matches(r'[^\s()]+'))
             if value in ('true', 'false'):
                 kind = TokenKinds.BOOL
 
@@ -112,15 +167,6 @@ class Tokeniser(ITokeniser):
             self.source.get()
 
     def _consume_string(self):
-        known_escapes = {
-            't': '\t',
-            'n': '\n',
-            'r': '\r',
-            'a': '\a',
-            'f': '\f',
-            '0': '\0',
-            '\\': '\\',
-        }
         text = ""
         if self.source.peek() != '"':
             raise Exception(f"cannot consume a string: expected initial '\"' at {self.source.tell()}")
@@ -135,7 +181,7 @@ class Tokeniser(ITokeniser):
             elif not escaped and next_char == '\\':
                 escaped = True
             elif escaped:
-                text += known_escapes[next_char]
+                text += KNOWN_ESCAPES[next_char]
                 escaped = False
         return text
 
@@ -152,6 +198,98 @@ class Tokeniser(ITokeniser):
         return consumed
 
 
+class ScanningTokeniser(ITokeniser):
+
+    _TOKEN_PATTERN = re.compile(r'''
+        [ \t\n\r\x0b\x0c]*
+        (?:
+            (?P<open_paren>\()
+          | (?P<close_paren>\))
+          | (?P<string>"(?P<string_body>(?:[^"\\]|\\.)*)(?:"|\\)?)
+          | (?P<number>[0-9]\d*(?:\.\d*)?)
+          | (?P<identifier>[^\s()]+)
+        )?
+    ''', re.VERBOSE | re.DOTALL)
+    _ESCAPE_PATTERN = re.compile(r'\\(.?)', re.DOTALL)
+    _NEWLINE_PATTERN = re.compile(r'\n')
+    _GROUP_KINDS = {
+        'open_paren': TokenKinds.OPEN_PAREN,
+        'close_paren': TokenKinds.CLOSE_PAREN,
+        'string': TokenKinds.STRING,
+        'number': TokenKinds.NUMBER,
+        'identifier': TokenKinds.IDENTIFIER,
+    }
+
+    def __init__(self, text):
+        self.text = text
+        self.index = 0
+        self.next_token = None
+        self._line_starts = [0] + [match.end() for match in self._NEWLINE_PATTERN.finditer(text)]
+        self._line_hint = 0
+
+    def peek(self):
+        self._cache_next_token()
+        return self.next_token
+
+    def get(self):
+        result = self.peek()
+        self.next_token = None
+        return result
+
+    def is_eof(self):
+        self._cache_next_token()
+        return self.next_token is None
+
+    def tell(self):
+        return self._position(self.index)
+
+    def _position(self, offset):
+        return SourcePosition.unpack(self._packed_position(offset))
+
+    def _packed_position(self, offset):
+        line = bisect.bisect_right(self._line_starts, offset, self._line_hint)
+        self._line_hint = line - 1
+        return pack_position(line, offset - self._line_starts[line - 1] + 1)
+
+    def _cache_next_token(self):
+        if self.next_token is not None:
+            return
+
+        match = self._TOKEN_PATTERN.match(self.text, self.index)
+        group = match.lastgroup
+        self.index = match.end()
+        if group is None:
+            if self.index < len(self.text):
+                raise Exception(f"unexpected character {repr(self.text[self.index])} at {self.tell()}")
+            return
+
+        start_position = self._packed_position(match.start(group))
+        kind = self._GROUP_KINDS[group]
+        if kind == TokenKinds.STRING:
+            value = self._unescape(match.group('string_body'))
+        else:
+            value = match.group(group)
+            if kind == TokenKinds.IDENTIFIER:
+                value = sys.intern(value)
+                if value in ('true', 'false'):
+                    kind = TokenKinds.BOOL
+        end_position = self._packed_position(self.index)
+
+        self.next_token = Token.from_packed(kind, value, start_position, end_position)
+
+    def _unescape(self, text):
+        if '\\' not in text:
+            return text
+        return self._ESCAPE_PATTERN.sub(self._replace_escape, text)
+
+    @staticmethod
+    def _replace_escape(match):
+        escaped = match.group(1)
+        if not escaped:
+            return ''
+        return KNOWN_ESCAPES[escaped]
+
+
 class FixedTokeniser(ITokeniser):
 
     def __init__(self, tokens):
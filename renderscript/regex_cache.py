@@ -0,0 +1,77 @@
+import collections
+import re
+import threading
+import weakref
+
+
+DEFAULT_REGEX_CACHE_SIZE = 256
+
+
+class RegexCache:
+
+    def __init__(self, max_size=DEFAULT_REGEX_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._pinned = {}
+        self._patterns = collections.OrderedDict()
+        self._generation = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._pinned) + len(self._patterns)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def compile(self, pattern, flags=0) -> re.Pattern:
+        key = (pattern, flags)
+        with self._lock:
+            pinned = self._pinned.get(key)
+            compiled = None if pinned is None else pinned[0]
+            if compiled is None:
+                compiled = self._patterns.get(key)
+                if compiled is not None:
+                    self._patterns.move_to_end(key)
+            if compiled is not None:
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        compiled = re.compile(pattern, flags)
+        with self._lock:
+            self._patterns[key] = compiled
+            while len(self._patterns) > self.max_size:
+                self._patterns.popitem(last=False)
+        return compiled
+
+    def pin(self, owner, pattern, flags=0) -> re.Pattern:
+        key = (pattern, flags)
+        with self._lock:
+            pinned = self._pinned.get(key)
+        compiled = re.compile(pattern, flags) if pinned is None else pinned[0]
+        with self._lock:
+            pinned = self._pinned.setdefault(key, [compiled, 0])
+            pinned[1] += 1
+            generation = self._generation
+        weakref.finalize(owner, self._unpin, key, generation)
+        return pinned[0]
+
+    def _unpin(self, key, generation):
+        with self._lock:
+            pinned = self._pinned.get(key)
+            if pinned is None or generation != self._generation:
+                return
+            pinned[1] -= 1
+            if not pinned[1]:
+                del self._pinned[key]
+
+    def clear(self):
+        with self._lock:
+            self._pinned.clear()
+            self._patterns.clear()
+            self._generation += 1
+            self.hits = 0
+            self.misses = 0
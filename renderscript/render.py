@@ -75,6 +75,13 @@ class MarkdownRenderer(Visitor):
             with self._unordered_list():
                 self.accept(foreach_node.body)
 
+    def accept_parallel_foreach(self, foreach_node: structure.ParallelForEach):
+        item_var = self.expression_visitor.accept(foreach_node.value_name)
+        collection_var = self.expression_visitor.accept(foreach_node.collection)
+        with self._current_item_mgr(f"For each {item_var} in {collection_var}, in parallel:"):
+            with self._unordered_list():
+                self.accept(foreach_node.body)
+
     def accept_comment(self, _comment_node: structure.Comment):
         raise NotImplemented()
 
@@ -0,0 +1,162 @@
+import typing
+
+
+from .visitor import Visitor
+from . import structure
+
+
+class Scopes:
+
+    def __init__(self):
+        self._scopes = [{}]
+        self.max_depth = 0
+
+    @property
+    def depth(self):
+        return len(self._scopes) - 1
+
+    def push(self):
+        self._scopes.append({})
+        self.max_depth = max(self.max_depth, self.depth)
+
+    def pop(self) -> int:
+        return len(self._scopes.pop())
+
+    def size(self, depth) -> int:
+        return len(self._scopes[depth])
+
+    def declare(self, name) -> typing.Tuple[int, int]:
+        scope = self._scopes[-1]
+        if name not in scope:
+            scope[name] = len(scope)
+        return self.depth, scope[name]
+
+    def resolve_all(self, name) -> typing.Tuple[typing.Tuple[int, int], ...]:
+        return tuple(
+            (depth, self._scopes[depth][name])
+            for depth in range(self.depth, -1, -1)
+            if name in self._scopes[depth]
+        )
+
+    def resolve(self, name) -> typing.Optional[typing.Tuple[int, int]]:
+        for depth in range(self.depth, -1, -1):
+            index = self._scopes[depth].get(name)
+            if index is not None:
+                return depth, index
+        return None
+
+
+class Resolution:
+
+    def __init__(self):
+        self.slots = {}
+        self.frame_sizes = {}
+        self.resolved_roots = {}
+        self.scopes = Scopes()
+
+    @property
+    def root_frame_size(self):
+        return self.scopes.size(0)
+
+    @property
+    def max_depth(self):
+        return self.scopes.max_depth
+
+    def slot(self, node: structure.Node) -> typing.Optional[typing.Tuple[int, int]]:
+        return self.slots.get(id(node))
+
+    def assign(self, node: structure.Node, slot):
+        existing = self.slots.setdefault(id(node), slot)
+        if existing != slot:
+            raise Exception(f"node is shared between scopes and cannot be given a single slot: {node}")
+
+    def release(self, node: structure.Node):
+        self.resolved_roots.pop(id(node), None)
+        for released in structure.walk([node]):
+            self.slots.pop(id(released), None)
+            self.frame_sizes.pop(id(released), None)
+
+
+class Resolver(Visitor):
+
+    def __init__(self, resolution: Resolution = None):
+        super().__init__(throw_on_unknown=True)
+        self.auto_detect_accept_methods()
+        self.resolution = resolution or Resolution()
+
+    def resolve(self, compiled_script: typing.Iterable[structure.Node]) -> Resolution:
+        for node in compiled_script:
+            self.resolve_root(node)
+        return self.resolution
+
+    def resolve_root(self, node: structure.Node):
+        if id(node) not in self.resolution.resolved_roots:
+            self.accept(node)
+            self.resolution.resolved_roots[id(node)] = node
+
+    def _accept_all(self, nodes):
+        for node in nodes:
+            self.accept(node)
+
+    def _accept_iteration(self, foreach_node):
+        scopes = self.resolution.scopes
+        self.accept(foreach_node.collection)
+        scopes.push()
+        self.resolution.assign(foreach_node, scopes.declare(foreach_node.value_name.label))
+        self.accept(foreach_node.body)
+        self.resolution.frame_sizes[id(foreach_node)] = scopes.pop()
+
+    def accept_do(self, do_node: structure.Do):
+        self._accept_all(do_node.children)
+
+    def accept_bool(self, bool_node: structure.Bool):
+        pass
+
+    def accept_number(self, number_node: structure.Number):
+        pass
+
+    def accept_string(self, string_node: structure.String):
+        pass
+
+    def accept_list(self, list_node: structure.List):
+        self._accept_all(list_node.values)
+
+    def accept_map(self, map_node: structure.MakeMap):
+        for key, value in map_node.entries:
+            self.accept(key)
+            self.accept(value)
+
+    def accept_if(self, if_node: structure.If):
+        self._accept_all([if_node.condition, if_node.true, if_node.false])
+
+    def accept_identifier(self, identifier_node: structure.Identifier):
+        slots = self.resolution.scopes.resolve_all(identifier_node.label)
+        if not slots:
+            raise Exception(f"unknown variable '{identifier_node.label}'")
+        self.resolution.assign(identifier_node, slots)
+
+    def accept_let(self, let_node: structure.Let):
+        self.accept(let_node.expression)
+        self.resolution.assign(let_node, self.resolution.scopes.declare(let_node.name.label))
+
+    def accept_foreach(self, foreach_node: structure.ForEach):
+        self._accept_iteration(foreach_node)
+
+    def accept_parallel_foreach(self, foreach_node: structure.ParallelForEach):
+        self._accept_iteration(foreach_node)
+
+    def accept_comment(self, _comment_node: structure.Comment):
+        pass
+
+    def accept_call(self, call_node: structure.Call):
+        for argument in call_node.arguments:
+            if type(argument) is structure.Identifier:
+                slots = self.resolution.scopes.resolve_all(argument.label)
+                if slots:
+                    self.resolution.assign(argument, slots)
+            else:
+                self.accept(argument)
+
+
+def resolve(compiled_script: typing.Iterable[structure.Node]) -> Resolution:
+    return Resolver().resolve(compiled_script)
@@ -1,4 +1,5 @@
 from .visitor import Visitor
+from .arena import Arena, NodeKinds
 from . import structure
 
 
@@ -24,9 +25,10 @@ class SexpVisitor(Visitor):
         return self._render_sexp('list', *list_node.values)
 
     def accept_map(self, map_node: structure.MakeMap):
+        entries = map_node.entries.items() if isinstance(map_node.entries, dict) else map_node.entries
         return self._render_sexp('make-map', *sum([
             [key, value]
-            for key, value in map_node.entries.items()
+            for key, value in entries
         ], []))
 
     def accept_if(self, if_node: structure.If):
@@ -41,6 +43,11 @@ class SexpVisitor(Visitor):
     def accept_foreach(self, foreach_node: structure.ForEach):
         return self._render_sexp('for-each', foreach_node.value_name, foreach_node.collection, foreach_node.body)
 
+    def accept_parallel_foreach(self, foreach_node: structure.ParallelForEach):
+        return self._render_sexp(
+            'for-each-parallel', foreach_node.value_name, foreach_node.collection, foreach_node.body
+        )
+
     def accept_comment(self, comment_node: structure.Comment):
         return f";{comment_node.text}"
 
@@ -55,3 +62,35 @@ class SexpVisitor(Visitor):
                 return self.accept(value)
         return f"({' '.join(map(_render, values))})"
 
+
+class ArenaSexpVisitor:
+
+    def __init__(self, arena: Arena):
+        self.arena = arena
+        self._language_functions = {
+            NodeKinds.DO: 'do',
+            NodeKinds.LIST: 'list',
+            NodeKinds.MAKE_MAP: 'make-map',
+            NodeKinds.IF: 'if',
+            NodeKinds.LET: 'let',
+            NodeKinds.FOR_EACH: 'for-each',
+            NodeKinds.PARALLEL_FOR_EACH: 'for-each-parallel',
+        }
+
+    def accept(self, index: int) -> str:
+        kind = self.arena.kinds[index]
+        if kind == NodeKinds.COMMENT:
+            return f";{self.arena.value(index)}"
+        elif kind == NodeKinds.BOOL:
+            return "true" if self.arena.value(index) else "false"
+        elif kind == NodeKinds.NUMBER:
+            return str(self.arena.value(index))
+        elif kind == NodeKinds.STRING:
+            return f'"{self.arena.value(index)}"'
+        elif kind == NodeKinds.IDENTIFIER:
+            return self.arena.value(index)
+
+        values = [self.accept(child) for child in self.arena.children(index)]
+        if kind in self._language_functions:
+            values.insert(0, self._language_functions[kind])
+        return f"({' '.join(values)})"
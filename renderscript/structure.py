@@ -1,73 +1,109 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 import typing
 
 
+LANGUAGE_VERSION = 3
+
+
 @dataclass(frozen=True)
 class Node:
-    pass
+    __slots__ = ('__weakref__',)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Comment(Node):
     text: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Do(Node):
     children: typing.List[Node]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Bool(Node):
     value: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Number(Node):
     value: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class String(Node):
     value: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class List(Node):
     values: typing.List[Node]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MakeMap(Node):
     entries: typing.List[typing.Tuple[Node, Node]]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Identifier(Node):
     label: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class If(Node):
     condition: Node
     true: Node
     false: Node
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Let(Node):
     name: Identifier
     expression: Node
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ForEach(Node):
     value_name: Identifier
     collection: Node
     body: Node
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
+class ParallelForEach(Node):
+    value_name: Identifier
+    collection: Node
+    body: Node
+
+
+@dataclass(frozen=True, slots=True)
 class Call(Node):
     target: Identifier
     arguments: typing.List[Node]
+
+
+def walk(nodes: typing.Iterable[Node]) -> typing.Iterator[Node]:
+    stack = list(reversed(list(nodes)))
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(children(node)))
+
+
+def children(node: Node) -> typing.List[Node]:
+    result = []
+    for field in fields(node):
+        _collect_nodes(getattr(node, field.name), result)
+    return result
+
+
+def _collect_nodes(value, result):
+    if isinstance(value, Node):
+        result.append(value)
+    elif isinstance(value, dict):
+        for entry in value.items():
+            _collect_nodes(entry, result)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_nodes(item, result)
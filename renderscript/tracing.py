@@ -0,0 +1,323 @@
+from collections import deque
+from dataclasses import dataclass, field
+import contextvars
+import hashlib
+import inspect
+import json
+import os
+import random
+import threading
+import time
+import typing
+
+
+from .interpreter import batch_handler
+
+
+ATTRIBUTE_PREFIX = 'renderscript.call.'
+DEFAULT_RING_BUFFER_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class Span:
+    trace_id: str
+    span_id: str
+    parent_span_id: typing.Optional[str]
+    name: str
+    start_ns: int
+    end_ns: int
+    attributes: typing.Dict[str, typing.Any] = field(default_factory=dict)
+    error: typing.Optional[str] = None
+
+    @property
+    def duration_ns(self):
+        return self.end_ns - self.start_ns
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_span_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+    def to_otlp(self) -> dict:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 3,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error is not None else {'code': 1},
+        }
+        if self.parent_span_id is not None:
+            span['parentSpanId'] = self.parent_span_id
+        return span
+
+
+class _OpenSpan(typing.NamedTuple):
+    parent_span_id: typing.Optional[str]
+    span_id: str
+    name: str
+    evaluated: typing.List[typing.Any]
+    argument_count: int
+
+
+class RingBufferExporter:
+
+    def __init__(self, capacity=DEFAULT_RING_BUFFER_SIZE):
+        self._spans = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def flush(self):
+        pass
+
+    def spans(self) -> typing.List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+class JsonLinesExporter:
+
+    def __init__(self, output: typing.Union[str, os.PathLike, typing.TextIO]):
+        if isinstance(output, (str, os.PathLike)):
+            self._output = open(output, 'a', encoding='utf-8')
+            self._owned = True
+        else:
+            self._output = output
+            self._owned = False
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=repr) + '\n'
+        with self._lock:
+            self._output.write(line)
+
+    def flush(self):
+        with self._lock:
+            self._output.flush()
+
+    def close(self):
+        self.flush()
+        if self._owned:
+            self._output.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class LocalCollector:
+
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def export(self, request: dict):
+        payload = json.loads(json.dumps(request))
+        with self._lock:
+            self.requests.append(payload)
+        return {'partialSuccess': {}}
+
+    def spans(self) -> typing.List[dict]:
+        with self._lock:
+            return [
+                span
+                for request in self.requests
+                for resource_spans in request['resourceSpans']
+                for scope_spans in resource_spans['scopeSpans']
+                for span in scope_spans['spans']
+            ]
+
+
+class OtlpExporter:
+
+    def __init__(self, collector, resource_attributes=None, batch_size=512):
+        self.collector = collector
+        self.resource_attributes = dict(resource_attributes or {'service.name': 'renderscript'})
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._pending.append(span)
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._send(batch)
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch):
+        self.collector.export({
+            'resourceSpans': [{
+                'resource': {
+                    'attributes': [_otlp_attribute(key, value) for key, value in self.resource_attributes.items()],
+                },
+                'scopeSpans': [{
+                    'scope': {'name': 'renderscript'},
+                    'spans': [span.to_otlp() for span in batch],
+                }],
+            }],
+        })
+
+
+class Tracer:
+
+    def __init__(self, exporter, device_context=None, sample_rate=1.0,
+                 clock=time.time_ns, sampler=random.random, id_generator=random.getrandbits):
+        self.exporter = exporter
+        self.device_context = dict(device_context or {})
+        self.sampled = sample_rate >= 1.0 or sampler() < sample_rate
+        self.trace_id = f"{id_generator(128):032x}"
+        self._clock = clock
+        self._id_generator = id_generator
+        self._current_span = contextvars.ContextVar('current_span', default=None)
+
+    def instrument(self, target):
+        if self.sampled:
+            for name, external_fn in list(target.external_calls.items()):
+                target.register_external_call(name, self.trace_call(name, external_fn), name in target.pure_calls)
+        return target
+
+    def trace_call(self, name, external_fn):
+        if inspect.iscoroutinefunction(external_fn):
+            return self._trace_async_call(name, external_fn)
+
+        def _traced(evaluate, call_name, *arguments):
+            evaluated = []
+
+            def _evaluate(node):
+                value = evaluate(node)
+                evaluated.append(value)
+                return value
+
+            span = self._open_span(name, evaluated, arguments)
+            token = self._current_span.set(span.span_id)
+            start = self._clock()
+            try:
+                result = external_fn(_evaluate, call_name, *arguments)
+            except Exception as e:
+                self._export(span, start, None, e)
+                raise
+            finally:
+                self._current_span.reset(token)
+            if inspect.isawaitable(result):
+                return self._finish_async(span, start, result)
+            self._export(span, start, result, None)
+            return result
+
+        handler = batch_handler(external_fn)
+        if handler is not None:
+            _traced.batch = self._trace_batch(name, handler)
+        return _traced
+
+    def _trace_batch(self, name, handler):
+        def _traced_batch(call_name, arguments):
+            spans = [self._open_span(name, list(values), values) for values in arguments]
+            start = self._clock()
+            try:
+                results = list(handler(call_name, arguments))
+            except Exception as e:
+                for span in spans:
+                    self._export(span, start, None, e)
+                raise
+            for span, result in zip(spans, results):
+                self._export(span, start, result, None)
+            return results
+        return _traced_batch
+
+    def _trace_async_call(self, name, external_fn):
+        async def _traced(evaluate, call_name, *arguments):
+            evaluated = []
+
+            async def _evaluate(node):
+                value = await evaluate(node)
+                evaluated.append(value)
+                return value
+
+            span = self._open_span(name, evaluated, arguments)
+            token = self._current_span.set(span.span_id)
+            start = self._clock()
+            try:
+                result = await external_fn(_evaluate, call_name, *arguments)
+            except Exception as e:
+                self._export(span, start, None, e)
+                raise
+            finally:
+                self._current_span.reset(token)
+            self._export(span, start, result, None)
+            return result
+        return _traced
+
+    def _open_span(self, name, evaluated, arguments):
+        return _OpenSpan(self._current_span.get(), f"{self._id_generator(64):016x}", name, evaluated, len(arguments))
+
+    async def _finish_async(self, span, start, result):
+        try:
+            result = await result
+        except Exception as e:
+            self._export(span, start, None, e)
+            raise
+        self._export(span, start, result, None)
+        return result
+
+    def _export(self, span, start, result, error):
+        end = self._clock()
+        attributes = dict(self.device_context)
+        attributes[ATTRIBUTE_PREFIX + 'argument_digest'] = argument_digest(span.evaluated)
+        attributes[ATTRIBUTE_PREFIX + 'argument_count'] = span.argument_count
+        attributes[ATTRIBUTE_PREFIX + 'result_size'] = result_size(result)
+        self.exporter.export(Span(
+            self.trace_id, span.span_id, span.parent_span_id, span.name, start, end, attributes,
+            None if error is None else f"{type(error).__name__}: {error}"
+        ))
+
+    def flush(self):
+        self.exporter.flush()
+
+
+def argument_digest(values: typing.List[typing.Any]) -> str:
+    encoded = json.dumps(values, sort_keys=True, default=repr).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def result_size(result) -> int:
+    if result is None:
+        return 0
+    elif isinstance(result, (str, bytes, list, tuple, dict, set)):
+        return len(result)
+    return 1
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        encoded = {'boolValue': value}
+    elif isinstance(value, int):
+        encoded = {'intValue': str(value)}
+    elif isinstance(value, float):
+        encoded = {'doubleValue': value}
+    else:
+        encoded = {'stringValue': str(value)}
+    return {'key': key, 'value': encoded}
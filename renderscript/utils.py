@@ -1,38 +1,124 @@
 import typing
 
 
-from .parsing.source import StringSource
-from .parsing.tokeniser import Tokeniser
-from .parsing.parser import parse
-from .parsing.build import build
+from .parsing.source import Source, SourcePosition, FileSource
+from .parsing.tokeniser import Tokeniser, ScanningTokeniser
+from .parsing.direct_build import build_direct, iterate_build_direct
 from .structure import Node
 from .interpreter import Interpreter
-from .builtin_functions import register_builtins
+from .async_interpreter import AsyncInterpreter
+from .closure_compiler import ExecutionContext
+from .cache import ScriptCache
+from .builtin_functions import register_builtins, register_text_builtins, fold_literal_patterns
 
 
 def make_default_interpreter():
     interpreter = Interpreter()
     register_builtins(interpreter)
+    register_text_builtins(interpreter)
     return interpreter
 
 
-def compile_script(script_source: str) -> typing.List[Node]:
-    source = StringSource(script_source)
-    tokeniser = Tokeniser(source)
-    ast = parse(tokeniser)
-    return build(ast)
+def make_default_async_interpreter():
+    interpreter = AsyncInterpreter()
+    register_builtins(interpreter)
+    register_text_builtins(interpreter)
+    return interpreter
+
+
+def make_default_context():
+    context = ExecutionContext()
+    register_builtins(context)
+    register_text_builtins(context)
+    return context
+
+
+def compile_script(script_source: str, cache: ScriptCache = None,
+                   positions: typing.Dict[int, SourcePosition] = None) -> typing.List[Node]:
+    if cache is not None and positions is None:
+        compiled_script = cache.get(script_source)
+        if compiled_script is not None:
+            fold_literal_patterns(compiled_script)
+            return compiled_script
+
+    compiled_script = build_direct(ScanningTokeniser(script_source), positions)
+    fold_literal_patterns(compiled_script)
+
+    if cache is not None:
+        cache.put(script_source, compiled_script)
+    return compiled_script
+
+
+def stream_script(script_source: typing.Union[str, Source]) -> typing.Iterator[Node]:
+    if isinstance(script_source, Source):
+        tokeniser = Tokeniser(script_source)
+    else:
+        tokeniser = ScanningTokeniser(script_source)
+    for node in iterate_build_direct(tokeniser):
+        fold_literal_patterns([node])
+        yield node
+
+
+def execute_compiled(compiled_script: typing.Iterable[Node], interpreter: Interpreter) -> typing.Any:
+    try:
+        final_node = _discard_all_but_final(compiled_script, interpreter)
+        result = None if final_node is None else interpreter.accept(final_node)
+        _flush_batch(interpreter)
+    except BaseException:
+        _clear_batch(interpreter)
+        raise
+    return result
 
 
-def execute_compiled(compiled_script: typing.List[Node], interpreter: Interpreter) -> typing.Any:
+def iterate_compiled(compiled_script: typing.Iterable[Node], interpreter: Interpreter) -> typing.Iterator[typing.Any]:
+    try:
+        final_node = _discard_all_but_final(compiled_script, interpreter)
+        _flush_batch(interpreter)
+    except BaseException:
+        _clear_batch(interpreter)
+        raise
+    return iter(()) if final_node is None else interpreter.iterate(final_node)
+
+
+def _discard_all_but_final(compiled_script, interpreter):
+    previous_node = None
+    for node in compiled_script:
+        interpreter.prepare(node)
+        if previous_node is not None:
+            interpreter.discard(previous_node)
+        previous_node = node
+    return previous_node
+
+
+def _flush_batch(interpreter):
+    flush_batch = getattr(interpreter, 'flush_batch', None)
+    if flush_batch is not None:
+        flush_batch()
+
+
+def _clear_batch(interpreter):
+    clear_batch = getattr(interpreter, 'clear_batch', None)
+    if clear_batch is not None:
+        clear_batch()
+
+
+async def execute_compiled_async(compiled_script: typing.List[Node], interpreter: AsyncInterpreter) -> typing.Any:
     result = None
     for node in compiled_script:
-        result = interpreter.accept(node)
+        result = await interpreter.accept(node)
     return result
 
 
-def execute_script(script_source: str, interpreter: Interpreter = None) -> typing.Any:
+def execute_script(script_source: str, interpreter: Interpreter = None, cache: ScriptCache = None) -> typing.Any:
     interpreter = interpreter or make_default_interpreter()
 
-    compiled_script = compile_script(script_source)
+    compiled_script = compile_script(script_source, cache)
 
     return execute_compiled(compiled_script, interpreter)
+
+
+def execute_file(path, interpreter: Interpreter = None) -> typing.Any:
+    interpreter = interpreter or make_default_interpreter()
+
+    with FileSource.open(path) as source:
+        return execute_compiled(stream_script(source), interpreter)
@@ -1,4 +1,5 @@
 import inspect
+import types
 
 
 class Visitor:
@@ -8,10 +9,22 @@ class Visitor:
         self._throw_on_unknown = throw_on_unknown
 
     def auto_detect_accept_methods(self):
-        for _, method in inspect.getmembers(self, inspect.ismethod):
-            parameter = self._get_single_annotated_parameter(method)
-            if parameter:
-                self.register_accept_method(method)
+        for visitable_type, function in type(self).accept_functions().items():
+            self._accept_method_lookup[visitable_type] = types.MethodType(function, self)
+
+    @classmethod
+    def accept_functions(cls):
+        functions = cls.__dict__.get('_accept_functions')
+        if functions is None:
+            functions = {}
+            for name, function in inspect.getmembers(cls, inspect.isfunction):
+                if isinstance(inspect.getattr_static(cls, name), (staticmethod, classmethod)):
+                    continue
+                parameter = cls._get_single_annotated_parameter(function)
+                if parameter:
+                    functions[parameter.annotation] = function
+            cls._accept_functions = functions
+        return functions
 
     def register_accept_method(self, method):
         parameter = self._get_single_annotated_parameter(method)
@@ -23,7 +36,7 @@ class Visitor:
     def accept(self, visitable):
         visitable_type = type(visitable)
         method = self._accept_method_lookup.get(visitable_type)
-        if method:
+        if method is not None:
             return method(visitable)
         elif not self._throw_on_unknown:
             return self.accept_other(visitable)
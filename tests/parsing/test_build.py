@@ -68,6 +68,16 @@ class TestBuildInterpreter(unittest.TestCase):
                     ]),
                 )
             ),
+            (
+                '(for-each-parallel cmd cmd_list (exec-cmd cmd))',
+                structure.ParallelForEach(
+                    structure.Identifier("cmd"),
+                    structure.Identifier("cmd_list"),
+                    structure.Call(structure.Identifier("exec-cmd"), [
+                        structure.Identifier("cmd"),
+                    ]),
+                )
+            ),
             (
                 '(list 1 2 3 "hello" test false)',
                 structure.List([
@@ -0,0 +1,55 @@
+import unittest
+
+
+from renderscript.parsing.tokeniser import ScanningTokeniser
+from renderscript.parsing.parser import parse
+from renderscript.parsing.build import build
+from renderscript.parsing.direct_build import build_direct, iterate_build_direct
+
+
+SCRIPTS = [
+    '',
+    '(print "hello")',
+    '(let x 10) (let y 2.5) (list x y true false "a\\nb")',
+    '(if (equals 1 2) (do (print "a") 1) (make-map "k" (list 1 2)))',
+    '(for-each line (splitlines (exec-cmd "sh run")) (for-each-parallel x (list line) x))',
+    '()',
+    '(10 20)',
+    '(let x)',
+    '(let (x) 10)',
+    '(let () 10)',
+    '(if true 1)',
+    '(if () 1 2)',
+    '(for-each 10 (list) x)',
+    '(for-each x (list))',
+    '(for-each-parallel x (list))',
+    '(make-map "a")',
+    '(print (let x) (if 1))',
+    '(print ()) (let x)',
+    '(let x) (print',
+    '(print "unterminated"',
+    '10',
+    ')',
+]
+
+
+class TestDirectBuild(unittest.TestCase):
+
+    def test_matches_two_stage_build(self):
+        for script in SCRIPTS:
+            with self.subTest(script):
+                self.assertEqual(self._result_or_error(lambda: build(parse(ScanningTokeniser(script)))),
+                                 self._result_or_error(lambda: build_direct(ScanningTokeniser(script))))
+
+    def test_iterate_yields_each_form_before_reading_the_next(self):
+        nodes = iterate_build_direct(ScanningTokeniser('(print 1) (let x)'))
+        self.assertEqual(build(parse(ScanningTokeniser('(print 1)'))), [next(nodes)])
+        with self.assertRaisesRegex(Exception, 'expected two values passed to let at 1:11'):
+            next(nodes)
+
+    @staticmethod
+    def _result_or_error(fn):
+        try:
+            return fn()
+        except Exception as exception:
+            return str(exception)
@@ -1,8 +1,24 @@
+import io
+import os
+import tempfile
 import unittest
 
 import renderscript.parsing
 
 
+class TestSourcePosition(unittest.TestCase):
+
+    def test_packed_position(self):
+        position = renderscript.parsing.source.SourcePosition(70000, 12)
+        self.assertEqual((70000, 12), (position.line, position.column))
+        self.assertEqual(position, renderscript.parsing.source.SourcePosition.unpack(position.packed))
+        self.assertEqual(hash(position), hash(renderscript.parsing.source.SourcePosition(70000, 12)))
+        self.assertNotEqual(position, renderscript.parsing.source.SourcePosition(70000, 13))
+        self.assertEqual('70000:12', str(position))
+        with self.assertRaises(AttributeError):
+            position.line = 1
+
+
 class TestStringSource(unittest.TestCase):
 
     def test_peek(self):
@@ -101,4 +117,29 @@ class TestStringSource(unittest.TestCase):
 
     @staticmethod
     def _source(text):
-        return renderscript.parsing.source.StringSource(text)
\ No newline at end of file
+        return renderscript.parsing.source.StringSource(text)
+
+
+class TestFileSource(TestStringSource):
+
+    def test_decodes_characters_split_across_chunks(self):
+        source = renderscript.parsing.source.FileSource(io.BytesIO('añb€c'.encode('utf-8')), chunk_size=1)
+        self.assertEqual(['a', 'ñ', 'b', '€', 'c', None], [source.get() for _ in range(6)])
+        self.assertEqual(renderscript.parsing.source.SourcePosition(1, 6), source.tell())
+
+    def test_open(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'script.rs')
+            for text in ('', '(print "hé")\n'):
+                with open(path, 'wb') as file:
+                    file.write(text.encode('utf-8'))
+                for use_mmap in (True, False):
+                    with renderscript.parsing.source.FileSource.open(path, chunk_size=3, use_mmap=use_mmap) as source:
+                        consumed = ''
+                        while not source.is_eof():
+                            consumed += source.get()
+                        self.assertEqual(text, consumed)
+
+    @staticmethod
+    def _source(text):
+        return renderscript.parsing.source.FileSource(io.BytesIO(text.encode('utf-8')), chunk_size=2)
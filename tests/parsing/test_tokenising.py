@@ -69,11 +69,52 @@ class TestTokeniser(unittest.TestCase):
                     tokens.append(tokeniser.get())
                 self.assertListEqual(expected_tokens, tokens)
 
+    def test_identifiers_are_interned(self):
+        tokeniser = self._tokeniser('(interface interface)')
+        tokeniser.get()
+        first, second = tokeniser.get(), tokeniser.get()
+        self.assertIs(first.value, second.value)
+
+    def test_string_literals_are_not_interned(self):
+        tokeniser = self._tokeniser('("interface 1" "interface 1")')
+        tokeniser.get()
+        first, second = tokeniser.get(), tokeniser.get()
+        self.assertEqual(first.value, second.value)
+        self.assertIsNot(first.value, second.value)
+
     @staticmethod
     def _tokeniser(text):
         return renderscript.parsing.tokeniser.Tokeniser(renderscript.parsing.source.StringSource(text))
 
 
+class TestScanningTokeniser(TestTokeniser):
+
+    def test_matches_character_tokeniser(self):
+        source = '\n  (let x\n    (split "a\\tb" "c\\\\d"))\n\n(if (equals 1.5 x) true false) "unterminated'
+        character_tokeniser = TestTokeniser._tokeniser(source)
+        scanning_tokeniser = self._tokeniser(source)
+        self.assertEqual(character_tokeniser.tell(), scanning_tokeniser.tell())
+        while not character_tokeniser.is_eof():
+            self.assertFalse(scanning_tokeniser.is_eof())
+            self.assertEqual(character_tokeniser.tell(), scanning_tokeniser.tell())
+            self.assertEqual(character_tokeniser.get(), scanning_tokeniser.get())
+            self.assertEqual(character_tokeniser.tell(), scanning_tokeniser.tell())
+        self.assertTrue(scanning_tokeniser.is_eof())
+        self.assertEqual(character_tokeniser.tell(), scanning_tokeniser.tell())
+
+    def test_unexpected_character(self):
+        tokeniser = self._tokeniser('(a\n \xa0)')
+        tokeniser.get()
+        tokeniser.get()
+        with self.assertRaises(Exception) as cm:
+            tokeniser.get()
+        self.assertEqual(("unexpected character '\\xa0' at 2:2",), cm.exception.args)
+
+    @staticmethod
+    def _tokeniser(text):
+        return renderscript.parsing.tokeniser.ScanningTokeniser(text)
+
+
 class TestFixedTokeniser(unittest.TestCase):
 
     def test_peek(self):
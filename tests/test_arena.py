@@ -0,0 +1,112 @@
+import unittest
+
+from renderscript.arena import Arena, ArenaNode, NodeKinds
+from renderscript.arena_interpreter import ArenaInterpreter
+from renderscript.sexp_renderer import SexpVisitor, ArenaSexpVisitor
+from renderscript.builtin_functions import register_builtins
+from renderscript.utils import compile_script, execute_compiled, make_default_interpreter
+from renderscript import structure
+from tests.test_interpreter import INTERPRETER_TEST_CASES
+
+
+SCRIPTS = [
+    """
+    (let x 1)
+    (let ys (for-each y (list 1 2 3) (do (let x (append (list x) (list y))) x)))
+    (list x ys)
+    """,
+    """
+    (let lines (split "\\n" "a b\\nc\\nd e" multiline))
+    (let fixes (for-each line lines (if (equals (length (split " " line)) 2) (append "no " line) line)))
+    (make-map "fixes" fixes "count" (length fixes) "ratio" 2.5 "ok" true "é" false)
+    """,
+    """
+    (for-each-parallel a (list 1 2) (for-each b (list 3 4) (list a b)))
+    """,
+]
+
+
+class ArenaTests(unittest.TestCase):
+
+    def test_round_trips_structure(self):
+        for script in SCRIPTS:
+            with self.subTest(script):
+                compiled_script = compile_script(script)
+                self.assertEqual(compiled_script, Arena.from_structure(compiled_script).to_structure())
+
+    def test_round_trips_buffer(self):
+        for script in SCRIPTS:
+            with self.subTest(script):
+                compiled_script = compile_script(script)
+                buffer = bytearray(Arena.from_structure(compiled_script).to_bytes())
+                arena = Arena.from_buffer(buffer)
+                self.assertEqual(compiled_script, arena.to_structure())
+                self.assertEqual(buffer, arena.to_bytes())
+
+    def test_buffer_is_not_copied(self):
+        buffer = bytearray(Arena.from_structure(compile_script('(list 1 2)')).to_bytes())
+        arena = Arena.from_buffer(buffer)
+        self.assertIsInstance(arena.kinds, memoryview)
+        self.assertEqual(arena.kinds.obj, memoryview(buffer).obj)
+
+    def test_rejects_other_buffers(self):
+        with self.assertRaises(Exception) as cm:
+            Arena.from_buffer(bytes(64))
+        self.assertEqual(("buffer does not contain a serialised arena",), cm.exception.args)
+
+    def test_constants_are_pooled(self):
+        arena = Arena.from_structure(compile_script('(list "a" "a" 1 1 1.0 true true)'))
+        self.assertEqual(4, len(arena.constant_kinds))
+
+    def test_sexp_matches_structure_renderer(self):
+        for script in SCRIPTS:
+            with self.subTest(script):
+                compiled_script = compile_script(script)
+                arena = Arena.from_structure(compiled_script)
+                self.assertEqual(
+                    [SexpVisitor().accept(node) for node in arena.to_structure()],
+                    [ArenaSexpVisitor(arena).accept(root) for root in arena.roots],
+                )
+
+
+class ArenaInterpreterTests(unittest.TestCase):
+
+    def test_matches_interpreter(self):
+        for input_structure, expected_output in INTERPRETER_TEST_CASES:
+            with self.subTest(str(input_structure)):
+                arena = Arena.from_structure([input_structure])
+                result = ArenaInterpreter(arena).accept(arena.roots[0])
+                self.assertEqual(expected_output, result)
+
+    def test_scripts_match_interpreter(self):
+        for script in SCRIPTS:
+            with self.subTest(script):
+                compiled_script = compile_script(script)
+                arena = Arena.from_buffer(Arena.from_structure(compiled_script).to_bytes())
+                interpreter = ArenaInterpreter(arena)
+                register_builtins(interpreter)
+                self.assertEqual(
+                    execute_compiled(compiled_script, make_default_interpreter()),
+                    execute_compiled(arena.roots, interpreter),
+                )
+
+    def test_call_arguments(self):
+        arena = Arena.from_structure(compile_script('(log (list 1) flag)'))
+        interpreter = ArenaInterpreter(arena)
+        received = []
+
+        def _log(evaluate, _name, *args):
+            received.extend(args)
+            return evaluate(args[0])
+        interpreter.register_external_call('log', _log)
+
+        self.assertEqual([1], interpreter.accept(arena.roots[0]))
+        self.assertIsInstance(received[0], ArenaNode)
+        self.assertEqual(NodeKinds.LIST, received[0].kind)
+        self.assertEqual(structure.Identifier('flag'), received[1])
+
+    def test_unknown_variable(self):
+        arena = Arena.from_structure(compile_script('(let x 1) (list x)')[1:])
+        with self.assertRaises(Exception) as cm:
+            ArenaInterpreter(arena).accept(arena.roots[0])
+        self.assertEqual(("unknown variable 'x'",), cm.exception.args)
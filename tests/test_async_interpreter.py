@@ -0,0 +1,181 @@
+from unittest.mock import MagicMock
+import asyncio
+import contextlib
+import io
+import threading
+import unittest
+
+from renderscript.async_interpreter import AsyncInterpreter, synchronous_executor
+from renderscript.middleware import DebugMiddleware
+from renderscript.utils import compile_script, execute_compiled_async, make_default_async_interpreter
+from renderscript import structure
+from tests.test_interpreter import INTERPRETER_TEST_CASES
+
+
+SCRIPT = """
+(let snmp_cmds (splitlines (exec-cmd "sh | include snmpv[12]")))
+(if (equals (length snmp_cmds) 0)
+    "no issue"
+    (do
+        (let fixes (for-each cmd snmp_cmds (append "no " cmd)))
+        (for-each cmd fixes (exec-cmd cmd))))
+"""
+
+
+class AsyncInterpreterTests(unittest.TestCase):
+
+    def test_interpreter(self):
+        for input_structure, expected_output in INTERPRETER_TEST_CASES:
+            with self.subTest(str(input_structure)):
+                visitor = AsyncInterpreter()
+                result = asyncio.run(visitor.accept(input_structure))
+                self.assertEqual(expected_output, result, "interpreted result should match expected output")
+
+    def test_synchronous_call_behaviour(self):
+        mock_log_function = MagicMock()
+        visitor = AsyncInterpreter()
+        visitor.register_external_call('log', mock_log_function)
+        asyncio.run(visitor.accept(
+            structure.Call(structure.Identifier('log'), [structure.Number(10)])
+        ))
+        mock_log_function.assert_called_once()
+        self.assertEqual(('log', structure.Number(10)), mock_log_function.call_args[0][1:])
+
+    def test_builtins_with_awaited_arguments(self):
+        responses = {
+            "sh | include snmpv[12]": "snmpv1 a\nsnmpv2 b",
+        }
+        executed = []
+
+        async def _exec_cmd(evaluate, _name, cmd):
+            command = await evaluate(cmd)
+            executed.append(command)
+            await asyncio.sleep(0)
+            return responses.get(command, "ok")
+
+        interpreter = make_default_async_interpreter()
+        interpreter.register_external_call('exec-cmd', _exec_cmd)
+        result = asyncio.run(execute_compiled_async(compile_script(SCRIPT), interpreter))
+
+        self.assertEqual(["ok", "ok"], result)
+        self.assertEqual(["sh | include snmpv[12]", "no snmpv1 a", "no snmpv2 b"], executed)
+
+    def test_synchronous_calls_run_once_with_suspending_arguments(self):
+        runs = []
+
+        async def _exec_cmd(evaluate, _name, cmd):
+            command = await evaluate(cmd)
+            await asyncio.sleep(0)
+            return f"output of {command}"
+
+        def _log(evaluate, _name, *arguments):
+            runs.append(len(arguments))
+            return " | ".join(evaluate(argument) for argument in arguments)
+
+        interpreter = make_default_async_interpreter()
+        interpreter.register_external_call('exec-cmd', _exec_cmd)
+        interpreter.register_external_call('log', _log)
+        result = asyncio.run(execute_compiled_async(compile_script(
+            '(log (exec-cmd "a") (append "x" (exec-cmd "b")) (log (exec-cmd "c") "d"))'
+        ), interpreter))
+
+        self.assertEqual("output of a | xoutput of b | output of c | d", result)
+        self.assertEqual([3, 2], runs)
+
+    def test_synchronous_calls_share_a_bounded_executor(self):
+        threads = set()
+
+        async def _exec_cmd(evaluate, _name, cmd):
+            command = await evaluate(cmd)
+            await asyncio.sleep(0)
+            return command
+
+        def _log(evaluate, _name, message):
+            threads.add(threading.current_thread().name)
+            return evaluate(message)
+
+        compiled_script = compile_script('(log (log (exec-cmd "a")))')
+
+        def _device():
+            interpreter = make_default_async_interpreter()
+            interpreter.register_external_call('exec-cmd', _exec_cmd)
+            interpreter.register_external_call('log', _log)
+            return execute_compiled_async(compiled_script, interpreter)
+
+        async def _run_all():
+            return await asyncio.gather(*[_device() for _ in range(100)])
+
+        self.assertEqual(["a"] * 100, asyncio.run(_run_all()))
+        self.assertLessEqual(len(threads), synchronous_executor()._max_workers + 1)
+
+    def test_cancelling_a_synchronous_call_releases_its_worker(self):
+        outcome = []
+        finished = threading.Event()
+
+        async def _exec_cmd(_evaluate, _name, _cmd):
+            await asyncio.Event().wait()
+
+        def _log(evaluate, _name, message):
+            try:
+                evaluate(message)
+            except BaseException as e:
+                outcome.append(type(e).__name__)
+                raise
+            finally:
+                finished.set()
+
+        interpreter = make_default_async_interpreter()
+        interpreter.register_external_call('exec-cmd', _exec_cmd)
+        interpreter.register_external_call('log', _log)
+
+        async def _cancel():
+            task = asyncio.ensure_future(execute_compiled_async(compile_script('(log (exec-cmd "a"))'), interpreter))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(_cancel())
+        self.assertTrue(finished.wait(5))
+        self.assertEqual(["CancelledError"], outcome)
+
+    def test_suspension_is_computed_once_per_call(self):
+        interpreter = make_default_async_interpreter()
+        call = structure.Call(structure.Identifier('length'), [structure.List([structure.Number(1)])])
+        self.assertEqual((False,), interpreter._suspending_arguments(call))
+        self.assertIn(id(call), interpreter._suspending_calls)
+        del call
+        self.assertEqual({}, interpreter._suspending_calls)
+
+    def test_scripts_interleave_on_one_loop(self):
+        compiled_script = compile_script('(let a (exec-cmd "first")) (list a (exec-cmd "second"))')
+        events = []
+
+        def _device(name):
+            async def _exec_cmd(evaluate, _name, cmd):
+                command = await evaluate(cmd)
+                events.append((name, command))
+                await asyncio.sleep(0)
+                return f"{name}:{command}"
+            interpreter = make_default_async_interpreter()
+            interpreter.register_external_call('exec-cmd', _exec_cmd)
+            return execute_compiled_async(compiled_script, interpreter)
+
+        async def _run_all():
+            return await asyncio.gather(_device("r1"), _device("r2"))
+
+        results = asyncio.run(_run_all())
+
+        self.assertEqual([["r1:first", "r1:second"], ["r2:first", "r2:second"]], results)
+        self.assertEqual([("r1", "first"), ("r2", "first"), ("r1", "second"), ("r2", "second")], events)
+
+    def test_debug_middleware(self):
+        interpreter = AsyncInterpreter(middleware=DebugMiddleware())
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = asyncio.run(interpreter.accept(structure.List([structure.Number(1)])))
+        self.assertEqual([1], result)
+        self.assertEqual(
+            "interpreting: (list 1)\n|   interpreting: 1\n|   +-- 1\n+-- [1]\n",
+            output.getvalue()
+        )
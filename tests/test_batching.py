@@ -0,0 +1,149 @@
+import unittest
+
+from renderscript.interpreter import Interpreter, SlotInterpreter
+from renderscript.builtin_functions import register_builtins
+from renderscript.call_cache import CallCache
+from renderscript.tracing import Tracer, RingBufferExporter, argument_digest
+from renderscript.utils import compile_script, execute_compiled, make_default_interpreter
+
+
+class BatchingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+
+    def _exec_cmd(self, evaluate, _name, command):
+        command = evaluate(command)
+        self.events.append(('single', command))
+        return f"ran {command}"
+
+    def _exec_cmd_batch(self, _name, arguments):
+        self.events.append(('batch', [command for command, in arguments]))
+        return [f"ran {command}" for command, in arguments]
+
+    def _log(self, evaluate, _name, message):
+        self.events.append(('log', evaluate(message)))
+
+    def _run(self, script, interpreter=None, batching=True):
+        interpreter = interpreter or make_default_interpreter()
+        interpreter.register_external_call('exec-cmd', self._exec_cmd)
+        interpreter.register_external_call('log', self._log)
+        if batching:
+            interpreter.register_batch_handler('exec-cmd', self._exec_cmd_batch)
+        return execute_compiled(compile_script(script), interpreter)
+
+    def test_foreach_body_is_batched(self):
+        result = self._run('(let fixes (list "a" "b" "c"))\n(for-each cmd fixes (exec-cmd (append "set " cmd)))')
+        self.assertEqual(["ran set a", "ran set b", "ran set c"], result)
+        self.assertEqual([('batch', ["set a", "set b", "set c"])], self.events)
+
+    def test_non_final_do_children_are_batched(self):
+        result = self._run('(do (exec-cmd "a") (exec-cmd "b") (exec-cmd "c"))')
+        self.assertEqual("ran c", result)
+        self.assertEqual([('batch', ["a", "b", "c"])], self.events)
+
+    def test_other_calls_flush_in_order(self):
+        result = self._run('(exec-cmd "a")\n(log "between")\n(exec-cmd "b")\n(let done true)')
+        self.assertIsNone(result)
+        self.assertEqual([('batch', ["a"]), ('log', "between"), ('batch', ["b"])], self.events)
+
+    def test_foreach_do_bodies(self):
+        script = '(let fixes (list "a" "b"))\n(for-each cmd fixes (do (exec-cmd cmd) (exec-cmd "write")))'
+        result = self._run(script)
+        self.assertEqual([('batch', ["a", "write", "b", "write"])], self.events)
+        self.events.clear()
+        self.assertEqual(self._run(script, batching=False), result)
+        self.assertEqual(["ran write", "ran write"], result)
+
+    def test_nested_foreach(self):
+        script = '(for-each x (list "a" "b") (for-each y (list "1" "2") (exec-cmd (append x y))))'
+        result = self._run(script)
+        self.assertEqual([["ran a1", "ran a2"], ["ran b1", "ran b2"]], result)
+        self.assertEqual([('batch', ["a1", "a2"]), ('batch', ["b1", "b2"])], self.events)
+
+    def test_discarded_foreach(self):
+        self._run('(for-each x (list "a" "b") (exec-cmd x))\n(exec-cmd "c")')
+        self.assertEqual([('batch', ["a", "b", "c"])], self.events)
+
+    def test_results_needed_immediately_are_not_deferred(self):
+        result = self._run('(if (equals (exec-cmd "a") "ran a") (exec-cmd "b") false)')
+        self.assertEqual("ran b", result)
+        self.assertEqual([('single', "a"), ('single', "b")], self.events)
+
+    def test_slot_interpreter(self):
+        interpreter = SlotInterpreter()
+        register_builtins(interpreter)
+        result = self._run('(let prefix "set ")\n(for-each x (list "a" "b") (exec-cmd (append prefix x)))', interpreter)
+        self.assertEqual(["ran set a", "ran set b"], result)
+        self.assertEqual([('batch', ["set a", "set b"])], self.events)
+
+    def test_handler_must_return_a_result_per_call(self):
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('exec-cmd', self._exec_cmd)
+        interpreter.register_batch_handler('exec-cmd', lambda _name, arguments: [])
+        with self.assertRaises(Exception) as cm:
+            execute_compiled(compile_script('(for-each x (list "a" "b") (exec-cmd x))'), interpreter)
+        self.assertEqual(("batch handler for 'exec-cmd' returned 0 results for 2 calls",), cm.exception.args)
+
+    def test_batches_respect_the_maximum_size(self):
+        interpreter = Interpreter(max_batch_size=2)
+        register_builtins(interpreter)
+        result = self._run('(for-each x (list "a" "b" "c" "d" "e") (exec-cmd x))', interpreter)
+        self.assertEqual(["ran a", "ran b", "ran c", "ran d", "ran e"], result)
+        self.assertEqual([('batch', ["a", "b"]), ('batch', ["c", "d"]), ('batch', ["e"])], self.events)
+
+    def test_batches_are_traced(self):
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('exec-cmd', self._exec_cmd)
+        interpreter.register_batch_handler('exec-cmd', self._exec_cmd_batch)
+        exporter = RingBufferExporter()
+        Tracer(exporter).instrument(interpreter)
+        execute_compiled(compile_script('(for-each x (list "a" "b") (exec-cmd x))'), interpreter)
+
+        self.assertEqual([('batch', ["a", "b"])], self.events)
+        spans = [span for span in exporter.spans() if span.name == 'exec-cmd']
+        self.assertEqual(
+            [argument_digest(["a"]), argument_digest(["b"])],
+            [span.attributes['renderscript.call.argument_digest'] for span in spans]
+        )
+
+    def test_batches_use_the_call_cache(self):
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('exec-cmd', self._exec_cmd)
+        interpreter.register_batch_handler('exec-cmd', self._exec_cmd_batch)
+        cache = CallCache()
+        cache.install(interpreter, idempotent_calls=['exec-cmd'])
+        script = compile_script('(for-each x (list "a" "b" "a") (exec-cmd x))')
+        execute_compiled(script, interpreter)
+        result = execute_compiled(script, interpreter)
+
+        self.assertEqual(["ran a", "ran b", "ran a"], result)
+        self.assertEqual([('batch', ["a", "b", "a"])], self.events)
+        self.assertEqual(3, cache.hits)
+
+    def test_failed_scripts_drop_their_pending_batch(self):
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('exec-cmd', self._exec_cmd)
+        interpreter.register_batch_handler('exec-cmd', self._exec_cmd_batch)
+        for script in ['(do (exec-cmd "rm-everything") (length missing))',
+                       '(for-each x (list "a" "b") (do (exec-cmd x) (length missing)))']:
+            with self.subTest(script):
+                with self.assertRaises(Exception):
+                    execute_compiled(compile_script(script), interpreter)
+                self.assertEqual("ran next", execute_compiled(compile_script('(exec-cmd "next")'), interpreter))
+                self.assertEqual([('single', "next")], self.events)
+                self.events.clear()
+
+    def test_wrapped_calls_stay_batchable(self):
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('exec-cmd', self._exec_cmd)
+        interpreter.register_batch_handler('exec-cmd', self._exec_cmd_batch)
+        Tracer(RingBufferExporter()).instrument(interpreter)
+        self.assertEqual({'exec-cmd'}, interpreter.batch_calls)
+        interpreter.register_external_call('exec-cmd', self._exec_cmd)
+        self.assertEqual(set(), interpreter.batch_calls)
+
+    def test_unknown_function(self):
+        with self.assertRaises(Exception) as cm:
+            make_default_interpreter().register_batch_handler('exec-cmd', self._exec_cmd_batch)
+        self.assertEqual(("unknown function 'exec-cmd'",), cm.exception.args)
@@ -1,9 +1,12 @@
+import re
 import unittest
 
 
 from renderscript.interpreter import Interpreter
 from renderscript import structure as s
+from renderscript.utils import compile_script, execute_script, make_default_interpreter
 import renderscript.builtin_functions as builtins
+from renderscript.regex_cache import RegexCache
 
 
 class TestBuiltinFunctions(unittest.TestCase):
@@ -17,8 +20,33 @@ class TestBuiltinFunctions(unittest.TestCase):
             (builtins.equals, (s.Bool(False), s.Bool(True)), False),
             (builtins.equals, (s.Bool(True), s.Bool(True), s.Bool(True)), True),
             (builtins.equals, (s.Number(10), s.Bool(True)), False),
+            (builtins.less_than, (s.Number(1), s.Number(2), s.Number(3)), True),
+            (builtins.less_than, (s.Number(1), s.Number(3), s.Number(2)), False),
+            (builtins.less_than_or_equals, (s.Number(1), s.Number(1)), True),
+            (builtins.greater_than, (s.Number(1), s.Number(1)), False),
+            (builtins.greater_than_or_equals, (s.String("b"), s.String("a")), True),
+            (builtins.and_, (), True),
+            (builtins.and_, (s.Bool(True), s.Number(2)), 2),
+            (builtins.and_, (s.Bool(True), s.Number(0), s.Number(2)), 0),
+            (builtins.or_, (), False),
+            (builtins.or_, (s.Bool(False), s.String("a")), "a"),
+            (builtins.not_, (s.List([]),), True),
+            (builtins.equals_each, (s.List([s.Number(1), s.Number(2)]), s.List([s.Number(1), s.Number(3)])), [True, False]),
+            (builtins.filter_, (s.List([s.Number(1), s.Number(2)]), s.List([s.Bool(False), s.Bool(True)])), [2]),
+            (builtins.filter_matching, (s.String("^no "), s.List([s.String("no a"), s.String("b")])), ["no a"]),
+            (builtins.count_matching, (s.String("A"), s.List([s.String("a"), s.String("b")]), s.Identifier("ignorecase")), 1),
             (builtins.split, (s.String("\n"), s.String("hello\nthere")), ["hello", "there"]),
+            (builtins.split, (s.String("x"), s.String("aXbxc"), s.Identifier("ignorecase")), ["a", "b", "c"]),
+            (builtins.split, (s.String("a.b"), s.String("1a\nb2"), s.Identifier("dotall")), ["1", "2"]),
+            (builtins.split, (s.String(" x # comment"), s.String("1x2"), s.Identifier("verbose")), ["1", "2"]),
             (builtins.append, (s.String("hello "), s.String("world!")), "hello world!"),
+            (builtins.append, (s.String("a"), s.String("b"), s.String("c")), "abc"),
+            (builtins.append, (s.List([s.Number(1)]), s.List([s.Number(2)]), s.String("ab")), [1, 2, "a", "b"]),
+            (builtins.append, (s.Number(1), s.Number(2)), 3),
+            (builtins.join, (s.String("\n"), s.List([s.String("a"), s.String("b")])), "a\nb"),
+            (builtins.join, (s.String(","), s.List([])), ""),
+            (builtins.concat, (s.List([s.Number(1)]), s.List([]), s.List([s.Number(2), s.Number(3)])), [1, 2, 3]),
+            (builtins.concat, (), []),
         ]
 
         for fn, args, expected_result in test_cases:
@@ -26,3 +54,149 @@ class TestBuiltinFunctions(unittest.TestCase):
                 interpreter = Interpreter()
                 result = fn(interpreter.accept, fn.__name__, *args)
                 self.assertEqual(expected_result, result, "function result should match expected result")
+
+
+    def test_short_circuits(self):
+        for script in [
+            '(equals 1 2 (fail))',
+            '(less-than 2 1 (fail))',
+            '(and false (fail))',
+            '(or true (fail))',
+        ]:
+            with self.subTest(script):
+                interpreter = make_default_interpreter()
+                interpreter.register_external_call('fail', lambda *_: self.fail("should not be evaluated"))
+                execute_script(script, interpreter)
+
+    def test_vectorised_length_mismatch(self):
+        with self.assertRaises(Exception) as cm:
+            execute_script('(equals-each (list 1) (list))')
+        self.assertEqual(("equals-each expects lists of the same length, got 1 and 0",), cm.exception.args)
+
+
+    def test_append_does_not_alias_list_arguments(self):
+        interpreter = make_default_interpreter()
+        result = execute_script("""
+        (let xs (list 1 2))
+        (let ys (append xs (list 3)))
+        (list xs ys)
+        """, interpreter)
+        self.assertEqual([[1, 2], [1, 2, 3]], result)
+
+
+class TestRegexCache(unittest.TestCase):
+
+    def test_lru(self):
+        cache = RegexCache(max_size=2)
+        first = cache.compile("a")
+        self.assertIs(first, cache.compile("a"))
+        cache.compile("b")
+        cache.compile("a")
+        cache.compile("c")
+        self.assertIs(first, cache.compile("a"))
+        cache.compile("b")
+        self.assertEqual((3, 4), (cache.hits, cache.misses))
+        self.assertEqual(2, len(cache))
+
+    def test_flags_are_part_of_the_key(self):
+        cache = RegexCache()
+        self.assertIsNot(cache.compile("a"), cache.compile("a", builtins.REGEX_FLAGS["ignorecase"]))
+
+    def test_pinned_patterns_are_never_evicted(self):
+        cache = RegexCache(max_size=1)
+        owner = s.String("a")
+        pinned = cache.pin(owner, "a")
+        cache.compile("b")
+        cache.compile("c")
+        self.assertIs(pinned, cache.compile("a"))
+
+    def test_pins_are_released_with_their_owner(self):
+        cache = RegexCache(max_size=1)
+        owners = [s.String("a"), s.String("a")]
+        cache.pin(owners[0], "a")
+        cache.pin(owners[1], "a")
+        owners.pop()
+        self.assertEqual(1, len(cache))
+        owners.pop()
+        self.assertEqual(0, len(cache))
+
+    def test_fold_literal_patterns(self):
+        cache = RegexCache()
+        compiled_script = compile_script("""
+        (let pattern " ")
+        (for-each line (list "a") (list (split "," line ignorecase) (split pattern line) (split "(" line)))
+        """)
+        builtins.fold_literal_patterns(compiled_script, cache)
+        self.assertEqual(1, len(cache))
+        cache.compile(",", builtins.REGEX_FLAGS["ignorecase"])
+        self.assertEqual((1, 0), (cache.hits, cache.misses))
+
+        del compiled_script
+        self.assertEqual(0, len(cache))
+
+    def test_fold_literal_patterns_only_skips_invalid_patterns(self):
+        cache = RegexCache()
+        compiled_script = compile_script('(list (split "," "a" kittens) (split "(" "a") (split "," "a" "ignorecase"))')
+        builtins.fold_literal_patterns(compiled_script, cache)
+        self.assertEqual(0, len(cache))
+
+        class _BrokenCache:
+            def pin(self, owner, pattern, flags=0):
+                raise RuntimeError("broken")
+
+        with self.assertRaises(RuntimeError):
+            builtins.fold_literal_patterns(compile_script('(split "," "a")'), _BrokenCache())
+
+    def test_compiled_scripts_do_not_leak_pins(self):
+        cache = RegexCache()
+        for index in range(100):
+            builtins.fold_literal_patterns(compile_script(f'(split "{index}" "a")'), cache)
+        self.assertEqual(0, len(cache))
+
+    def test_unknown_flag(self):
+        with self.assertRaises(Exception) as cm:
+            builtins.split(Interpreter().accept, 'split', s.String(" "), s.String(""), s.Identifier("kittens"))
+        self.assertEqual(("kittens is not a known regex flag",), cm.exception.args)
+
+
+RUNNING_CONFIG = """hostname edge-1
+interface GigabitEthernet0/1
+ description uplink
+ shutdown
+interface GigabitEthernet0/2
+ no shutdown
+snmp-server community public RO
+"""
+
+
+class TestTextBuiltins(unittest.TestCase):
+
+    def test_functions(self):
+        test_cases = [
+            ('(grep "^interface" config)', ["interface GigabitEthernet0/1", "interface GigabitEthernet0/2"]),
+            ('(grep "SHUTDOWN$" config ignorecase)', [" shutdown", " no shutdown"]),
+            ('(grep "kittens" config)', []),
+            ('(match "^hostname edge" config)', True),
+            ('(match "^description" config)', False),
+            ('(extract-groups "^interface (\\\\S+)" config)', [["GigabitEthernet0/1"], ["GigabitEthernet0/2"]]),
+            ('(extract-groups "(\\\\w+)-(\\\\d+)$" config)', [["edge", "1"]]),
+            ('(extract-groups "Gigabit" config)', [["Gigabit"], ["Gigabit"]]),
+            ('(replace "^ no shutdown$" " shutdown" config)', RUNNING_CONFIG.replace(" no shutdown", " shutdown")),
+            ('(count "shutdown" config)', 2),
+            ('(count "^interface" config)', 2),
+        ]
+        for script, expected_result in test_cases:
+            with self.subTest(script):
+                interpreter = make_default_interpreter()
+                interpreter.register_external_call('config', lambda *_: RUNNING_CONFIG)
+                self.assertEqual(expected_result, execute_script(script.replace("config", "(config)"), interpreter))
+
+    def test_grep_matches_per_line_search(self):
+        texts = ["", "\n", "a\n", "a\n\nb", "ab\ncd\n", "x\n\n"]
+        patterns = ["", "^", "$", "^$", "a", "b\\s", "\\s", "b\\nc", "d$"]
+        for text in texts:
+            lines = text.split("\n")[:-1] if text.endswith("\n") else text.split("\n") if text else []
+            for pattern in patterns:
+                with self.subTest(text=text, pattern=pattern):
+                    expected = [line for line in lines if re.search(pattern, line, re.MULTILINE)]
+                    self.assertEqual(expected, builtins.grep(lambda node: node.value, "grep", s.String(pattern), s.String(text)))
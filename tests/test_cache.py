@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+
+from renderscript.cache import ScriptCache
+from renderscript.utils import compile_script, execute_script, make_default_interpreter
+
+
+class TestScriptCache(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.cache = ScriptCache(self._directory.name)
+
+    def test_round_trip(self):
+        source = '(let x (list 1 "two" true)) (for-each y x (equals y 1))'
+        self.assertIsNone(self.cache.get(source))
+        compiled_script = compile_script(source, self.cache)
+        self.assertEqual(compiled_script, self.cache.get(source))
+        self.assertIsNot(compiled_script, self.cache.get(source))
+
+    def test_execute_with_cache(self):
+        source = '(equals (length (list 1 2 3)) 3)'
+        self.assertTrue(execute_script(source, make_default_interpreter(), self.cache))
+        self.assertTrue(execute_script(source, make_default_interpreter(), self.cache))
+        self.assertIsNotNone(self.cache.get(source))
+
+    def test_key_includes_version(self):
+        other_version = ScriptCache(self._directory.name, version='other')
+        self.assertNotEqual(self.cache.key('(list)'), other_version.key('(list)'))
+        compile_script('(list)', self.cache)
+        self.assertIsNone(other_version.get('(list)'))
+
+    def test_invalidate(self):
+        compile_script('(list)', self.cache)
+        self.cache.invalidate('(list)')
+        self.assertIsNone(self.cache.get('(list)'))
+
+    def test_corrupt_entry_is_discarded(self):
+        compile_script('(list)', self.cache)
+        path = os.path.join(self._directory.name, self.cache.key('(list)') + '.pickle')
+        with open(path, 'wb') as cache_file:
+            cache_file.write(b'not a pickle')
+        self.assertIsNone(self.cache.get('(list)'))
+        self.assertFalse(os.path.exists(path))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        sources = [f'(list {index})' for index in range(3)]
+        for index, source in enumerate(sources):
+            compile_script(source, self.cache)
+            path = os.path.join(self._directory.name, self.cache.key(source) + '.pickle')
+            os.utime(path, (index, index))
+        entry_size = os.path.getsize(path)
+
+        self.cache.get(sources[0])
+        self.cache.max_bytes = entry_size * 2
+        self.cache.evict()
+
+        self.assertIsNotNone(self.cache.get(sources[0]))
+        self.assertIsNone(self.cache.get(sources[1]))
+        self.assertIsNotNone(self.cache.get(sources[2]))
+        self.assertEqual([], [name for name in os.listdir(self._directory.name) if name.endswith('.tmp')])
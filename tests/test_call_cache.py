@@ -0,0 +1,186 @@
+import asyncio
+import unittest
+
+from renderscript.call_cache import CallCache, idempotent, mutating
+from renderscript.closure_compiler import compile_closures
+from renderscript.utils import (
+    compile_script, execute_compiled, execute_compiled_async, make_default_interpreter,
+    make_default_async_interpreter, make_default_context
+)
+
+
+class _FakeDevice:
+
+    def __init__(self):
+        self.commands = []
+        self.hostname = "r1"
+
+    @idempotent
+    def exec_cmd(self, evaluate, _name, command):
+        command = evaluate(command)
+        self.commands.append(command)
+        return [f"{self.hostname}: {command}"]
+
+    @mutating
+    def configure(self, evaluate, _name, hostname):
+        self.hostname = evaluate(hostname)
+        self.commands.append(f"hostname {self.hostname}")
+
+
+class _FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CallCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.device = _FakeDevice()
+
+    def _interpreter(self, cache):
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('exec-cmd', self.device.exec_cmd)
+        interpreter.register_external_call('configure', self.device.configure)
+        return cache.install(interpreter)
+
+    def _run(self, cache, script):
+        return execute_compiled(compile_script(script), self._interpreter(cache))
+
+    def test_repeated_calls_are_memoised(self):
+        cache = CallCache()
+        result = self._run(cache, '(list (exec-cmd "sh run") (exec-cmd (append "sh " "run")) (exec-cmd "sh ver"))')
+        self.assertEqual([["r1: sh run"], ["r1: sh run"], ["r1: sh ver"]], result)
+        self.assertEqual(["sh run", "sh ver"], self.device.commands)
+        self.assertEqual(
+            {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3, 'size': 2, 'evictions': 0, 'invalidations': 0},
+            cache.stats()
+        )
+
+    def test_cache_is_shared_across_scripts(self):
+        cache = CallCache()
+        self._run(cache, '(exec-cmd "sh run")')
+        self._run(cache, '(exec-cmd "sh run")')
+        self.assertEqual(["sh run"], self.device.commands)
+        self.assertEqual(0.5, cache.hit_rate)
+
+    def test_mutating_call_invalidates(self):
+        cache = CallCache()
+        result = self._run(cache, '(exec-cmd "sh run")\n(configure "r2")\n(exec-cmd "sh run")')
+        self.assertEqual(["r2: sh run"], result)
+        self.assertEqual(["sh run", "hostname r2", "sh run"], self.device.commands)
+        self.assertEqual(1, cache.stats()['invalidations'])
+
+    def test_declaring_calls_by_name(self):
+        cache = CallCache()
+        interpreter = make_default_interpreter()
+        calls = []
+        interpreter.register_external_call('show', lambda evaluate, _name, arg: calls.append(evaluate(arg)) or arg)
+        cache.install(interpreter, idempotent_calls=['show'])
+        execute_compiled(compile_script('(show 1)\n(show 1)'), interpreter)
+        self.assertEqual([1], calls)
+
+    def test_ttl(self):
+        clock = _FakeClock()
+        cache = CallCache(ttl=30, clock=clock)
+        self._run(cache, '(exec-cmd "sh run")')
+        clock.now = 29
+        self._run(cache, '(exec-cmd "sh run")')
+        clock.now = 60
+        self._run(cache, '(exec-cmd "sh run")')
+        self.assertEqual(["sh run", "sh run"], self.device.commands)
+
+    def test_size_limit(self):
+        cache = CallCache(max_size=2)
+        self._run(cache, '(exec-cmd "a")\n(exec-cmd "b")\n(exec-cmd "a")\n(exec-cmd "c")\n(exec-cmd "b")')
+        self.assertEqual(["a", "b", "c", "b"], self.device.commands)
+        self.assertEqual(2, cache.stats()['evictions'])
+        self.assertEqual(2, len(cache))
+
+    def test_cached_results_are_not_aliased(self):
+        cache = CallCache()
+        interpreter = self._interpreter(cache)
+        first = execute_compiled(compile_script('(exec-cmd "sh run")'), interpreter)
+        first.append("changed")
+        second = execute_compiled(compile_script('(exec-cmd "sh run")'), interpreter)
+        self.assertEqual(["r1: sh run"], second)
+
+    def test_closure_compiled_backend(self):
+        cache = CallCache()
+        context = make_default_context()
+        context.register_external_call('exec-cmd', self.device.exec_cmd)
+        cache.install(context)
+        compiled = compile_closures(compile_script('(for-each x (list 1 2 3) (exec-cmd "sh run"))'))
+        self.assertEqual([["r1: sh run"]] * 3, compiled.run(context))
+        self.assertEqual(["sh run"], self.device.commands)
+
+    def test_async_external_calls(self):
+        commands = []
+
+        @idempotent
+        async def _exec_cmd(evaluate, _name, command):
+            command = await evaluate(command)
+            commands.append(command)
+            return command.upper()
+
+        cache = CallCache()
+        interpreter = make_default_async_interpreter()
+        interpreter.register_external_call('exec-cmd', _exec_cmd)
+        cache.install(interpreter)
+        result = asyncio.run(execute_compiled_async(
+            compile_script('(list (exec-cmd (append "sh " "run")) (exec-cmd "sh run"))'), interpreter
+        ))
+        self.assertEqual(["SH RUN", "SH RUN"], result)
+        self.assertEqual(["sh run"], commands)
+
+    def test_symbol_arguments(self):
+        cache = CallCache()
+        interpreter = make_default_interpreter()
+        cache.install(interpreter, idempotent_calls=['split'])
+        result = execute_compiled(compile_script(
+            '(list (split "a" "xAyaz" ignorecase) (split "a" "xAyaz" ignorecase) (split "a" "xAyaz"))'
+        ), interpreter)
+        self.assertEqual([["x", "y", "z"], ["x", "y", "z"], ["xAy", "z"]], result)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+    def test_arguments_the_call_does_not_evaluate(self):
+        commands = []
+
+        @idempotent
+        def _first(evaluate, _name, command, _unused):
+            commands.append(evaluate(command))
+            return commands[-1]
+
+        cache = CallCache()
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('first', _first)
+        cache.install(interpreter)
+        result = execute_compiled(
+            compile_script('(list (first "a" (length missing)) (first "a" (length missing)))'), interpreter
+        )
+        self.assertEqual(["a", "a"], result)
+        self.assertEqual(["a", "a"], commands)
+
+    def test_async_symbol_arguments(self):
+        commands = []
+
+        @idempotent
+        async def _exec_cmd(evaluate, _name, command, *flags):
+            command = await evaluate(command)
+            commands.append(command)
+            return [command] + [flag.label for flag in flags]
+
+        cache = CallCache()
+        interpreter = make_default_async_interpreter()
+        interpreter.register_external_call('exec-cmd', _exec_cmd)
+        cache.install(interpreter)
+        result = asyncio.run(execute_compiled_async(
+            compile_script('(list (exec-cmd "sh run" brief) (exec-cmd "sh run" brief) (exec-cmd "sh run"))'),
+            interpreter
+        ))
+        self.assertEqual([["sh run", "brief"], ["sh run", "brief"], ["sh run"]], result)
+        self.assertEqual(["sh run", "sh run"], commands)
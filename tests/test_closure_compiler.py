@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock, ANY
+import unittest
+
+from renderscript.closure_compiler import compile_closures, ExecutionContext
+from renderscript.utils import compile_script, execute_compiled, make_default_interpreter, make_default_context
+from renderscript import structure
+from tests.test_interpreter import INTERPRETER_TEST_CASES, SCOPING_TEST_SCRIPTS
+
+
+class ClosureCompilerTests(unittest.TestCase):
+
+    def test_matches_interpreter(self):
+        for input_structure, expected_output in INTERPRETER_TEST_CASES:
+            with self.subTest(str(input_structure)):
+                compiled = compile_closures([input_structure])
+                result = compiled.run(ExecutionContext())
+                self.assertEqual(expected_output, result, "compiled result should match expected output")
+
+    def test_call_behaviour(self):
+        mock_log_function = MagicMock(side_effect=lambda evaluate, _name, *args: [evaluate(arg) for arg in args])
+        context = ExecutionContext()
+        context.register_external_call('log', mock_log_function)
+        arguments = [
+            structure.Number(10),
+            structure.String("hello"),
+            structure.Bool(False),
+        ]
+        compiled = compile_closures([structure.Call(structure.Identifier('log'), arguments)])
+        self.assertEqual([10, "hello", False], compiled.run(context))
+        mock_log_function.assert_called_with(ANY, 'log', *arguments)
+
+    def test_unknown_function(self):
+        compiled = compile_closures([structure.Call(structure.Identifier('missing'), [])])
+        with self.assertRaises(Exception) as cm:
+            compiled.run(ExecutionContext())
+        self.assertEqual(("unknown function 'missing' (arguments: [])",), cm.exception.args)
+
+    def test_unknown_variable(self):
+        compiled = compile_closures([
+            structure.If(
+                structure.Bool(False),
+                structure.Let(structure.Identifier("x"), structure.Number(1)),
+                structure.Bool(False),
+            ),
+            structure.Identifier("x"),
+        ])
+        with self.assertRaises(Exception) as cm:
+            compiled.run(ExecutionContext())
+        self.assertEqual(("unknown variable 'x'",), cm.exception.args)
+
+    def test_scoping_matches_interpreter(self):
+        for script in SCOPING_TEST_SCRIPTS:
+            with self.subTest(script):
+                compiled_script = compile_script(script)
+                expected = execute_compiled(compiled_script, make_default_interpreter())
+                result = compile_closures(compiled_script).run(make_default_context())
+                self.assertEqual(expected, result)
+
+    def test_reusable_across_contexts(self):
+        compiled = compile_closures(compile_script('(let x (exec-cmd "sh ver")) (append "version: " x)'))
+        for version in ["1.0", "2.0"]:
+            context = make_default_context()
+            context.register_external_call('exec-cmd', lambda evaluate, _name, cmd, v=version: v)
+            self.assertEqual(f"version: {version}", compiled.run(context))
@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock, ANY
+import unittest
+
+from renderscript.closure_compiler import ExecutionContext
+from renderscript.codegen import PythonCodeGenerator, transpile
+from renderscript.utils import compile_script, execute_compiled, make_default_interpreter, make_default_context
+from renderscript import structure
+from tests.test_interpreter import INTERPRETER_TEST_CASES, SCOPING_TEST_SCRIPTS
+
+
+class CodeGeneratorTests(unittest.TestCase):
+
+    def test_matches_interpreter(self):
+        for input_structure, expected_output in INTERPRETER_TEST_CASES:
+            with self.subTest(str(input_structure)):
+                transpiled = PythonCodeGenerator().transpile([input_structure])
+                result = transpiled.run(ExecutionContext())
+                self.assertEqual(expected_output, result, "transpiled result should match expected output")
+
+    def test_call_behaviour(self):
+        mock_log_function = MagicMock(side_effect=lambda evaluate, _name, *args: [evaluate(arg) for arg in args])
+        context = ExecutionContext()
+        context.register_external_call('log', mock_log_function)
+        arguments = [
+            structure.Number(10),
+            structure.String("hello"),
+            structure.Bool(False),
+        ]
+        transpiled = PythonCodeGenerator().transpile([structure.Call(structure.Identifier('log'), arguments)])
+        self.assertEqual([10, "hello", False], transpiled.run(context))
+        mock_log_function.assert_called_with(ANY, 'log', *arguments)
+
+    def test_scoping_matches_interpreter(self):
+        for script in SCOPING_TEST_SCRIPTS:
+            with self.subTest(script):
+                compiled_script = compile_script(script)
+                expected = execute_compiled(compiled_script, make_default_interpreter())
+                result = PythonCodeGenerator().transpile(compiled_script).run(make_default_context())
+                self.assertEqual(expected, result)
+
+    def test_simple_foreach_is_a_comprehension(self):
+        source, _ = PythonCodeGenerator().generate(compile_script("(for-each x (list 1 2) x)"))
+        self.assertIn("for _v1_0 in", source)
+        self.assertNotIn("def _body", source)
+
+    def test_unknown_variable(self):
+        with self.assertRaises(Exception) as cm:
+            PythonCodeGenerator().transpile(compile_script("(list x)"))
+        self.assertEqual(("unknown variable 'x'",), cm.exception.args)
+
+    def test_transpile_is_cached_per_script(self):
+        compiled_script = compile_script("(list 1 2)")
+        self.assertIs(transpile(compiled_script), transpile(compiled_script))
+        self.assertIsNot(transpile(compiled_script), transpile(compile_script("(list 1 2)")))
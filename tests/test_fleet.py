@@ -0,0 +1,61 @@
+import threading
+import unittest
+
+
+from renderscript.builtin_functions import register_builtins
+from renderscript.closure_compiler import compile_closures, ExecutionContext
+from renderscript.fleet import FleetRunner
+from renderscript.utils import compile_script
+
+
+class TestFleetRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.compiled = compile_closures(compile_script("""
+        (let version (exec-cmd "sh ver"))
+        (if (equals version "bad") (fail version) (append "version: " version))
+        """))
+
+    def test_runs_every_device(self):
+        results = list(FleetRunner(self.compiled, max_workers=4).run(
+            self._call_table(f"{index}.0") for index in range(20)
+        ))
+        self.assertEqual(list(range(20)), sorted(result.index for result in results))
+        for result in results:
+            self.assertTrue(result.succeeded)
+            self.assertEqual(f"version: {result.index}.0", result.result)
+
+    def test_errors_are_reported_per_device(self):
+        results = sorted(
+            FleetRunner(self.compiled, max_workers=2).run([
+                self._call_table("1.0"),
+                self._call_table("bad"),
+            ]),
+            key=lambda device_result: device_result.index
+        )
+        self.assertEqual("version: 1.0", results[0].result)
+        self.assertIsNone(results[1].result)
+        self.assertEqual(("unknown function 'fail' (arguments: [Identifier(label='version')])",), results[1].error.args)
+
+    def test_results_are_yielded_as_devices_finish(self):
+        release_slow_device = threading.Event()
+
+        def _slow_exec_cmd(evaluate, _name, cmd):
+            release_slow_device.wait(timeout=5)
+            return "slow"
+
+        slow_table = self._call_table("unused")
+        slow_table['exec-cmd'] = _slow_exec_cmd
+        results = FleetRunner(self.compiled, max_workers=2).run([slow_table, self._call_table("fast")])
+
+        first = next(results)
+        self.assertEqual(1, first.index)
+        release_slow_device.set()
+        self.assertEqual("version: slow", next(results).result)
+
+    @staticmethod
+    def _call_table(version):
+        context = ExecutionContext()
+        register_builtins(context)
+        context.register_external_call('exec-cmd', lambda evaluate, _name, cmd: version)
+        return context.external_calls
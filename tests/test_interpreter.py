@@ -5,101 +5,140 @@ from renderscript.interpreter import Interpreter
 from renderscript import structure
 
 
+INTERPRETER_TEST_CASES = [
+    (
+        structure.Bool(True),
+        True,
+    ),
+    (
+        structure.Bool(False),
+        False,
+    ),
+    (
+        structure.Number(10),
+        10,
+    ),
+    (
+        structure.Number(24.0),
+        24.0,
+    ),
+    (
+        structure.String("hello"),
+        "hello",
+    ),
+    (
+        structure.List([
+            structure.Number(10),
+            structure.String("hello"),
+            structure.Bool(False)
+        ]),
+        [10, "hello", False],
+    ),
+    (
+        structure.MakeMap([
+            (structure.String("hello"), structure.Number(24)),
+            (structure.Number(15), structure.Bool(False)),
+            (structure.Bool(True), structure.String("hi")),
+        ]),
+        {
+            "hello": 24,
+            15: False,
+            True: "hi",
+        },
+    ),
+    (
+        structure.Do([
+            structure.Let(structure.Identifier("x"), structure.Number(10)),
+            structure.Identifier("x"),
+        ]),
+        10,
+    ),
+    (
+        structure.ForEach(
+            structure.Identifier("x"),
+            structure.List([
+                structure.String("hello"),
+                structure.Number(10)
+            ]),
+            structure.Identifier("x"),
+        ),
+        ["hello", 10],
+    ),
+    (
+        structure.If(
+            structure.Bool(True),
+            structure.String("Hello"),
+            structure.String("Hi"),
+        ),
+        "Hello",
+    ),
+    (
+        structure.If(
+            structure.Bool(False),
+            structure.String("Hello"),
+            structure.String("Hi"),
+        ),
+        "Hi",
+    ),
+    (
+        structure.If(
+            structure.Bool(True),
+            structure.Do([
+                structure.String("Hello"),
+            ]),
+            structure.String("Hi"),
+        ),
+        "Hello",
+    ),
+    (
+        structure.Comment("hello"),
+        None,
+    ),
+]
+
+SCOPING_TEST_SCRIPTS = [
+    """
+    (let x 1)
+    (let ys (for-each y (list 1 2 3) (do (let x (append (list x) (list y))) x)))
+    (list x ys)
+    """,
+    """
+    (for-each a (list 1 2) (for-each b (list 3 4) (list a b)))
+    """,
+    """
+    (let x "outer")
+    (for-each y (list 1 2) (do (let z x) (let x y) (list z x)))
+    """,
+    """
+    (let x "outer")
+    (for-each-parallel y (list 1 2) (do (let z x) (let x y) (list z x)))
+    """,
+    """
+    (let x 1)
+    (list x (do (let x 2) x) (if (equals x 2) (let y 3) (let y 4)) y)
+    """,
+    """
+    (equals (do (let q (length (list (do (let r 3) r)))) q) r)
+    """,
+    """
+    (let lines (split "," "a,B,c" multiline))
+    (for-each line (for-each l lines (append l "!")) (do (let n (length line)) (list line n)))
+    """,
+    """
+    (let x 1)
+    (for-each y (list 1 2) (do (if (equals y 2) (let x y) (list)) x))
+    """,
+    """
+    (let x 1)
+    (for-each a (list 1 2) (for-each b (list 3 4) (do (if (equals b 4) (let x (list a b)) (list)) x)))
+    """,
+]
+
+
 class InterpreterTests(unittest.TestCase):
 
     def test_interpreter(self):
-        test_cases = [
-            (
-                structure.Bool(True),
-                True,
-            ),
-            (
-                structure.Bool(False),
-                False,
-            ),
-            (
-                structure.Number(10),
-                10,
-            ),
-            (
-                structure.Number(24.0),
-                24.0,
-            ),
-            (
-                structure.String("hello"),
-                "hello",
-            ),
-            (
-                structure.List([
-                    structure.Number(10),
-                    structure.String("hello"),
-                    structure.Bool(False)
-                ]),
-                [10, "hello", False],
-            ),
-            (
-                structure.MakeMap([
-                    (structure.String("hello"), structure.Number(24)),
-                    (structure.Number(15), structure.Bool(False)),
-                    (structure.Bool(True), structure.String("hi")),
-                ]),
-                {
-                    "hello": 24,
-                    15: False,
-                    True: "hi",
-                },
-            ),
-            (
-                structure.Do([
-                    structure.Let(structure.Identifier("x"), structure.Number(10)),
-                    structure.Identifier("x"),
-                ]),
-                10,
-            ),
-            (
-                structure.ForEach(
-                    structure.Identifier("x"),
-                    structure.List([
-                        structure.String("hello"),
-                        structure.Number(10)
-                    ]),
-                    structure.Identifier("x"),
-                ),
-                ["hello", 10],
-            ),
-            (
-                structure.If(
-                    structure.Bool(True),
-                    structure.String("Hello"),
-                    structure.String("Hi"),
-                ),
-                "Hello",
-            ),
-            (
-                structure.If(
-                    structure.Bool(False),
-                    structure.String("Hello"),
-                    structure.String("Hi"),
-                ),
-                "Hi",
-            ),
-            (
-                structure.If(
-                    structure.Bool(True),
-                    structure.Do([
-                        structure.String("Hello"),
-                    ]),
-                    structure.String("Hi"),
-                ),
-                "Hello",
-            ),
-            (
-                structure.Comment("hello"),
-                None,
-            ),
-        ]
-
-        for input_structure, expected_output in test_cases:
+        for input_structure, expected_output in INTERPRETER_TEST_CASES:
             with self.subTest(str(input_structure)):
                 visitor = Interpreter()
                 result = visitor.accept(input_structure)
@@ -0,0 +1,78 @@
+import types
+import unittest
+
+
+from renderscript.closure_compiler import compile_closures
+from renderscript.codegen import PythonCodeGenerator
+from renderscript.utils import (
+    compile_script, execute_compiled, iterate_compiled, make_default_interpreter, make_default_context
+)
+
+
+class TestLazyForEach(unittest.TestCase):
+
+    def setUp(self):
+        self.logged = []
+
+    def _log(self, evaluate, _name, value):
+        result = evaluate(value)
+        self.logged.append(result)
+        return result
+
+    def _backends(self):
+        def _interpreter(compiled_script):
+            interpreter = make_default_interpreter()
+            interpreter.register_external_call('log', self._log)
+            return execute_compiled(compiled_script, interpreter)
+
+        def _closures(compiled_script):
+            context = make_default_context()
+            context.register_external_call('log', self._log)
+            return compile_closures(compiled_script).run(context)
+
+        def _transpiled(compiled_script):
+            context = make_default_context()
+            context.register_external_call('log', self._log)
+            return PythonCodeGenerator().transpile(compiled_script).run(context)
+
+        return [("interpreter", _interpreter), ("closures", _closures), ("transpiled", _transpiled)]
+
+    def test_nested_foreach_streams_its_collection(self):
+        compiled_script = compile_script("""
+        (for-each y (for-each x (list 1 2) (log x)) (log (list "y" y)))
+        """)
+        for name, run in self._backends():
+            with self.subTest(name):
+                self.logged = []
+                result = run(compiled_script)
+                self.assertEqual([["y", 1], ["y", 2]], result)
+                self.assertEqual([1, ["y", 1], 2, ["y", 2]], self.logged)
+
+    def test_discarded_results_keep_side_effects_and_scoping(self):
+        compiled_script = compile_script("""
+        (let total (list))
+        (for-each x (list 1 2 3) (do (let doubled (list x x)) (log doubled)))
+        (do
+            (if true (for-each x (list 4) (log x)) (log "never"))
+            (let y (length total))
+            y)
+        """)
+        for name, run in self._backends():
+            with self.subTest(name):
+                self.logged = []
+                self.assertEqual(0, run(compiled_script))
+                self.assertEqual([[1, 1], [2, 2], [3, 3], 4], self.logged)
+
+    def test_iterate_compiled_is_lazy(self):
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('log', self._log)
+        results = iterate_compiled(compile_script("""
+        (log "setup")
+        (for-each x (list 1 2 3) (log x))
+        """), interpreter)
+
+        self.assertIsInstance(results, types.GeneratorType)
+        self.assertEqual(["setup"], self.logged)
+        self.assertEqual(1, next(results))
+        self.assertEqual(["setup", 1], self.logged)
+        self.assertEqual([2, 3], list(results))
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+
+from renderscript.interpreter import Interpreter
+from renderscript.middleware import MiddlewarePipeline
+from renderscript import structure
+
+
+class _Recorder:
+
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+
+    def __call__(self, accept, visiting):
+        self.events.append((self.name, type(visiting).__name__))
+        return accept(visiting)
+
+
+class MiddlewarePipelineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.script = structure.List([structure.Number(1), structure.String("a")])
+
+    def test_no_middleware_uses_plain_dispatch(self):
+        interpreter = Interpreter()
+        self.assertIs(interpreter._accept_method_lookup, interpreter._dispatch_lookup)
+
+        recorder = interpreter.add_middleware(_Recorder('r', self.events))
+        self.assertIsNot(interpreter._accept_method_lookup, interpreter._dispatch_lookup)
+        interpreter.remove_middleware(recorder)
+        self.assertIs(interpreter._accept_method_lookup, interpreter._dispatch_lookup)
+
+        self.assertEqual([1, "a"], interpreter.accept(self.script))
+        self.assertEqual([], self.events)
+
+    def test_ordering(self):
+        interpreter = Interpreter()
+        interpreter.add_middleware(_Recorder('inner', self.events), order=10)
+        interpreter.add_middleware(_Recorder('outer', self.events), order=-10)
+        interpreter.add_middleware(_Recorder('middle', self.events))
+        interpreter.accept(structure.Number(1))
+        self.assertEqual([('outer', 'Number'), ('middle', 'Number'), ('inner', 'Number')], self.events)
+
+    def test_node_type_filters(self):
+        interpreter = Interpreter()
+        interpreter.add_middleware(_Recorder('numbers', self.events), node_types=[structure.Number])
+        interpreter.add_middleware(_Recorder('all', self.events), node_types=[structure.Node])
+        self.assertEqual([1, "a"], interpreter.accept(self.script))
+        self.assertEqual([
+            ('all', 'List'),
+            ('numbers', 'Number'),
+            ('all', 'Number'),
+            ('all', 'String'),
+        ], self.events)
+
+    def test_filtered_middleware_sees_discarded_nodes(self):
+        interpreter = Interpreter()
+        interpreter.register_external_call('collection', lambda evaluate, _name: [1, 2])
+        interpreter.add_middleware(_Recorder('loops', self.events), node_types=[structure.ForEach])
+        script = structure.Do([
+            structure.ForEach(structure.Identifier('x'), structure.Call(structure.Identifier('collection'), []),
+                              structure.Identifier('x')),
+            structure.Number(3),
+        ])
+        self.assertEqual(3, interpreter.accept(script))
+        self.assertEqual([('loops', 'ForEach')], self.events)
+
+    def test_set_middleware(self):
+        interpreter = Interpreter(middleware=_Recorder('single', self.events))
+        interpreter.accept(structure.Number(1))
+        self.assertEqual([('single', 'Number')], self.events)
+
+        pipeline = MiddlewarePipeline([_Recorder('first', self.events), _Recorder('second', self.events)])
+        interpreter.set_middleware(pipeline)
+        pipeline.clear()
+        self.events.clear()
+        interpreter.accept(structure.Number(1))
+        self.assertEqual([('first', 'Number'), ('second', 'Number')], self.events)
+
+        interpreter.set_middleware(None)
+        self.events.clear()
+        interpreter.accept(structure.Number(1))
+        self.assertEqual([], self.events)
+
+    def test_remove_unknown_middleware(self):
+        with self.assertRaises(Exception):
+            MiddlewarePipeline().remove(_Recorder('missing', self.events))
+
+    def test_parallel_foreach_forks_compose_middleware(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            interpreter = Interpreter(parallel_executor=executor)
+            interpreter.add_middleware(_Recorder('identifiers', self.events), node_types=[structure.Identifier])
+            interpreter.register_external_call('collection', lambda evaluate, _name: [1, 2])
+            result = interpreter.accept(structure.ParallelForEach(
+                structure.Identifier('x'),
+                structure.Call(structure.Identifier('collection'), []),
+                structure.Identifier('x'),
+            ))
+        self.assertEqual([1, 2], result)
+        self.assertEqual([('identifiers', 'Identifier')] * 2, self.events)
@@ -0,0 +1,72 @@
+import unittest
+
+from renderscript.optimiser import Optimiser, optimise
+from renderscript.utils import compile_script, execute_compiled, make_default_interpreter
+from renderscript import structure as s
+
+
+class OptimiserTests(unittest.TestCase):
+
+    def test_optimise(self):
+        test_cases = [
+            ('(length (list 1 2 3))', [s.Number(3)], 6),
+            ('(if (equals 1 1) (print "a") (print "b"))', [s.Call(s.Identifier('print'), [s.String("a")])], 9),
+            ('(if (length (list)) (print "a") (print "b"))', [s.Call(s.Identifier('print'), [s.String("b")])], 8),
+            ('(split "," "a,b")', [s.List([s.String("a"), s.String("b")])], 4),
+            ('(split "," "a,b,c,d,e,f")', [s.List([s.String(value) for value in "abcdef"])], 4),
+            ('(split "," "a,b" multiline)', [s.List([s.String("a"), s.String("b")])], 5),
+            ('(split "(" "a")', [s.Call(s.Identifier('split'), [s.String("("), s.String("a")])], 0),
+            ('(let x 1) (append x 1)', [
+                s.Let(s.Identifier('x'), s.Number(1)),
+                s.Call(s.Identifier('append'), [s.Identifier('x'), s.Number(1)]),
+            ], 0),
+            ('(print (append "a" "b"))', [s.Call(s.Identifier('print'), [s.String("ab")])], 4),
+            ('(do (print 1) (do (print 2) (do)) (print 3))', [
+                s.Call(s.Identifier('print'), [s.Number(1)]),
+                s.Call(s.Identifier('print'), [s.Number(2)]),
+                s.Call(s.Identifier('print'), [s.Number(3)]),
+            ], 3),
+            ('(let y (do (print 1) (do)))', [
+                s.Let(s.Identifier('y'), s.Do([s.Call(s.Identifier('print'), [s.Number(1)]), s.Do([])])),
+            ], 0),
+        ]
+        for script, expected_script, expected_removed in test_cases:
+            with self.subTest(script):
+                optimised, removed = optimise(compile_script(script), make_default_interpreter())
+                self.assertEqual(expected_script, optimised)
+                self.assertEqual(expected_removed, removed)
+
+    def test_drops_comments(self):
+        optimiser = Optimiser()
+        optimised = optimiser.optimise([
+            s.Comment("a"),
+            s.Do([s.Comment("b"), s.Number(1), s.Do([s.Number(2), s.Comment("c")])]),
+            s.Comment("d"),
+        ])
+        self.assertEqual([s.Number(1), s.Number(2), s.Comment("d")], optimised)
+        self.assertEqual(5, optimiser.removed_nodes)
+
+    def test_only_folds_pure_calls(self):
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('length', lambda *_: self.fail("should not be called"))
+        script = compile_script('(length (list 1))')
+        self.assertEqual((script, 0), optimise(script, interpreter))
+
+    def test_matches_unoptimised_results(self):
+        scripts = [
+            """
+            (let x (if (equals (length (list 1 2)) 2) "two" "other"))
+            (let ys (for-each y (split " " "a b c") (do (let x (append x y)) x)))
+            (list x ys (and (less-than 1 2) (not false)))
+            """,
+            '(do (let a (list 1)) (do (let b (append a (list 2))) (list a b)))',
+        ]
+        for script in scripts:
+            with self.subTest(script):
+                interpreter = make_default_interpreter()
+                compiled_script = compile_script(script)
+                optimised, _ = optimise(compiled_script, interpreter)
+                self.assertEqual(
+                    execute_compiled(compiled_script, make_default_interpreter()),
+                    execute_compiled(optimised, interpreter),
+                )
@@ -0,0 +1,147 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+import unittest
+
+
+from renderscript.closure_compiler import compile_closures
+from renderscript.codegen import PythonCodeGenerator
+from renderscript.parallel import parallel_map
+from renderscript.utils import (
+    compile_script, execute_compiled, execute_compiled_async,
+    make_default_interpreter, make_default_async_interpreter, make_default_context
+)
+
+
+SCRIPT = """
+(let prefix "no ")
+(for-each-parallel line (list "a" "b" "c" "d" "e" "f")
+    (do
+        (let fix (append prefix line))
+        (exec-cmd fix)
+        fix))
+"""
+
+
+class _Device:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.commands = []
+
+    def exec_cmd(self, evaluate, _name, cmd):
+        command = evaluate(cmd)
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.commands.append(command)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return "ok"
+
+    async def exec_cmd_async(self, evaluate, _name, cmd):
+        command = await evaluate(cmd)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.commands.append(command)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return "ok"
+
+
+class TestParallelForEach(unittest.TestCase):
+
+    EXPECTED = ["no a", "no b", "no c", "no d", "no e", "no f"]
+
+    def test_interpreter(self):
+        device = _Device()
+        interpreter = make_default_interpreter()
+        interpreter.parallel_limit = 3
+        interpreter.register_external_call('exec-cmd', device.exec_cmd)
+        result = execute_compiled(compile_script(SCRIPT), interpreter)
+        self._assert_ran_in_parallel(device, result, 3)
+        self.assertEqual(1, len(interpreter.variable_scopes))
+        self.assertNotIn('fix', interpreter.variable_scopes[0])
+
+    def test_interpreter_with_shared_executor(self):
+        device = _Device()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            interpreter = make_default_interpreter()
+            interpreter.parallel_executor = executor
+            interpreter.parallel_limit = 2
+            interpreter.register_external_call('exec-cmd', device.exec_cmd)
+            result = execute_compiled(compile_script(SCRIPT), interpreter)
+        self._assert_ran_in_parallel(device, result, 2)
+
+    def test_closures(self):
+        device = _Device()
+        context = make_default_context()
+        context.parallel_limit = 3
+        context.register_external_call('exec-cmd', device.exec_cmd)
+        result = compile_closures(compile_script(SCRIPT)).run(context)
+        self._assert_ran_in_parallel(device, result, 3)
+
+    def test_transpiled(self):
+        device = _Device()
+        context = make_default_context()
+        context.parallel_limit = 3
+        context.register_external_call('exec-cmd', device.exec_cmd)
+        result = PythonCodeGenerator().transpile(compile_script(SCRIPT)).run(context)
+        self._assert_ran_in_parallel(device, result, 3)
+
+    def test_async_interpreter(self):
+        device = _Device()
+        interpreter = make_default_async_interpreter()
+        interpreter.parallel_limit = 3
+        interpreter.register_external_call('exec-cmd', device.exec_cmd_async)
+        result = asyncio.run(execute_compiled_async(compile_script(SCRIPT), interpreter))
+        self._assert_ran_in_parallel(device, result, 3)
+
+    def test_parallel_map_propagates_errors(self):
+        def _fail_on_two(value):
+            if value == 2:
+                raise ValueError(value)
+            return value
+
+        with self.assertRaises(ValueError):
+            parallel_map(_fail_on_two, range(5), limit=2)
+
+    def test_nested_parallel_foreach_with_bounded_executor(self):
+        script = compile_script('(for-each-parallel a (list 1 2) (for-each-parallel b (list 3 4) (list a b)))')
+        expected = [[[1, 3], [1, 4]], [[2, 3], [2, 4]]]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            interpreter = make_default_interpreter()
+            interpreter.parallel_executor = executor
+            context = make_default_context()
+            context.parallel_executor = executor
+            for name, run in [
+                ('interpreter', lambda: execute_compiled(script, interpreter)),
+                ('closures', lambda: compile_closures(script).run(context)),
+                ('transpiled', lambda: PythonCodeGenerator().transpile(script).run(context)),
+            ]:
+                with self.subTest(name):
+                    self.assertEqual(expected, self._run_with_timeout(run))
+
+    def test_parallel_map_reuses_a_shared_executor(self):
+        threads = set()
+        parallel_map(lambda _: threads.add(threading.current_thread().name), range(4))
+        parallel_map(lambda _: threads.add(threading.current_thread().name), range(4))
+        self.assertTrue(all(name.startswith('renderscript-parallel') for name in threads))
+
+    def _run_with_timeout(self, run, timeout=10):
+        outcome = []
+        thread = threading.Thread(target=lambda: outcome.append(run()), daemon=True)
+        thread.start()
+        thread.join(timeout)
+        self.assertFalse(thread.is_alive(), "nested parallel for-each deadlocked")
+        return outcome[0]
+
+    def _assert_ran_in_parallel(self, device, result, limit):
+        self.assertEqual(self.EXPECTED, result)
+        self.assertEqual(sorted(self.EXPECTED), sorted(device.commands))
+        self.assertGreater(device.peak, 1)
+        self.assertLessEqual(device.peak, limit)
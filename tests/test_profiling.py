@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from renderscript.async_interpreter import AsyncInterpreter
+from renderscript.interpreter import Interpreter
+from renderscript.middleware import ProfilingMiddleware
+from renderscript.builtin_functions import register_builtins
+from renderscript.utils import compile_script, execute_compiled, execute_compiled_async
+
+
+class _FakeClock:
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        self.now += 1000
+        return self.now
+
+
+class ProfilingMiddlewareTests(unittest.TestCase):
+
+    def _profile(self, script, **kwargs):
+        positions = {}
+        compiled_script = compile_script(script, positions=positions)
+        profiler = ProfilingMiddleware(positions=positions, clock=_FakeClock(), **kwargs)
+        interpreter = Interpreter(middleware=profiler)
+        register_builtins(interpreter)
+        interpreter.register_external_call('exec-cmd', lambda evaluate, _name, cmd: evaluate(cmd))
+        result = execute_compiled(compiled_script, interpreter)
+        return profiler, result
+
+    def test_records_nodes_and_calls(self):
+        profiler, result = self._profile('(let xs (list "a" "b"))\n(for-each x xs (exec-cmd x))')
+        self.assertEqual(["a", "b"], result)
+
+        calls = dict((summary['name'], summary) for summary in profiler.call_summaries())
+        self.assertEqual({'exec-cmd'}, set(calls))
+        self.assertEqual(2, calls['exec-cmd']['count'])
+
+        nodes = dict((summary['label'], summary) for summary in profiler.node_summaries())
+        foreach = nodes['ForEach 2:1']
+        self.assertEqual(('2:1', 1), (foreach['position'], foreach['count']))
+        self.assertEqual(2, nodes['exec-cmd 2:16']['count'])
+        self.assertEqual(6000, nodes['exec-cmd 2:16']['inclusive_ns'])
+        self.assertEqual(7000, foreach['inclusive_ns'] - foreach['exclusive_ns'])
+
+    def test_collapsed_stacks(self):
+        profiler, _ = self._profile('(do (exec-cmd "a") (exec-cmd "b"))')
+        lines = profiler.collapsed_stacks().splitlines()
+        self.assertEqual([
+            'Do 1:1 3',
+            'Do 1:1;exec-cmd 1:20 2',
+            'Do 1:1;exec-cmd 1:20;String 1',
+            'Do 1:1;exec-cmd 1:5 2',
+            'Do 1:1;exec-cmd 1:5;String 1',
+        ], lines)
+
+    def test_exports(self):
+        profiler, _ = self._profile('(exec-cmd "a")')
+        with tempfile.TemporaryDirectory() as directory:
+            summary_path = os.path.join(directory, 'profile.json')
+            stacks_path = os.path.join(directory, 'profile.folded')
+            profiler.write_summary(summary_path)
+            profiler.write_collapsed_stacks(stacks_path)
+            with open(summary_path) as summary_file:
+                self.assertEqual(profiler.summary(), json.load(summary_file))
+            with open(stacks_path) as stacks_file:
+                self.assertEqual(profiler.collapsed_stacks(), stacks_file.read())
+
+    def test_unsampled_runs_record_nothing(self):
+        profiler, result = self._profile('(exec-cmd "a")', sample_rate=0.5, sampler=lambda: 0.9)
+        self.assertEqual("a", result)
+        self.assertFalse(profiler.enabled)
+        self.assertEqual({'sampled': False, 'nodes': [], 'calls': []}, profiler.summary())
+
+    def test_unsampled_profilers_are_not_installed(self):
+        interpreter = Interpreter(middleware=ProfilingMiddleware(sample_rate=0.5, sampler=lambda: 0.9))
+        self.assertEqual(frozenset(), interpreter._wrapped_types)
+        self.assertEqual(interpreter._accept_method_lookup, interpreter._dispatch_lookup)
+
+    def test_async_interpreter(self):
+        positions = {}
+        compiled_script = compile_script('(exec-cmd "a")', positions=positions)
+        profiler = ProfilingMiddleware(positions=positions, clock=_FakeClock())
+        interpreter = AsyncInterpreter(middleware=profiler)
+
+        async def _exec_cmd(evaluate, _name, cmd):
+            command = await evaluate(cmd)
+            await asyncio.sleep(0)
+            return command
+
+        interpreter.register_external_call('exec-cmd', _exec_cmd)
+        self.assertEqual("a", asyncio.run(execute_compiled_async(compiled_script, interpreter)))
+        self.assertEqual([
+            {'label': 'exec-cmd 1:1', 'position': '1:1', 'count': 1, 'inclusive_ns': 4000, 'exclusive_ns': 3000},
+            {'label': 'String', 'position': None, 'count': 1, 'inclusive_ns': 1000, 'exclusive_ns': 1000},
+        ], profiler.node_summaries())
+        self.assertEqual("exec-cmd 1:1 3\nexec-cmd 1:1;String 1\n", profiler.collapsed_stacks())
@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock
+import unittest
+
+
+from renderscript.builtin_functions import register_builtins
+from renderscript.interpreter import SlotInterpreter
+from renderscript.resolver import resolve
+from renderscript.utils import compile_script, execute_compiled, make_default_interpreter, stream_script
+from renderscript import structure
+from tests.test_interpreter import INTERPRETER_TEST_CASES, SCOPING_TEST_SCRIPTS
+
+
+class TestResolver(unittest.TestCase):
+
+    def test_slots(self):
+        outer_x = structure.Identifier("x")
+        inner_x = structure.Identifier("x")
+        y = structure.Identifier("y")
+        let_x = structure.Let(structure.Identifier("x"), structure.Number(1))
+        let_inner_x = structure.Let(structure.Identifier("x"), y)
+        foreach = structure.ForEach(structure.Identifier("y"), structure.List([outer_x]), structure.Do([
+            let_inner_x,
+            inner_x,
+        ]))
+
+        resolution = resolve([let_x, foreach])
+
+        self.assertEqual((0, 0), resolution.slot(let_x))
+        self.assertEqual(((0, 0),), resolution.slot(outer_x))
+        self.assertEqual((1, 0), resolution.slot(foreach))
+        self.assertEqual(((1, 0),), resolution.slot(y))
+        self.assertEqual((1, 1), resolution.slot(let_inner_x))
+        self.assertEqual(((1, 1), (0, 0)), resolution.slot(inner_x))
+        self.assertEqual(1, resolution.root_frame_size)
+        self.assertEqual(2, resolution.frame_sizes[id(foreach)])
+        self.assertEqual(1, resolution.max_depth)
+
+    def test_unknown_variable_is_a_compile_time_error(self):
+        with self.assertRaises(Exception) as cm:
+            resolve(compile_script("(let x 1) (for-each y (list x) z)"))
+        self.assertEqual(("unknown variable 'z'",), cm.exception.args)
+
+    def test_call_arguments_may_be_symbols(self):
+        resolution = resolve(compile_script('(split "a" "b" multiline)'))
+        self.assertEqual({}, resolution.slots)
+
+
+class TestSlotInterpreter(unittest.TestCase):
+
+    def test_interpreter(self):
+        for input_structure, expected_output in INTERPRETER_TEST_CASES:
+            with self.subTest(str(input_structure)):
+                result = execute_compiled([input_structure], SlotInterpreter())
+                self.assertEqual(expected_output, result, "interpreted result should match expected output")
+
+    def test_scoping_matches_interpreter(self):
+        for script in SCOPING_TEST_SCRIPTS:
+            with self.subTest(script):
+                compiled_script = compile_script(script)
+                expected = execute_compiled(compiled_script, make_default_interpreter())
+                interpreter = SlotInterpreter()
+                register_builtins(interpreter)
+                self.assertEqual(expected, execute_compiled(compiled_script, interpreter))
+
+    def test_unknown_variable_is_reported_before_execution(self):
+        mock_exec_cmd = MagicMock()
+        interpreter = SlotInterpreter()
+        interpreter.register_external_call('exec-cmd', mock_exec_cmd)
+        with self.assertRaises(Exception) as cm:
+            execute_compiled([structure.Do([
+                structure.Call(structure.Identifier('exec-cmd'), [structure.String("conf t")]),
+                structure.Identifier("missing"),
+            ])], interpreter)
+        self.assertEqual(("unknown variable 'missing'",), cm.exception.args)
+        mock_exec_cmd.assert_not_called()
+
+    def test_streamed_roots_are_released(self):
+        script = '(let total (list))\n' + '(for-each x (list 1 2) (let total (append total (list x))))\n' * 50 + '(length total)'
+        interpreter = SlotInterpreter()
+        register_builtins(interpreter)
+        self.assertEqual(0, execute_compiled(stream_script(script), interpreter))
+
+        resolution = interpreter._resolver.resolution
+        self.assertEqual(1, len(resolution.resolved_roots))
+        self.assertEqual(1, len(resolution.slots))
+        self.assertEqual({}, resolution.frame_sizes)
+
+    def test_repeated_roots(self):
+        let_x = structure.Let(structure.Identifier("x"), structure.Number(1))
+        self.assertEqual(1, execute_compiled([let_x, let_x, structure.Identifier("x")], SlotInterpreter()))
@@ -107,6 +107,14 @@ class SexpRendererTests(unittest.TestCase):
                 ),
                 '(for-each x (list 1 2 3) x)'
             ),
+            (
+                structure.ParallelForEach(
+                    structure.Identifier('x'),
+                    structure.Identifier('xs'),
+                    structure.Identifier('x')
+                ),
+                '(for-each-parallel x xs x)'
+            ),
             (
                 structure.Do([
                     structure.Identifier('x'),
@@ -0,0 +1,130 @@
+import asyncio
+import io
+import itertools
+import json
+import unittest
+
+from renderscript.closure_compiler import compile_closures
+from renderscript.tracing import (
+    Tracer, RingBufferExporter, JsonLinesExporter, OtlpExporter, LocalCollector, argument_digest
+)
+from renderscript.utils import (
+    compile_script, execute_compiled, execute_compiled_async, make_default_interpreter,
+    make_default_async_interpreter, make_default_context
+)
+
+
+SCRIPT = '(let lines (list "a" "b"))\n(for-each line lines (exec-cmd (append "show " line)))'
+
+
+def _exec_cmd(evaluate, _name, command):
+    return f"output of {evaluate(command)}"
+
+
+def _tracer(exporter, **kwargs):
+    counter = itertools.count(1)
+    ticks = itertools.count(0, 10)
+    return Tracer(exporter, id_generator=lambda _bits: next(counter), clock=lambda: next(ticks), **kwargs)
+
+
+class TracerTests(unittest.TestCase):
+
+    def _run(self, tracer, script=SCRIPT):
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('exec-cmd', _exec_cmd)
+        tracer.instrument(interpreter)
+        return execute_compiled(compile_script(script), interpreter)
+
+    def test_spans_for_calls(self):
+        exporter = RingBufferExporter()
+        result = self._run(_tracer(exporter, device_context={'device.name': 'r1'}))
+        self.assertEqual(["output of show a", "output of show b"], result)
+
+        spans = exporter.spans()
+        self.assertEqual(['append', 'exec-cmd', 'append', 'exec-cmd'], [span.name for span in spans])
+        trace_id = f"{1:032x}"
+        self.assertTrue(all(span.trace_id == trace_id for span in spans))
+
+        append, exec_cmd, _, _ = spans
+        self.assertEqual(exec_cmd.span_id, append.parent_span_id)
+        self.assertIsNone(exec_cmd.parent_span_id)
+        self.assertEqual({
+            'device.name': 'r1',
+            'renderscript.call.argument_digest': argument_digest(["show a"]),
+            'renderscript.call.argument_count': 1,
+            'renderscript.call.result_size': len("output of show a"),
+        }, exec_cmd.attributes)
+        self.assertEqual((0, 30), (exec_cmd.start_ns, exec_cmd.end_ns))
+
+    def test_errors_are_recorded(self):
+        exporter = RingBufferExporter()
+        with self.assertRaises(Exception):
+            self._run(_tracer(exporter), '(exec-cmd (missing))')
+        self.assertEqual(['exec-cmd'], [span.name for span in exporter.spans()])
+        self.assertEqual("Exception: unknown function 'missing' (arguments: [])", exporter.spans()[0].error)
+
+    def test_unsampled_runs_are_not_instrumented(self):
+        exporter = RingBufferExporter()
+        interpreter = make_default_interpreter()
+        calls = dict(interpreter.external_calls)
+        tracer = Tracer(exporter, sample_rate=0.1, sampler=lambda: 0.5)
+        tracer.instrument(interpreter)
+        self.assertFalse(tracer.sampled)
+        self.assertEqual(calls, interpreter.external_calls)
+
+    def test_ring_buffer_capacity(self):
+        exporter = RingBufferExporter(capacity=2)
+        self._run(_tracer(exporter))
+        self.assertEqual(['append', 'exec-cmd'], [span.name for span in exporter.spans()])
+
+    def test_closure_compiled_backend(self):
+        exporter = RingBufferExporter()
+        context = make_default_context()
+        context.register_external_call('exec-cmd', _exec_cmd)
+        _tracer(exporter).instrument(context)
+        compile_closures(compile_script(SCRIPT)).run(context)
+        self.assertEqual(['append', 'exec-cmd', 'append', 'exec-cmd'],
+                         [span.name for span in exporter.spans()])
+
+    def test_async_external_calls(self):
+        async def _fetch(evaluate, _name, command):
+            await asyncio.sleep(0)
+            return [await evaluate(command)]
+
+        exporter = RingBufferExporter()
+        interpreter = make_default_async_interpreter()
+        interpreter.register_external_call('fetch', _fetch)
+        _tracer(exporter).instrument(interpreter)
+        result = asyncio.run(execute_compiled_async(compile_script('(fetch (append "a" "b"))'), interpreter))
+        self.assertEqual(["ab"], result)
+        append, fetch = exporter.spans()
+        self.assertEqual(('append', 'fetch'), (append.name, fetch.name))
+        self.assertEqual(fetch.span_id, append.parent_span_id)
+        self.assertEqual(argument_digest(["ab"]), fetch.attributes['renderscript.call.argument_digest'])
+        self.assertEqual(1, fetch.attributes['renderscript.call.result_size'])
+        self.assertIsNone(fetch.error)
+
+    def test_json_lines_exporter(self):
+        output = io.StringIO()
+        exporter = JsonLinesExporter(output)
+        self._run(_tracer(exporter, device_context={'device.name': 'r1'}))
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(4, len(records))
+        self.assertEqual('exec-cmd', records[1]['name'])
+        self.assertEqual('r1', records[1]['attributes']['device.name'])
+
+    def test_otlp_exporter(self):
+        collector = LocalCollector()
+        exporter = OtlpExporter(collector, batch_size=3)
+        tracer = _tracer(exporter)
+        self._run(tracer)
+        self.assertEqual(1, len(collector.requests))
+        tracer.flush()
+        self.assertEqual(2, len(collector.requests))
+
+        spans = collector.spans()
+        self.assertEqual(['append', 'exec-cmd', 'append', 'exec-cmd'], [span['name'] for span in spans])
+        self.assertEqual(spans[1]['spanId'], spans[0]['parentSpanId'])
+        self.assertEqual({'key': 'renderscript.call.argument_count', 'value': {'intValue': '1'}},
+                         spans[1]['attributes'][1])
+        self.assertEqual({'code': 1}, spans[1]['status'])
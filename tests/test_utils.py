@@ -1,7 +1,9 @@
+import os
+import tempfile
 import unittest
 
 
-from renderscript.utils import make_default_interpreter, execute_script
+from renderscript.utils import make_default_interpreter, execute_script, execute_compiled, execute_file, stream_script
 
 
 class TestUtils(unittest.TestCase):
@@ -13,3 +15,19 @@ class TestUtils(unittest.TestCase):
         (equals (length (list 1 2 3)) 3)
         """, interpreter)
         self.assertTrue(result)
+
+    def test_streamed_forms_run_before_the_rest_is_parsed(self):
+        recorded = []
+        interpreter = make_default_interpreter()
+        interpreter.register_external_call('record', lambda evaluate, _name, value: recorded.append(evaluate(value)))
+
+        with self.assertRaises(Exception):
+            execute_compiled(stream_script('(record 1) (record 2) (record'), interpreter)
+        self.assertEqual([1], recorded)
+
+    def test_execute_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'script.rs')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('(let greeting "héllo")\n(length greeting)\n')
+            self.assertEqual(5, execute_file(path))
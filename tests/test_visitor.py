@@ -76,3 +76,30 @@ class VisitorTests(unittest.TestCase):
 
         self.assertEqual(("no accept function to handle visitor of type int",), cm.exception.args)
 
+    def test_accept_functions_are_cached_per_class(self):
+        class BaseVisitor(Visitor):
+
+            def __init__(self):
+                super().__init__()
+                self.auto_detect_accept_methods()
+
+            def accept_int(self, value: int):
+                return 'base int'
+
+            @staticmethod
+            def helper(value: float):
+                return 'static'
+
+        class DerivedVisitor(BaseVisitor):
+
+            def accept_str(self, value: str):
+                return 'derived str'
+
+        self.assertIs(BaseVisitor.accept_functions(), BaseVisitor.accept_functions())
+        self.assertEqual({int}, set(BaseVisitor.accept_functions()))
+        self.assertEqual({int, str}, set(DerivedVisitor.accept_functions()))
+
+        first, second = DerivedVisitor(), DerivedVisitor()
+        self.assertEqual('base int', first.accept(1))
+        self.assertEqual('derived str', second.accept('a'))
+        self.assertIsNone(first.accept(1.5))